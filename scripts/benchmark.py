@@ -0,0 +1,130 @@
+"""Benchmark the full pipeline at several scales and compare results across commits."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+from src.benchmark import (
+    REPOSITORY_ROOT,
+    BenchmarkSettings,
+    append_history,
+    compare_results,
+    find_record,
+    load_history,
+    run_benchmark,
+)
+
+DEFAULT_HISTORY = REPOSITORY_ROOT / "materials" / "benchmarks" / "history.jsonl"
+
+
+def parse_args() -> argparse.Namespace:
+    """Return parsed CLI arguments."""
+
+    parser = argparse.ArgumentParser(description="Benchmark tiangong-aria-report pipeline runs")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY, help="JSON-lines benchmark history file.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmark and append the results to the history.")
+    run.add_argument(
+        "--scales",
+        default="10,100",
+        help="Comma-separated material counts (or copies of --corpus) to benchmark.",
+    )
+    run.add_argument("--paragraphs", type=int, default=40, help="Paragraphs per synthetic material.")
+    run.add_argument(
+        "--corpus",
+        type=Path,
+        default=None,
+        help="Raw materials directory to replicate instead of a synthetic corpus.",
+    )
+    run.add_argument("--latency", type=float, default=0.0, help="Seconds each fake LLM call takes.")
+    run.add_argument("--jitter", type=float, default=0.0, help="Extra random latency of up to this many seconds.")
+    run.add_argument("--repeat", type=int, default=1, help="Timed runs per scale; the fastest is kept.")
+    run.add_argument("--no-memory", action="store_true", help="Skip the extra tracemalloc run per scale.")
+    run.add_argument("--seed", type=int, default=0, help="Seed for the synthetic corpus and latency jitter.")
+    run.add_argument("--label", default="", help="Optional name for this record, usable in `compare`.")
+
+    compare = commands.add_parser("compare", help="Flag regressions between two recorded commits.")
+    compare.add_argument("baseline", help="Commit, git revision or label of the baseline record.")
+    compare.add_argument("candidate", nargs="?", default="HEAD", help="Commit, git revision or label to check.")
+    compare.add_argument("--threshold", type=float, default=0.1, help="Allowed slowdown as a fraction (0.1 = 10%%).")
+    compare.add_argument("--min-seconds", type=float, default=0.01, help="Ignore time increases below this.")
+    compare.add_argument("--min-mb", type=float, default=1.0, help="Ignore memory increases below this many MiB.")
+    compare.add_argument("--json", action="store_true", help="Print the comparison as JSON.")
+    return parser.parse_args()
+
+
+def run(args: argparse.Namespace) -> None:
+    settings = BenchmarkSettings(
+        scales=tuple(int(value) for value in args.scales.split(",") if value.strip()),
+        paragraphs_per_material=args.paragraphs,
+        corpus=args.corpus,
+        latency=args.latency,
+        jitter=args.jitter,
+        repeat=args.repeat,
+        measure_memory=not args.no_memory,
+        seed=args.seed,
+    )
+    record = run_benchmark(settings, label=args.label)
+    append_history(args.history, record)
+    print(json.dumps(record, ensure_ascii=False, indent=2))
+
+
+def compare(args: argparse.Namespace) -> int:
+    records = load_history(args.history)
+    try:
+        baseline = find_record(records, args.baseline)
+        candidate = find_record(records, args.candidate)
+    except LookupError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    comparison = compare_results(
+        baseline,
+        candidate,
+        threshold=args.threshold,
+        min_seconds=args.min_seconds,
+        min_bytes=int(args.min_mb * 1024 * 1024),
+    )
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "baseline": comparison.baseline,
+                    "candidate": comparison.candidate,
+                    "changes": [
+                        {**change.__dict__, "ratio": round(change.ratio, 4)} for change in comparison.changes
+                    ],
+                },
+                indent=2,
+            )
+        )
+    else:
+        print(f"baseline  {comparison.baseline}\ncandidate {comparison.candidate}\n")
+        print(f"{'scale':>6}  {'metric':<32} {'baseline':>12} {'candidate':>12} {'ratio':>7}")
+        for change in comparison.changes:
+            flag = "  REGRESSION" if change.regression else ""
+            print(
+                f"{change.scale:>6}  {change.metric:<32} {change.baseline:>12.4g} "
+                f"{change.candidate:>12.4g} {change.ratio:>7.2f}{flag}"
+            )
+        print(f"\n{len(comparison.regressions)} regression(s) above {args.threshold:.0%}.")
+    return 1 if comparison.regressions else 0
+
+
+def main() -> None:
+    """Dispatch to the requested subcommand; `compare` exits 1 on regressions."""
+
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
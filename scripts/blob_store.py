@@ -0,0 +1,68 @@
+"""Inspect and garbage-collect the shared segment blob store."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+
+from src.blob_store import BlobStore
+
+
+def parse_args() -> argparse.Namespace:
+    """Return parsed CLI arguments."""
+
+    parser = argparse.ArgumentParser(description="Manage the tiangong-aria-report segment blob store")
+    parser.add_argument(
+        "--store",
+        type=Path,
+        default=Path(os.environ["SEGMENT_BLOB_STORE"]) if os.getenv("SEGMENT_BLOB_STORE") else None,
+        help="Blob store directory (default: $SEGMENT_BLOB_STORE, else <base-path>/materials/blobs).",
+    )
+    parser.add_argument("--base-path", type=Path, default=Path.cwd(), help="Report root used when --store is unset.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Print blob, manifest and pack counts and the reports holding references.")
+    gc = commands.add_parser("gc", help="Delete unreferenced segmentations and blobs and compact sparse packs.")
+    gc.add_argument(
+        "--grace-hours",
+        type=float,
+        default=1.0,
+        help="Keep unreferenced segmentations used within this many hours.",
+    )
+    gc.add_argument(
+        "--compact-ratio",
+        type=float,
+        default=0.5,
+        help="Rewrite packs whose share of dead bytes is at least this fraction.",
+    )
+    gc.add_argument(
+        "--drop-missing-owners",
+        action="store_true",
+        help="Release the references of reports whose raw materials directory no longer exists.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Run the requested blob store command and print the result as JSON."""
+
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    directory = args.store or args.base_path / "materials" / "blobs"
+    with BlobStore(directory) as store:
+        if args.command == "gc":
+            result = store.collect_garbage(
+                grace_seconds=args.grace_hours * 3600,
+                compact_ratio=args.compact_ratio,
+                drop_missing_owners=args.drop_missing_owners,
+            )
+            result = {"removed": result, "stats": store.stats()}
+        else:
+            result = {**store.stats(), "owners": store.owners()}
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Run several report pipelines concurrently from a manifest of jobs."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+from src.batch import load_manifest, run_batch
+from src.llm import SharedLLMResources
+
+
+def parse_args() -> argparse.Namespace:
+    """Return parsed CLI arguments."""
+
+    parser = argparse.ArgumentParser(description="Run a batch of tiangong-aria-report pipelines in one process")
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        required=True,
+        help="JSON array or JSON-lines file of {base_path, title, metadata, name} jobs.",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Number of reports generated concurrently.")
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+        help="Concurrent LLM requests allowed per endpoint across all jobs.",
+    )
+    parser.add_argument(
+        "--requests-per-minute",
+        type=float,
+        default=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+        help="Request rate cap per endpoint across all jobs (0 disables).",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=int(os.getenv("LLM_GENERATION_CACHE_SIZE", "256")),
+        help="Number of generations kept in the shared in-memory cache (0 disables).",
+    )
+    parser.add_argument("--report", type=Path, default=None, help="Optional path for the JSON throughput report.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Execute every job in the manifest and print the throughput report."""
+
+    args = parse_args()
+    resources = SharedLLMResources(
+        max_concurrency_per_endpoint=args.max_concurrency,
+        requests_per_minute=args.requests_per_minute,
+        cache_size=args.cache_size,
+    )
+    try:
+        report = run_batch(load_manifest(args.manifest), max_workers=args.workers, resources=resources)
+    finally:
+        resources.close()
+    rendered = json.dumps(report.as_dict(), ensure_ascii=False, indent=2)
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(rendered, encoding="utf-8")
+    print(rendered)
+
+
+if __name__ == "__main__":
+    main()
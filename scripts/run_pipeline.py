@@ -3,9 +3,13 @@
 from __future__ import annotations
 
 import argparse
+import json
+import logging
 from pathlib import Path
+from typing import Optional
 
-from src.pipeline import run_default
+from src.pipeline import STAGE_NAMES, WritingPipeline, default_config, plan_default, run_default
+from src.profiling import PROFILE_MODES, ProfileSettings
 
 
 def parse_args() -> argparse.Namespace:
@@ -24,14 +28,165 @@ def parse_args() -> argparse.Namespace:
         required=True,
         help="Title for the generated draft.",
     )
+    parser.add_argument(
+        "--incremental",
+        "--resume",
+        dest="incremental",
+        action="store_true",
+        help=(
+            "Redraft only sections whose segments, bullets, prompt template or model parameters changed "
+            "since the last (possibly interrupted) run; reuse the rest from checkpoints."
+        ),
+    )
+    parser.add_argument(
+        "--from-stage",
+        choices=STAGE_NAMES,
+        default=None,
+        help="Start at this stage, loading earlier artifacts from the previous run's stage cache.",
+    )
+    parser.add_argument(
+        "--to-stage",
+        choices=STAGE_NAMES,
+        default=None,
+        help="Stop after this stage (and anything it depends on).",
+    )
+    parser.add_argument(
+        "--trace-file",
+        type=Path,
+        default=None,
+        help="Write a Chrome trace-event JSON of stage, section and LLM spans (open in Perfetto/chrome://tracing).",
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        metavar="STAGES",
+        help=(
+            "Profile these comma-separated stages ('all' for every stage) and write .prof files and "
+            "allocation reports to materials/output/logs/profile. 'draft' is profiled per section."
+        ),
+    )
+    parser.add_argument(
+        "--profile-mode",
+        default="cprofile",
+        help=f"Comma-separated profilers to run: {', '.join(PROFILE_MODES)}.",
+    )
+    parser.add_argument(
+        "--profile-sample",
+        type=float,
+        default=1.0,
+        help="With --profile, fraction of sections (drafts and rewrites) to profile.",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=25,
+        help="With --profile-mode tracemalloc, allocation sites listed per report.",
+    )
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument(
+        "--record-cassette",
+        type=Path,
+        default=None,
+        help="Record every LLM request/response pair with its latency to this JSONL cassette.",
+    )
+    cassette.add_argument(
+        "--replay-cassette",
+        type=Path,
+        default=None,
+        help=(
+            "Serve LLM responses from a recorded cassette instead of calling providers "
+            "(set LLM_REPLAY_SPEED=1 to reproduce the recorded latencies)."
+        ),
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help=(
+            "Only ingest, segment and outline the materials, then print estimated prompt sizes, token "
+            "counts and projected cost per section. No LLM client is created and no API keys are needed."
+        ),
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="With --plan, print the plan as JSON instead of a table.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "Build once, then keep rebuilding as files in materials/raw or the revision directives change. "
+            "Material edits redraft only affected sections; directive edits re-run revise and export only."
+        ),
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=1.0,
+        help="With --watch, seconds without further changes before a rebuild starts.",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="With --watch, poll for changes instead of using inotify.",
+    )
     return parser.parse_args()
 
 
+def profile_settings(args: argparse.Namespace) -> Optional[ProfileSettings]:
+    """Build profiling settings from the --profile options, or None when profiling is off."""
+
+    if not args.profile:
+        return None
+    stages = STAGE_NAMES if args.profile == "all" else tuple(name.strip() for name in args.profile.split(","))
+    unknown = sorted(set(stages) - set(STAGE_NAMES))
+    if unknown:
+        raise SystemExit(f"Unknown stages for --profile: {', '.join(unknown)}; expected {', '.join(STAGE_NAMES)}.")
+    try:
+        return ProfileSettings(
+            stages=stages,
+            modes=tuple(mode.strip() for mode in args.profile_mode.split(",") if mode.strip()),
+            sample_rate=args.profile_sample,
+            top=args.profile_top,
+        )
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+
+
 def main() -> None:
     """Execute the configured pipeline."""
 
     args = parse_args()
-    run_default(args.base_path, args.title)
+    if args.plan:
+        plan = plan_default(args.base_path, args.title)
+        print(json.dumps(plan.as_dict(), ensure_ascii=False, indent=2) if args.json else plan.format_table())
+        return
+    if args.watch:
+        from src.watch import watch_pipeline
+
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+        config = default_config(args.base_path, args.title)
+        config.trace_path = args.trace_file
+        config.profile = profile_settings(args)
+        pipeline = WritingPipeline(config)
+        try:
+            watch_pipeline(pipeline, debounce=args.debounce, use_inotify=not args.poll)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pipeline.close()
+        return
+    run_default(
+        args.base_path,
+        args.title,
+        incremental=args.incremental,
+        start_stage=args.from_stage,
+        stop_stage=args.to_stage,
+        trace_path=args.trace_file,
+        cassette_path=args.record_cassette or args.replay_cassette,
+        cassette_mode="record" if args.record_cassette else "replay",
+        profile=profile_settings(args),
+    )
 
 
 if __name__ == "__main__":
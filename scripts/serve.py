@@ -0,0 +1,75 @@
+"""Run the report service: a local HTTP API in front of warm pipeline workers."""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+from pathlib import Path
+
+from src.llm import SharedLLMResources
+from src.service import ReportService, serve
+
+
+def parse_args() -> argparse.Namespace:
+    """Return parsed CLI arguments."""
+
+    parser = argparse.ArgumentParser(description="Serve tiangong-aria-report pipeline jobs over HTTP")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind.")
+    parser.add_argument("--port", type=int, default=8750, help="Port to listen on.")
+    parser.add_argument("--concurrency", type=int, default=2, help="Number of jobs executed in parallel.")
+    parser.add_argument(
+        "--state-dir",
+        type=Path,
+        default=Path.cwd() / "materials" / "service",
+        help="Directory holding the persistent job queue.",
+    )
+    parser.add_argument(
+        "--allowed-root",
+        type=Path,
+        action="append",
+        default=None,
+        help="Repeatable; restrict submitted base paths to these directories.",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+        help="Concurrent LLM requests allowed per endpoint across all jobs.",
+    )
+    parser.add_argument(
+        "--requests-per-minute",
+        type=float,
+        default=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+        help="Request rate cap per endpoint across all jobs (0 disables).",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Start the service and block until interrupted."""
+
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    resources = SharedLLMResources(
+        max_concurrency_per_endpoint=args.max_concurrency,
+        requests_per_minute=args.requests_per_minute,
+    )
+    service = ReportService(
+        args.state_dir,
+        concurrency=args.concurrency,
+        resources=resources,
+        allowed_roots=args.allowed_root or (),
+    )
+    server = serve(service, (args.host, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Discover text materials on disk, including inside compressed files and archives."""
+
+from __future__ import annotations
+
+import bz2
+import gzip
+import logging
+import lzma
+import tarfile
+import threading
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+# Single compressed text files, e.g. ``notes.txt.gz``.
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz", ".zst")
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".tar.zst", ".tzst")
+ZIP_SUFFIXES = (".zip",)
+# Member directories written by archivers that never hold materials.
+_IGNORED_MEMBER_PREFIXES = ("__MACOSX/",)
+
+
+class ArchiveError(RuntimeError):
+    """Raised when a compressed file or archive cannot be read."""
+
+
+@dataclass(frozen=True)
+class MaterialSource:
+    """A file below the raw materials directory that contributes text materials.
+
+    ``kind`` is ``text`` for plain `.txt` files, ``compressed`` for a single
+    compressed `.txt` file, and ``zip`` or ``tar`` for archives whose `.txt`
+    members are materials.
+    """
+
+    name: str
+    path: Path
+    kind: str
+
+
+def source_kind(name: str) -> Optional[str]:
+    """Return the `MaterialSource` kind for a file name, or None if it holds no materials."""
+
+    lowered = name.lower()
+    if lowered.endswith(".txt"):
+        return "text"
+    if lowered.endswith(TAR_SUFFIXES):
+        return "tar"
+    if lowered.endswith(ZIP_SUFFIXES):
+        return "zip"
+    if lowered.endswith(tuple(f".txt{suffix}" for suffix in COMPRESSED_SUFFIXES)):
+        return "compressed"
+    return None
+
+
+def find_material_sources(directory: Path) -> List[MaterialSource]:
+    """Return every material source under ``directory``, sorted by relative name.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the directory does not exist.
+    """
+
+    if not directory.exists():
+        raise FileNotFoundError(f"Directory does not exist: {directory}")
+    sources = []
+    for path in directory.rglob("*"):
+        kind = source_kind(path.name)
+        if kind is not None and path.is_file():
+            sources.append(MaterialSource(name=path.relative_to(directory).as_posix(), path=path, kind=kind))
+    return sorted(sources, key=lambda source: source.name)
+
+
+def _open_zstd(path: Path) -> BinaryIO:
+    try:
+        from compression import zstd  # type: ignore[import-not-found]  # Python 3.14+
+    except ImportError:
+        pass
+    else:
+        return zstd.open(path, "rb")
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise ArchiveError(f"Reading {path.name} requires Python 3.14+ or the 'zstandard' package.") from exc
+    return zstandard.ZstdDecompressor().stream_reader(path.open("rb"), read_across_frames=True, closefd=True)
+
+
+_OPENERS: Dict[str, Callable[[Path], BinaryIO]] = {
+    ".gz": lambda path: gzip.open(path, "rb"),
+    ".tgz": lambda path: gzip.open(path, "rb"),
+    ".bz2": lambda path: bz2.open(path, "rb"),
+    ".tbz2": lambda path: bz2.open(path, "rb"),
+    ".xz": lambda path: lzma.open(path, "rb"),
+    ".txz": lambda path: lzma.open(path, "rb"),
+    ".zst": _open_zstd,
+    ".tzst": _open_zstd,
+}
+
+
+def open_compressed(path: Path) -> BinaryIO:
+    """Open ``path`` for binary reading, transparently decompressing by suffix."""
+
+    opener = _OPENERS.get(path.suffix.lower())
+    return opener(path) if opener else path.open("rb")
+
+
+def _member_name(name: str) -> Optional[str]:
+    """Normalise an archive member name, or return None for members that are not materials."""
+
+    normalized = PurePosixPath(name.replace("\\", "/").lstrip("/")).as_posix()
+    while normalized.startswith("./"):
+        normalized = normalized[2:]
+    if not normalized.lower().endswith(".txt") or normalized.startswith(_IGNORED_MEMBER_PREFIXES):
+        return None
+    return normalized
+
+
+def iter_tar_members(path: Path) -> Iterator[Tuple[str, bytes]]:
+    """Yield ``(member name, bytes)`` for the `.txt` members of a tar archive, in archive order.
+
+    The archive is read as a single forward stream, so compressed tarballs are
+    decompressed once and members are never extracted to disk.
+    """
+
+    try:
+        with open_compressed(path) as stream, tarfile.open(fileobj=stream, mode="r|") as archive:
+            for member in archive:
+                name = _member_name(member.name)
+                if name is None or not member.isfile():
+                    continue
+                handle = archive.extractfile(member)
+                if handle is not None:
+                    yield name, handle.read()
+    except (tarfile.TarError, EOFError, OSError, lzma.LZMAError) as exc:
+        raise ArchiveError(f"Unable to read archive {path}: {exc}") from exc
+
+
+class ZipBundle:
+    """Read `.txt` members of a zip archive, safely from several threads at once.
+
+    Zip members are compressed independently, so each reader thread gets its own
+    handle and members are inflated in parallel (zlib releases the GIL).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._handles: List[zipfile.ZipFile] = []
+        self._lock = threading.Lock()
+        archive = self._handle()
+        # Map normalised names back to the stored ones, in central-directory order.
+        self.members: Dict[str, str] = {}
+        for info in archive.infolist():
+            name = _member_name(info.filename)
+            if name is not None and not info.is_dir():
+                self.members.setdefault(name, info.filename)
+
+    def read(self, name: str) -> bytes:
+        """Return the uncompressed bytes of a member listed in ``members``."""
+
+        try:
+            return self._handle().read(self.members[name])
+        except (zipfile.BadZipFile, zipfile.LargeZipFile, OSError, EOFError) as exc:
+            raise ArchiveError(f"Unable to read {name} from {self.path}: {exc}") from exc
+
+    def close(self) -> None:
+        with self._lock:
+            for handle in self._handles:
+                handle.close()
+            self._handles.clear()
+
+    def _handle(self) -> zipfile.ZipFile:
+        handle = getattr(self._local, "handle", None)
+        if handle is None:
+            try:
+                handle = zipfile.ZipFile(self.path)
+            except (zipfile.BadZipFile, OSError) as exc:
+                raise ArchiveError(f"Unable to read archive {self.path}: {exc}") from exc
+            self._local.handle = handle
+            with self._lock:
+                self._handles.append(handle)
+        return handle
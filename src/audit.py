@@ -0,0 +1,201 @@
+"""Background sink that keeps LLM audit logging off the drafting critical path."""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO
+
+from .utils import ensure_directory, slugify
+
+LOGGER = logging.getLogger(__name__)
+
+
+def new_run_id() -> str:
+    """Return a sortable identifier for a pipeline run."""
+
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+
+
+@dataclass
+class AuditSinkConfig:
+    """Tunable parameters for the background audit log writer."""
+
+    max_queue: int = 256
+    batch_size: int = 32
+    flush_interval: float = 0.5
+    max_bytes: int = 16 * 1024 * 1024
+    expand: bool = False
+
+
+@dataclass
+class _FlushRequest:
+    """Marker placed on the queue to signal that pending records must hit disk."""
+
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+_STOP = object()
+
+
+class AuditLogSink:
+    """Batch audit records into an append-only, size-rotated JSONL run log.
+
+    Records are handed to a bounded queue and written by a daemon thread, so callers
+    only pay for serialisation when the queue is full. Each run appends to
+    ``run-<run_id>.jsonl``; once a file exceeds ``max_bytes`` the sink continues in
+    ``run-<run_id>.<n>.jsonl``. With ``expand`` enabled the sink also materialises the
+    legacy per-section directory view (candidate markdown, ``merged.md`` and
+    ``metadata.json``).
+    """
+
+    def __init__(self, directory: Path, config: Optional[AuditSinkConfig] = None, run_id: Optional[str] = None) -> None:
+        self.directory = ensure_directory(directory)
+        self.config = config or AuditSinkConfig()
+        self.run_id = run_id or new_run_id()
+        self._queue: "queue.Queue[object]" = queue.Queue(maxsize=max(self.config.max_queue, 1))
+        self._handle: Optional[TextIO] = None
+        self._part = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._drain, name=f"audit-sink-{self.run_id}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def current_path(self) -> Path:
+        """Return the JSONL file records are currently appended to."""
+
+        suffix = f".{self._part}" if self._part else ""
+        return self.directory / f"run-{self.run_id}{suffix}.jsonl"
+
+    def submit(self, record: Dict[str, object]) -> None:
+        """Queue a record for background persistence, blocking while the queue is full."""
+
+        enriched = {"run_id": self.run_id, "timestamp": _timestamp(), **record}
+        # Holding the lock orders the put before close() enqueues _STOP.
+        with self._lock:
+            if not self._closed:
+                self._queue.put(enriched)
+                return
+            LOGGER.warning("Audit sink for run %s is closed; writing record synchronously.", self.run_id)
+            self._write_batch([enriched])
+            self._close_handle()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every record submitted so far is on disk."""
+
+        if self._closed or not self._thread.is_alive():
+            return True
+        request = _FlushRequest()
+        self._queue.put(request)
+        return request.done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Flush outstanding records and stop the background writer."""
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        self._close_handle()
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "AuditLogSink":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.config.flush_interval)
+            except queue.Empty:
+                continue
+            batch: List[Dict[str, object]] = []
+            waiters: List[_FlushRequest] = []
+            stop = False
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, _FlushRequest):
+                    waiters.append(item)
+                else:
+                    batch.append(item)  # type: ignore[arg-type]
+                if stop or len(batch) >= self.config.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception:  # keep draining so submit() never blocks on a dead writer
+                    LOGGER.exception("Failed to persist %d audit records for run %s", len(batch), self.run_id)
+            for waiter in waiters:
+                waiter.done.set()
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[Dict[str, object]]) -> None:
+        encoded: List[str] = []
+        for record in batch:
+            try:
+                encoded.append(json.dumps(record, ensure_ascii=False) + "\n")
+            except (TypeError, ValueError) as exc:
+                LOGGER.error("Dropping unserialisable audit record for run %s: %s", self.run_id, exc)
+        lines = "".join(encoded)
+        handle = self._open_handle()
+        handle.write(lines)
+        handle.flush()
+        if handle.tell() >= self.config.max_bytes:
+            self._close_handle()
+            self._part += 1
+        if self.config.expand:
+            for record in batch:
+                try:
+                    self._expand_record(record)
+                except Exception:
+                    LOGGER.exception("Failed to expand audit record for section %r", record.get("section"))
+
+    def _open_handle(self) -> TextIO:
+        if self._handle is None:
+            self._handle = self.current_path.open("a", encoding="utf-8")
+        return self._handle
+
+    def _close_handle(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def _expand_record(self, record: Dict[str, object]) -> None:
+        """Write the per-section directory view for a section record."""
+
+        if record.get("type") != "section":
+            return
+        section_dir = ensure_directory(self.directory / slugify(str(record.get("section", ""))))
+        metadata = {key: value for key, value in record.items() if key not in {"merged", "candidates"}}
+        candidates = record.get("candidates") or []
+        metadata["candidates"] = []
+        for candidate in candidates:  # type: ignore[union-attr]
+            file_name = f"{candidate['client_id']}-{slugify(str(candidate['model']))}.md"
+            (section_dir / file_name).write_text(str(candidate.get("text", "")), encoding="utf-8")
+            metadata["candidates"].append({key: value for key, value in candidate.items() if key != "text"})
+        (section_dir / "merged.md").write_text(str(record.get("merged", "")), encoding="utf-8")
+        (section_dir / "metadata.json").write_text(json.dumps(metadata, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
@@ -0,0 +1,168 @@
+"""Run many report pipelines in one process with shared LLM resources."""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .llm import SharedLLMResources
+from .pipeline import WritingPipeline, default_config
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchJob:
+    """A single report request inside a batch manifest."""
+
+    base_path: Path
+    title: str
+    metadata: Dict[str, str] = field(default_factory=dict)
+    name: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return self.name or f"{self.base_path.name}:{self.title}"
+
+
+@dataclass
+class BatchJobResult:
+    """Outcome and throughput figures for one batch job."""
+
+    job: str
+    status: str
+    seconds: float
+    sections: int = 0
+    characters: int = 0
+    error: Optional[str] = None
+
+    @property
+    def characters_per_second(self) -> float:
+        return self.characters / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class BatchReport:
+    """Per-job results plus aggregate throughput for a batch run."""
+
+    results: List[BatchJobResult]
+    wall_seconds: float
+    resource_stats: Dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, object]:
+        succeeded = [result for result in self.results if result.status == "ok"]
+        sections = sum(result.sections for result in succeeded)
+        characters = sum(result.characters for result in succeeded)
+        wall = self.wall_seconds or 1e-9
+        return {
+            "jobs": [
+                {**asdict(result), "characters_per_second": round(result.characters_per_second, 2)}
+                for result in self.results
+            ],
+            "aggregate": {
+                "jobs": len(self.results),
+                "succeeded": len(succeeded),
+                "failed": len(self.results) - len(succeeded),
+                "wall_seconds": round(self.wall_seconds, 3),
+                "jobs_per_hour": round(len(succeeded) * 3600 / wall, 2),
+                "sections_per_second": round(sections / wall, 4),
+                "characters_per_second": round(characters / wall, 2),
+            },
+            "resources": self.resource_stats,
+        }
+
+
+def load_manifest(path: Path) -> List[BatchJob]:
+    """Read batch jobs from a JSON array or a JSON-lines file.
+
+    Each entry needs ``base_path`` and ``title`` and may carry ``metadata`` (a
+    string mapping) and ``name``. Relative base paths resolve against the manifest's
+    directory.
+    """
+
+    text = path.read_text(encoding="utf-8").strip()
+    if text.startswith("["):
+        entries = json.loads(text)
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    jobs: List[BatchJob] = []
+    for entry in entries:
+        if "base_path" not in entry or "title" not in entry:
+            raise ValueError(f"Manifest entry must define base_path and title, got: {entry}")
+        base_path = Path(entry["base_path"])
+        if not base_path.is_absolute():
+            base_path = path.parent / base_path
+        jobs.append(
+            BatchJob(
+                base_path=base_path,
+                title=entry["title"],
+                metadata={str(key): str(value) for key, value in entry.get("metadata", {}).items()},
+                name=entry.get("name"),
+            )
+        )
+    return jobs
+
+
+def run_batch(
+    jobs: Sequence[BatchJob],
+    max_workers: int = 4,
+    resources: Optional[SharedLLMResources] = None,
+    pipeline_factory: Optional[Callable[[BatchJob, SharedLLMResources], WritingPipeline]] = None,
+) -> BatchReport:
+    """Run jobs concurrently while sharing clients, rate limits and caches.
+
+    Jobs that target the same base path write to the same output tree, so they run
+    one after another; distinct base paths run in parallel.
+    """
+
+    resources = resources or SharedLLMResources()
+    factory = pipeline_factory or (
+        lambda job, shared: WritingPipeline(default_config(job.base_path, job.title), resources=shared)
+    )
+
+    def execute(job: BatchJob) -> BatchJobResult:
+        started = time.perf_counter()
+        pipeline: Optional[WritingPipeline] = None
+        try:
+            pipeline = factory(job, resources)
+            package = pipeline.run(metadata_overrides=job.metadata)
+        except Exception as exc:  # noqa: BLE001 - one failing report must not stop the batch
+            LOGGER.exception("Batch job %s failed", job.label)
+            return BatchJobResult(job=job.label, status="failed", seconds=time.perf_counter() - started, error=str(exc))
+        finally:
+            if pipeline is not None:
+                pipeline.close()
+        elapsed = time.perf_counter() - started
+        sections = package.draft.sections if package else {}
+        result = BatchJobResult(
+            job=job.label,
+            status="ok",
+            seconds=round(elapsed, 3),
+            sections=len(sections),
+            characters=sum(len(text) for text in sections.values()),
+        )
+        LOGGER.info("Batch job %s finished in %.1fs (%d sections).", job.label, elapsed, result.sections)
+        return result
+
+    groups: Dict[Path, List[int]] = {}
+    for index, job in enumerate(jobs):
+        groups.setdefault(job.base_path.resolve(), []).append(index)
+    results: List[Optional[BatchJobResult]] = [None] * len(jobs)
+
+    def execute_group(indices: List[int]) -> None:
+        for index in indices:
+            results[index] = execute(jobs[index])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1), thread_name_prefix="batch") as pool:
+        list(pool.map(execute_group, groups.values()))
+    return BatchReport(
+        results=[result for result in results if result is not None],
+        wall_seconds=time.perf_counter() - started,
+        resource_stats=resources.stats(),
+    )
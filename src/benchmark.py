@@ -0,0 +1,418 @@
+"""End-to-end pipeline benchmarks against fake LLM clients, with a JSON history.
+
+`run_benchmark` builds a corpus at each requested scale, runs the full
+`WritingPipeline` with `FakeLLMClient`s of configurable latency, and reports
+per-stage wall/CPU time, throughput, net allocated blocks and peak traced
+memory. Results are appended to a JSON-lines history, one record per run,
+and `compare_results` flags regressions between two recorded commits.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .ingestion import iter_materials
+from .llm import LLMClientConfig, LLMGeneration, LLMGenerationPrompt
+from .organization import BUCKET_DEFINITIONS
+from .pipeline import WritingPipeline, default_config
+from .utils import ensure_directory, write_text_file
+
+LOGGER = logging.getLogger(__name__)
+REPOSITORY_ROOT = Path(__file__).resolve().parents[1]
+
+# Filler vocabulary mixed with the bucket keywords so paragraphs look like materials.
+_FILLER_TERMS = (
+    "学生", "教师", "课程", "平台", "数据", "模型", "智能学伴", "知识图谱", "教学",
+    "阶段", "推广", "提升", "可持续", "实施流程", "风险", "对策", "学习分析", "评价",
+)
+
+
+class FakeLLMClient:
+    """`LLMClient` that answers locally after a configurable delay.
+
+    The response quotes the first few ``[SEG-…]`` excerpt lines of the prompt, so
+    scoring and merging see realistic text, and reports character counts as token
+    usage. ``jitter`` adds a uniformly random delay of up to that many seconds.
+    """
+
+    def __init__(
+        self,
+        identifier: str,
+        model: str,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        excerpts: int = 3,
+        seed: int = 0,
+    ) -> None:
+        self.identifier = identifier
+        self.model = model
+        self.provider = "fake"
+        self.latency = latency
+        self.jitter = jitter
+        self.excerpts = excerpts
+        self.calls = 0
+        self._random = random.Random(f"{seed}:{identifier}")
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: LLMGenerationPrompt) -> LLMGeneration:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        lines = [line for line in prompt.user_prompt.splitlines() if line.startswith("[SEG-")]
+        text = "\n\n".join(line.split("] ", 1)[-1] for line in lines[: self.excerpts]) or prompt.user_prompt[:200]
+        usage = {
+            "prompt_tokens": len(prompt.system_prompt) + len(prompt.user_prompt),
+            "completion_tokens": len(text),
+        }
+        return LLMGeneration(
+            text=text,
+            model=self.model,
+            provider=self.provider,
+            raw={"usage": usage, "choices": [{"finish_reason": "stop"}]},
+            latency=delay,
+        )
+
+
+@dataclass
+class BenchmarkSettings:
+    """Parameters of a benchmark run; scales are material counts (or corpus copies)."""
+
+    scales: Tuple[int, ...] = (10, 100)
+    paragraphs_per_material: int = 40
+    corpus: Optional[Path] = None
+    latency: float = 0.0
+    jitter: float = 0.0
+    repeat: int = 1
+    measure_memory: bool = True
+    seed: int = 0
+    title: str = "Benchmark Report"
+
+
+def synthesize_corpus(directory: Path, materials: int, paragraphs: int, seed: int = 0) -> None:
+    """Write ``materials`` deterministic text files of ``paragraphs`` paragraphs each."""
+
+    vocabulary = [keyword for definition in BUCKET_DEFINITIONS.values() for keyword in definition.keywords]
+    vocabulary.extend(_FILLER_TERMS)
+    ensure_directory(directory)
+    for index in range(materials):
+        generator = random.Random(f"{seed}:{index}")
+        blocks = [
+            "".join(generator.choice(vocabulary) for _ in range(generator.randint(8, 30))) + "。"
+            for _ in range(paragraphs)
+        ]
+        (directory / f"material-{index:05d}.txt").write_text("\n\n".join(blocks) + "\n", encoding="utf-8")
+
+
+def replicate_corpus(source: Path, directory: Path, copies: int) -> None:
+    """Write ``copies`` plain-text copies of the materials under ``source``.
+
+    Copies after the first end in a marker paragraph so every copy has its own
+    fingerprint and is segmented rather than served from the segment cache.
+    """
+
+    for copy in range(copies):
+        for record in iter_materials(source):
+            name = record.identifier if record.identifier.lower().endswith(".txt") else f"{record.identifier}.txt"
+            text = "\n\n".join(record.paragraphs())
+            if copy:
+                text = f"{text}\n\n[copy {copy}]\n"
+            write_text_file(directory / f"copy-{copy:03d}" / name, text)
+
+
+class _StageProbe:
+    """Stage listener that samples traced memory and allocated blocks per stage.
+
+    Stages run concurrently, so the traced peak is re-armed at every stage event
+    and each window's peak is credited to every stage running during it.
+    """
+
+    def __init__(self, trace_memory: bool) -> None:
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, Dict[str, object]] = {}
+        self.peak = 0
+        self._running: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, stage: str, event: str) -> None:
+        with self._lock:
+            peak = 0
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                self.peak = max(self.peak, peak)
+            for state in self._running.values():
+                state["peak"] = max(state["peak"], peak)
+            if event == "started":
+                current = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+                self._running[stage] = {"memory": current, "peak": current, "blocks": sys.getallocatedblocks()}
+            elif event == "finished" and stage in self._running:
+                state = self._running.pop(stage)
+                entry: Dict[str, object] = {"net_blocks": sys.getallocatedblocks() - state["blocks"]}
+                if self.trace_memory:
+                    entry["peak_bytes"] = state["peak"] - state["memory"]
+                self.stages[stage] = entry
+
+
+def _reset_outputs(base_path: Path) -> None:
+    for directory in (base_path / "materials" / "output", base_path / "materials" / "organized"):
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _run_once(base_path: Path, settings: BenchmarkSettings, trace_memory: bool) -> Dict[str, object]:
+    _reset_outputs(base_path)
+    config = default_config(base_path, settings.title)
+    clients: List[FakeLLMClient] = []
+
+    def fake_client(client_config: LLMClientConfig) -> FakeLLMClient:
+        client = FakeLLMClient(
+            client_config.identifier, client_config.model, settings.latency, settings.jitter, seed=settings.seed
+        )
+        clients.append(client)
+        return client
+
+    pipeline = WritingPipeline(config, client_factory=fake_client)
+    probe = _StageProbe(trace_memory)
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        pipeline.run(listener=probe)
+        wall = time.perf_counter() - started
+        peak = max(probe.peak, tracemalloc.get_traced_memory()[1]) if trace_memory else 0
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        pipeline.close()
+
+    stages: Dict[str, Dict[str, object]] = {}
+    breakdown = pipeline.last_trace.breakdown() if pipeline.last_trace else {}
+    for name, span in breakdown.get("categories", {}).get("stage", {}).items():  # type: ignore[union-attr]
+        items = int(span["items"])
+        wall_seconds = float(span["wall_seconds"])
+        stages[name] = {
+            "wall_seconds": wall_seconds,
+            "cpu_seconds": span["cpu_seconds"],
+            "items": items,
+            "items_per_second": round(items / wall_seconds, 2) if wall_seconds > 0 and items else None,
+            **probe.stages.get(name, {}),
+        }
+    result: Dict[str, object] = {
+        "wall_seconds": round(wall, 4),
+        "llm_calls": sum(client.calls for client in clients),
+        "stages": stages,
+    }
+    if trace_memory:
+        result["peak_bytes"] = peak
+    return result
+
+
+def _benchmark_scale(base_path: Path, scale: int, settings: BenchmarkSettings) -> Dict[str, object]:
+    raw_dir = base_path / "materials" / "raw"
+    if settings.corpus is not None:
+        replicate_corpus(settings.corpus, raw_dir, scale)
+    else:
+        synthesize_corpus(raw_dir, scale, settings.paragraphs_per_material, settings.seed)
+
+    # Timings come from untraced runs (best of ``repeat``); tracemalloc slows Python down.
+    timings = [_run_once(base_path, settings, trace_memory=False) for _ in range(max(1, settings.repeat))]
+    best = min(timings, key=lambda run: float(run["wall_seconds"]))  # type: ignore[arg-type]
+    best["runs"] = [run["wall_seconds"] for run in timings]
+    if settings.measure_memory:
+        traced = _run_once(base_path, settings, trace_memory=True)
+        best["peak_bytes"] = traced["peak_bytes"]
+        for name, stage in best["stages"].items():  # type: ignore[union-attr]
+            traced_stage = traced["stages"].get(name, {})  # type: ignore[union-attr]
+            stage["net_blocks"] = traced_stage.get("net_blocks")
+            stage["peak_bytes"] = traced_stage.get("peak_bytes")
+    return {"scale": scale, **best}
+
+
+def git_revision(root: Path = REPOSITORY_ROOT) -> Dict[str, object]:
+    """Return the checked-out commit and whether the work tree has local changes."""
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=root, capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": bool(status.strip())}
+
+
+def run_benchmark(settings: BenchmarkSettings, label: str = "") -> Dict[str, object]:
+    """Benchmark the pipeline at every scale of ``settings`` and return one history record."""
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="aria-benchmark-") as workspace:
+        for scale in settings.scales:
+            LOGGER.info("Benchmarking scale %d", scale)
+            results.append(_benchmark_scale(Path(workspace) / f"scale-{scale}", scale, settings))
+    return {
+        **git_revision(),
+        "label": label,
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "corpus": str(settings.corpus) if settings.corpus else "synthetic",
+            "paragraphs_per_material": settings.paragraphs_per_material,
+            "latency": settings.latency,
+            "jitter": settings.jitter,
+            "repeat": settings.repeat,
+            "seed": settings.seed,
+        },
+        "scales": results,
+    }
+
+
+def append_history(path: Path, record: Dict[str, object]) -> None:
+    """Append one benchmark record to the JSON-lines history at ``path``."""
+
+    ensure_directory(path.parent)
+    with path.open("a", encoding="utf-8") as stream:
+        stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_history(path: Path) -> List[Dict[str, object]]:
+    """Return the records of a benchmark history, oldest first."""
+
+    if not path.exists():
+        raise FileNotFoundError(f"Benchmark history does not exist: {path}")
+    records = []
+    with path.open(encoding="utf-8") as stream:
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as exc:
+                LOGGER.warning("Skipping malformed history line %s:%d: %s", path, line_number, exc)
+    return records
+
+
+def find_record(records: Sequence[Dict[str, object]], reference: str) -> Dict[str, object]:
+    """Return the newest record whose label equals or whose commit starts with ``reference``.
+
+    Git revisions such as ``HEAD~1`` are resolved in the repository first.
+
+    Raises
+    ------
+    LookupError
+        If no record matches.
+    """
+
+    candidates = {reference}
+    try:
+        resolved = subprocess.run(
+            ["git", "rev-parse", "--verify", "--quiet", f"{reference}^{{commit}}"],
+            cwd=REPOSITORY_ROOT,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        resolved = ""
+    if resolved:
+        candidates.add(resolved)
+    for record in reversed(records):
+        commit = str(record.get("commit") or "")
+        if record.get("label") == reference or any(commit and commit.startswith(c) for c in candidates):
+            return record
+    raise LookupError(f"No benchmark record matches '{reference}'.")
+
+
+@dataclass
+class MetricChange:
+    """One metric compared between a baseline and a candidate record."""
+
+    scale: int
+    metric: str
+    baseline: float
+    candidate: float
+    regression: bool = False
+
+    @property
+    def ratio(self) -> float:
+        return self.candidate / self.baseline if self.baseline else float("inf")
+
+
+@dataclass
+class Comparison:
+    baseline: str
+    candidate: str
+    changes: List[MetricChange] = field(default_factory=list)
+
+    @property
+    def regressions(self) -> List[MetricChange]:
+        return [change for change in self.changes if change.regression]
+
+
+def _metrics(scale: Dict[str, object]) -> Iterator[Tuple[str, float, bool]]:
+    """Yield ``(metric, value, is_time)`` for the comparable figures of one scale."""
+
+    yield "wall_seconds", float(scale["wall_seconds"]), True  # type: ignore[arg-type]
+    if scale.get("peak_bytes") is not None:
+        yield "peak_bytes", float(scale["peak_bytes"]), False  # type: ignore[arg-type]
+    for name, stage in scale.get("stages", {}).items():  # type: ignore[union-attr]
+        yield f"{name}.wall_seconds", float(stage["wall_seconds"]), True
+        if stage.get("peak_bytes") is not None:
+            yield f"{name}.peak_bytes", float(stage["peak_bytes"]), False
+
+
+def compare_results(
+    baseline: Dict[str, object],
+    candidate: Dict[str, object],
+    threshold: float = 0.1,
+    min_seconds: float = 0.01,
+    min_bytes: int = 1024 * 1024,
+) -> Comparison:
+    """Compare every metric of the scales both records measured.
+
+    A metric regresses when the candidate exceeds the baseline by more than
+    ``threshold`` (a fraction) and by at least ``min_seconds`` or ``min_bytes``,
+    so noise in very short stages is not reported.
+    """
+
+    comparison = Comparison(
+        baseline=str(baseline.get("label") or baseline.get("commit")),
+        candidate=str(candidate.get("label") or candidate.get("commit")),
+    )
+    baseline_scales = {int(scale["scale"]): scale for scale in baseline.get("scales", [])}  # type: ignore[union-attr]
+    for scale in candidate.get("scales", []):  # type: ignore[union-attr]
+        reference = baseline_scales.get(int(scale["scale"]))
+        if reference is None:
+            continue
+        reference_metrics = {metric: value for metric, value, _ in _metrics(reference)}
+        for metric, value, is_time in _metrics(scale):
+            if metric not in reference_metrics:
+                continue
+            before = reference_metrics[metric]
+            floor = min_seconds if is_time else min_bytes
+            comparison.changes.append(
+                MetricChange(
+                    scale=int(scale["scale"]),
+                    metric=metric,
+                    baseline=before,
+                    candidate=value,
+                    regression=value > before * (1 + threshold) and value - before >= floor,
+                )
+            )
+    return comparison
@@ -0,0 +1,469 @@
+"""Content-addressed store of segment texts in memory-mapped pack files, shared across reports."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Sequence, Tuple
+
+from .utils import ensure_directory
+
+LOGGER = logging.getLogger(__name__)
+SCHEMA_VERSION = 1
+PACK_SIZE_LIMIT = 64 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS packs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    pack INTEGER NOT NULL REFERENCES packs(id),
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    refcount INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS blobs_by_pack ON blobs (pack);
+CREATE TABLE IF NOT EXISTS manifests (
+    fingerprint TEXT PRIMARY KEY,
+    entries TEXT NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS roots (
+    owner TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (owner, fingerprint)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS roots_by_fingerprint ON roots (fingerprint);
+"""
+
+Classified = List[Tuple[str, str]]
+
+
+def blob_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """Deduplicated segment texts plus per-material segmentation manifests.
+
+    Texts are appended as UTF-8 to pack files under ``directory/packs`` and located
+    through a SQLite index. Readers memory-map the packs and only read the index, so
+    they never wait for the write lock. Writers serialise on the index's write
+    transaction, so many pipeline processes can share one store.
+
+    A manifest records how one material (by fingerprint) was segmented, as
+    ``(bucket, blob digest)`` entries, and holds a reference on each blob. Reports
+    mark the manifests they use as roots. `collect_garbage` drops unrooted manifests,
+    blobs nothing references and packs that are mostly dead.
+    """
+
+    def __init__(self, directory: Path, pack_size_limit: int = PACK_SIZE_LIMIT) -> None:
+        self.directory = directory
+        self.pack_size_limit = pack_size_limit
+        self._packs_dir = ensure_directory(directory / "packs")
+        # Transactions are managed explicitly so writers can take the lock up front.
+        self._connection = sqlite3.connect(str(directory / "index.sqlite3"), timeout=60, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._maps_lock = threading.Lock()
+        self._create_schema()
+
+    def __enter__(self) -> "BlobStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._maps_lock:
+            for mapping in self._maps.values():
+                mapping.close()
+            self._maps.clear()
+        self._connection.close()
+
+    def get_many(self, digests: Sequence[str]) -> List[str]:
+        """Return the texts of ``digests``, in order.
+
+        Raises
+        ------
+        KeyError
+            If a digest is not in the store.
+        """
+
+        for attempt in range(2):
+            locations = self._locate(set(digests))
+            try:
+                return [self._read(*locations[digest]) for digest in digests]
+            except FileNotFoundError:
+                # A concurrent garbage collection moved the blobs; read the new locations.
+                if attempt:
+                    raise
+        raise AssertionError("unreachable")
+
+    def load_manifest(self, fingerprint: str) -> Optional[Classified]:
+        """Return the stored segmentation of a material, or None if it was never saved."""
+
+        row = self._connection.execute("SELECT entries FROM manifests WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        if row is None:
+            return None
+        entries = json.loads(row[0])
+        try:
+            texts = self.get_many([digest for _, digest in entries])
+        except (KeyError, FileNotFoundError):
+            LOGGER.warning("Manifest %s references missing blobs; ignoring it.", fingerprint)
+            return None
+        return [(bucket, text) for (bucket, _), text in zip(entries, texts)]
+
+    def has_manifest(self, fingerprint: str) -> bool:
+        row = self._connection.execute("SELECT 1 FROM manifests WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        return row is not None
+
+    def save_manifest(self, fingerprint: str, classified: Classified) -> None:
+        """Store a material's segmentation, adding only texts not already in the store."""
+
+        self.save_manifests({fingerprint: classified})
+
+    def save_manifests(self, manifests: Mapping[str, Classified]) -> None:
+        """Store several segmentations in one write transaction with one pack sync."""
+
+        if not manifests:
+            return
+        with self._write_transaction():
+            pending = {
+                fingerprint: [(bucket, blob_digest(text)) for bucket, text in classified]
+                for fingerprint, classified in manifests.items()
+                if not self.has_manifest(fingerprint)
+            }
+            known = self._locate({digest for entries in pending.values() for _, digest in entries})
+            new: Dict[str, bytes] = {}
+            for fingerprint, entries in pending.items():
+                for (_, digest), (_, text) in zip(entries, manifests[fingerprint]):
+                    if digest not in known:
+                        new.setdefault(digest, text.encode("utf-8"))
+            self._append(new)
+            self._connection.executemany(
+                "UPDATE blobs SET refcount = refcount + 1 WHERE digest = ?",
+                [(digest,) for entries in pending.values() for _, digest in entries],
+            )
+            now = time.time()
+            self._connection.executemany(
+                "INSERT INTO manifests (fingerprint, entries, last_used) VALUES (?, ?, ?)",
+                [(fingerprint, json.dumps(entries), now) for fingerprint, entries in pending.items()],
+            )
+
+    def set_roots(self, owner: str, fingerprints: Iterable[str]) -> None:
+        """Make ``fingerprints`` the complete set of manifests ``owner`` keeps alive, and mark them used."""
+
+        rooted = list(dict.fromkeys(fingerprints))
+        now = time.time()
+        with self._write_transaction():
+            self._connection.execute("DELETE FROM roots WHERE owner = ?", (owner,))
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO roots (owner, fingerprint) VALUES (?, ?)",
+                [(owner, fingerprint) for fingerprint in rooted],
+            )
+            # Reads never write, so the last use of a manifest is recorded here.
+            self._connection.executemany(
+                "UPDATE manifests SET last_used = ? WHERE fingerprint = ?", [(now, fingerprint) for fingerprint in rooted]
+            )
+
+    def owners(self) -> Dict[str, int]:
+        """Return the number of rooted manifests per owner."""
+
+        return dict(self._connection.execute("SELECT owner, COUNT(*) FROM roots GROUP BY owner ORDER BY owner"))
+
+    def stats(self) -> Dict[str, int]:
+        """Return blob, manifest and pack counts with live and on-disk byte totals."""
+
+        blobs, live_bytes = self._connection.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM blobs").fetchone()
+        manifests = self._connection.execute("SELECT COUNT(*) FROM manifests").fetchone()[0]
+        packs = [pack_id for (pack_id,) in self._connection.execute("SELECT id FROM packs")]
+        return {
+            "blobs": blobs,
+            "manifests": manifests,
+            "owners": len(self.owners()),
+            "packs": len(packs),
+            "live_bytes": live_bytes,
+            "pack_bytes": sum(self._pack_size(pack_id) for pack_id in packs),
+        }
+
+    def collect_garbage(
+        self,
+        grace_seconds: float = 3600.0,
+        compact_ratio: float = 0.5,
+        drop_missing_owners: bool = False,
+    ) -> Dict[str, int]:
+        """Delete unreferenced data and compact sparse packs; return what was removed.
+
+        Manifests without roots are kept for ``grace_seconds`` after their last use,
+        so a run that saved manifests but has not set its roots yet does not lose
+        them. Packs whose dead bytes reach ``compact_ratio`` of their size are
+        rewritten. With ``drop_missing_owners``, roots of owners that no longer exist
+        on disk (owners are raw-material directories) are released first.
+        """
+
+        removed = {"owners": 0, "manifests": 0, "blobs": 0, "packs": 0, "bytes": 0}
+        compacted: List[Path] = []
+        with self._write_transaction():
+            if drop_missing_owners:
+                for owner in list(self.owners()):
+                    if not Path(owner).exists():
+                        self._connection.execute("DELETE FROM roots WHERE owner = ?", (owner,))
+                        removed["owners"] += 1
+            stale = self._connection.execute(
+                "SELECT fingerprint, entries FROM manifests "
+                "WHERE last_used < ? AND fingerprint NOT IN (SELECT fingerprint FROM roots)",
+                (time.time() - grace_seconds,),
+            ).fetchall()
+            for fingerprint, entries in stale:
+                self._connection.executemany(
+                    "UPDATE blobs SET refcount = refcount - 1 WHERE digest = ?",
+                    [(digest,) for _, digest in json.loads(entries)],
+                )
+                self._connection.execute("DELETE FROM manifests WHERE fingerprint = ?", (fingerprint,))
+            removed["manifests"] = len(stale)
+            removed["blobs"] = self._connection.execute("DELETE FROM blobs WHERE refcount <= 0").rowcount
+
+            live = dict(self._connection.execute("SELECT pack, SUM(length) FROM blobs GROUP BY pack"))
+            known = {pack_id for (pack_id,) in self._connection.execute("SELECT id FROM packs")}
+            # Pack files of transactions that rolled back are not indexed; no writer can be using them now.
+            compacted.extend(path for path in self._packs_dir.glob("pack-*.pack") if self._pack_id(path) not in known)
+            for (pack_id,) in self._connection.execute("SELECT id FROM packs ORDER BY id").fetchall():
+                size = self._pack_size(pack_id)
+                dead = size - live.get(pack_id, 0)
+                if not live.get(pack_id) or (size and dead / size >= compact_ratio):
+                    compacted.append(self._compact(pack_id))
+                    removed["packs"] += 1
+                    removed["bytes"] += dead
+        # Pack files go only once the index no longer points into them; a rollback keeps them.
+        for path in compacted:
+            path.unlink(missing_ok=True)
+        LOGGER.info("Blob store garbage collection removed %s", removed)
+        return removed
+
+    def _compact(self, pack_id: int) -> Path:
+        """Move the live blobs of a pack into the current pack and drop it from the index.
+
+        Runs inside the write transaction and returns the pack file, which the caller
+        deletes after committing. Readers that still map the old pack keep reading it;
+        readers that look blobs up afresh see the new locations.
+        """
+
+        rows = self._connection.execute(
+            "SELECT digest, offset, length FROM blobs WHERE pack = ? ORDER BY offset", (pack_id,)
+        ).fetchall()
+        if rows:
+            mapping = self._map(pack_id, rows[-1][1] + rows[-1][2])
+            payloads = [bytes(mapping[offset : offset + length]) for _, offset, length in rows]
+            locations = self._write(payloads, avoid=pack_id)
+            self._connection.executemany(
+                "UPDATE blobs SET pack = ?, offset = ? WHERE digest = ?",
+                [(new_pack, new_offset, digest) for (digest, _, _), (new_pack, new_offset, _) in zip(rows, locations)],
+            )
+        self._connection.execute("DELETE FROM packs WHERE id = ?", (pack_id,))
+        with self._maps_lock:
+            mapping = self._maps.pop(pack_id, None)
+        if mapping is not None:
+            mapping.close()
+        return self._pack_path(pack_id)
+
+    def _append(self, payloads: Dict[str, bytes]) -> None:
+        """Write new blobs and index them with no references yet (inside the write transaction)."""
+
+        if not payloads:
+            return
+        locations = self._write(list(payloads.values()))
+        self._connection.executemany(
+            "INSERT INTO blobs (digest, pack, offset, length) VALUES (?, ?, ?, ?)",
+            [(digest, *location) for digest, location in zip(payloads, locations)],
+        )
+
+    def _write(self, payloads: Sequence[bytes], avoid: Optional[int] = None) -> List[Tuple[int, int, int]]:
+        """Append payloads to the current pack, starting new packs when it is full or is ``avoid``.
+
+        Bytes written by a transaction that later rolls back stay in the pack as
+        dead space until the pack is compacted.
+        """
+
+        locations: List[Tuple[int, int, int]] = []
+        pack_id = self._current_pack()
+        stream = None
+        try:
+            for payload in payloads:
+                if stream is None or stream.tell() >= self.pack_size_limit:
+                    if stream is not None:
+                        self._sync(stream)
+                        stream.close()
+                    if pack_id is None or pack_id == avoid or self._pack_size(pack_id) >= self.pack_size_limit:
+                        cursor = self._connection.execute("INSERT INTO packs DEFAULT VALUES")
+                        pack_id = int(cursor.lastrowid)
+                    stream = self._pack_path(pack_id).open("ab")
+                    stream.seek(0, os.SEEK_END)
+                locations.append((pack_id, stream.tell(), len(payload)))
+                stream.write(payload)
+            if stream is not None:
+                self._sync(stream)
+        finally:
+            if stream is not None:
+                stream.close()
+        return locations
+
+    @staticmethod
+    def _sync(stream: object) -> None:
+        stream.flush()  # type: ignore[attr-defined]
+        os.fsync(stream.fileno())  # type: ignore[attr-defined]
+
+    def _read(self, pack_id: int, offset: int, length: int) -> str:
+        if length == 0:
+            return ""
+        return self._map(pack_id, offset + length)[offset : offset + length].decode("utf-8")
+
+    def _map(self, pack_id: int, needed: int) -> mmap.mmap:
+        """Return a read-only mapping of a pack covering at least ``needed`` bytes."""
+
+        with self._maps_lock:
+            mapping = self._maps.get(pack_id)
+            if mapping is None or len(mapping) < needed:
+                # Packs only grow, so a mapping that is too short is replaced by a fresh one.
+                with self._pack_path(pack_id).open("rb") as stream:
+                    fresh = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+                if mapping is not None:
+                    mapping.close()
+                self._maps[pack_id] = mapping = fresh
+            return mapping
+
+    def _locate(self, digests: Iterable[str]) -> Dict[str, Tuple[int, int, int]]:
+        pending = list(digests)
+        locations: Dict[str, Tuple[int, int, int]] = {}
+        for start in range(0, len(pending), 500):
+            chunk = pending[start : start + 500]
+            cursor = self._connection.execute(
+                f"SELECT digest, pack, offset, length FROM blobs WHERE digest IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            locations.update((digest, (pack, offset, length)) for digest, pack, offset, length in cursor)
+        return locations
+
+    def _current_pack(self) -> Optional[int]:
+        row = self._connection.execute("SELECT MAX(id) FROM packs").fetchone()
+        return None if row[0] is None else int(row[0])
+
+    def _pack_path(self, pack_id: int) -> Path:
+        return self._packs_dir / f"pack-{pack_id:06d}.pack"
+
+    @staticmethod
+    def _pack_id(path: Path) -> Optional[int]:
+        try:
+            return int(path.stem.split("-", 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+    def _pack_size(self, pack_id: int) -> int:
+        try:
+            return self._pack_path(pack_id).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[None]:
+        """Hold the index's write lock for the block; it is the writers' cross-process lock."""
+
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def _create_schema(self) -> None:
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"Blob store {self.directory} has schema version {version}; expected {SCHEMA_VERSION}.")
+        with self._write_transaction():
+            for statement in _SCHEMA.split(";"):
+                if statement.strip():
+                    self._connection.execute(statement)
+            self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+class SharedSegmentCache(MutableMapping[str, Classified]):
+    """`segment_materials` cache backed by a `BlobStore`, with an in-memory layer.
+
+    Lookups check ``memory`` first and then the store's manifests, so materials
+    segmented by an earlier run or another report are not segmented again. New
+    results are buffered and saved to the store in one transaction by `flush`.
+    Deleting a key only evicts it from memory; what the store keeps is decided by
+    `BlobStore.set_roots`.
+
+    Manifests are stored under ``namespace:key``. Callers pass a hash of the
+    classifier's configuration as ``namespace``, so segmentations made under other
+    rules are never reused.
+    """
+
+    def __init__(
+        self,
+        store: BlobStore,
+        memory: Optional[Dict[str, Classified]] = None,
+        namespace: str = "",
+    ) -> None:
+        self.store = store
+        self.memory = memory if memory is not None else {}
+        self.namespace = namespace
+        self.pending: Dict[str, Classified] = {}
+        self.reused = 0
+
+    def store_key(self, key: str) -> str:
+        """Return the manifest fingerprint under which ``key`` is stored."""
+
+        return f"{self.namespace}:{key}" if self.namespace else key
+
+    def store_keys(self) -> List[str]:
+        """Return the manifest fingerprints of every cached material."""
+
+        return [self.store_key(key) for key in self.memory]
+
+    def flush(self) -> None:
+        """Save the buffered segmentations to the store."""
+
+        self.store.save_manifests({self.store_key(key): value for key, value in self.pending.items()})
+        self.pending.clear()
+
+    def __contains__(self, key: object) -> bool:
+        if key in self.memory:
+            return True
+        if not isinstance(key, str):
+            return False
+        classified = self.store.load_manifest(self.store_key(key))
+        if classified is None:
+            return False
+        self.memory[key] = classified
+        self.reused += 1
+        return True
+
+    def __getitem__(self, key: str) -> Classified:
+        if key in self:
+            return self.memory[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Classified) -> None:
+        self.memory[key] = value
+        self.pending[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self.memory[key]
+        self.pending.pop(key, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.memory))
+
+    def __len__(self) -> int:
+        return len(self.memory)
@@ -0,0 +1,120 @@
+"""Per-section ``max_output_tokens`` limits learned from the completion tokens of earlier runs."""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional, Sequence
+
+from .outline import OutlineSection
+from .utils import atomic_write_text
+
+LOGGER = logging.getLogger(__name__)
+BUDGET_VERSION = 1
+
+
+def _quantile(sorted_values: Sequence[int], fraction: float) -> int:
+    """Return the nearest-rank quantile of an ascending, non-empty sequence."""
+
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class OutputTokenBudget:
+    """Choose each section's output-token limit from the lengths it produced before.
+
+    The limit is the ``quantile`` of the section's recent completion-token counts
+    times ``headroom``, clamped to ``[floor, ceiling]``. The headroom keeps normal
+    answers clear of the limit, so a generation that does stop at it is a real
+    truncation. Sections with fewer than ``min_samples`` observations use their
+    bucket's history, and sections with no usable history get ``default``. The
+    last ``window`` observations per section and per bucket are kept in a JSON
+    file at ``path``.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path],
+        default: int,
+        ceiling: int,
+        floor: int = 128,
+        quantile: float = 0.95,
+        headroom: float = 1.25,
+        min_samples: int = 3,
+        window: int = 50,
+    ) -> None:
+        self.path = path
+        self.default = default
+        self.ceiling = max(ceiling, default)
+        self.floor = min(floor, default)
+        self.quantile = quantile
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.window = window
+        self._sections: Dict[str, Deque[int]] = {}
+        self._buckets: Dict[str, Deque[int]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path is not None and path.exists():
+            self._load(path)
+
+    def limit(self, section: OutlineSection) -> int:
+        """Return the ``max_output_tokens`` to request for a section."""
+
+        with self._lock:
+            samples = self._sections.get(section.title)
+            if samples is None or len(samples) < self.min_samples:
+                samples = self._buckets.get(section.bucket_name)
+            if samples is None or len(samples) < self.min_samples:
+                return self.default
+            estimate = _quantile(sorted(samples), self.quantile) * self.headroom
+        return int(min(self.ceiling, max(self.floor, math.ceil(estimate))))
+
+    def retry_limit(self, limit: int) -> Optional[int]:
+        """Return a larger limit for retrying a truncated generation, or None at the ceiling."""
+
+        larger = min(self.ceiling, max(limit * 2, self.default))
+        return larger if larger > limit else None
+
+    def observe(self, section: OutlineSection, completion_tokens: int) -> None:
+        """Record the completion-token count of a finished (or finally truncated) generation."""
+
+        if completion_tokens <= 0:
+            return
+        with self._lock:
+            for history, key in ((self._sections, section.title), (self._buckets, section.bucket_name)):
+                history.setdefault(key, deque(maxlen=self.window)).append(completion_tokens)
+            self._dirty = True
+
+    def save(self) -> None:
+        """Persist the observations if any were added since loading."""
+
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {
+                "version": BUDGET_VERSION,
+                "sections": {key: list(values) for key, values in self._sections.items()},
+                "buckets": {key: list(values) for key, values in self._buckets.items()},
+            }
+            self._dirty = False
+        atomic_write_text(self.path, json.dumps(payload, ensure_ascii=False, indent=2))
+
+    def _load(self, path: Path) -> None:
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            LOGGER.warning("Ignoring unreadable output-token history %s: %s", path, exc)
+            return
+        if payload.get("version") != BUDGET_VERSION:
+            LOGGER.warning("Ignoring output-token history %s with unknown version.", path)
+            return
+        for history, key in ((self._sections, "sections"), (self._buckets, "buckets")):
+            for name, values in payload.get(key, {}).items():
+                history[name] = deque((int(value) for value in values), maxlen=self.window)
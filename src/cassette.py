@@ -0,0 +1,226 @@
+"""Record LLM traffic to cassette files and replay it deterministically offline."""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, TextIO
+
+from .llm import GenerationCache, LLMClient, LLMError, LLMGeneration, LLMGenerationPrompt
+from .utils import ensure_directory, stable_hash
+
+LOGGER = logging.getLogger(__name__)
+CASSETTE_MODES = ("record", "replay")
+
+
+@dataclass
+class CassetteEntry:
+    """One recorded request/response pair (or failure) with its timing."""
+
+    key: str
+    sequence: int
+    client_id: str
+    model: str
+    provider: str
+    request: Dict[str, object]
+    latency: float
+    attempts: int = 1
+    text: Optional[str] = None
+    raw: Dict[str, object] = field(default_factory=dict)
+    error: Optional[str] = None
+    status: Optional[int] = None
+    recorded_at: str = ""
+
+
+class Cassette:
+    """Append-only JSONL store of LLM interactions, indexed by request key.
+
+    Requests are matched on provider, model, prompt text and sampling parameters.
+    Identical requests are replayed in the order they were recorded; once the
+    recordings for a key are exhausted the last one is served again. A request
+    whose ``max_output_tokens`` was never recorded falls back to recordings of the
+    same request with other limits (per-section output budgets vary between runs).
+    """
+
+    def __init__(self, path: Path, mode: str) -> None:
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}'; expected one of {CASSETTE_MODES}.")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._handle: Optional[TextIO] = None
+        self._entries: Dict[str, Deque[CassetteEntry]] = defaultdict(deque)
+        self._last: Dict[str, CassetteEntry] = {}
+        # Keys of requests that differ only in max_output_tokens, in recording order.
+        self._loose: Dict[str, List[str]] = defaultdict(list)
+        self._sequence = 0
+        if mode == "record":
+            ensure_directory(path.parent)
+            # A recording session starts a fresh cassette so replays are reproducible.
+            self._handle = path.open("w", encoding="utf-8")
+        else:
+            self._load()
+
+    def __len__(self) -> int:
+        return self._sequence
+
+    def record(self, entry: CassetteEntry) -> None:
+        with self._lock:
+            if self._handle is None:
+                raise RuntimeError(f"Cassette {self.path} is not open for recording.")
+            entry.sequence = self._sequence
+            self._sequence += 1
+            self._handle.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+            self._handle.flush()
+
+    def take(self, key: str, loose_key: Optional[str] = None) -> Optional[CassetteEntry]:
+        """Return the next recorded entry for ``key``, or None if it was never recorded.
+
+        When ``key`` was never recorded, ``loose_key`` (see `loose_request_key`) selects
+        the first same-request recording with entries left, or else the last one.
+        """
+
+        with self._lock:
+            if key in self._entries or loose_key is None:
+                return self._take(key)
+            candidates = self._loose.get(loose_key, [])
+            for candidate in candidates:
+                if self._entries[candidate]:
+                    return self._take(candidate)
+            return self._take(candidates[-1]) if candidates else None
+
+    def _take(self, key: str) -> Optional[CassetteEntry]:
+        queue = self._entries.get(key)
+        if queue:
+            entry = queue.popleft()
+            self._last[key] = entry
+            return entry
+        return self._last.get(key)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            raise FileNotFoundError(f"Cassette does not exist: {self.path}")
+        with self.path.open(encoding="utf-8") as stream:
+            for line_number, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = CassetteEntry(**json.loads(line))
+                except (TypeError, json.JSONDecodeError) as exc:
+                    LOGGER.warning("Skipping malformed cassette line %s:%d: %s", self.path, line_number, exc)
+                    continue
+                self._entries[entry.key].append(entry)
+                loose_key = loose_request_key(entry.provider, entry.model, entry.request)
+                if entry.key not in self._loose[loose_key]:
+                    self._loose[loose_key].append(entry.key)
+                self._sequence += 1
+        LOGGER.info("Loaded %d recorded LLM interactions from %s", self._sequence, self.path)
+
+
+def _request_payload(prompt: LLMGenerationPrompt) -> Dict[str, object]:
+    return {
+        "system_prompt": prompt.system_prompt,
+        "user_prompt": prompt.user_prompt,
+        "temperature": prompt.temperature,
+        "max_output_tokens": prompt.max_output_tokens,
+        "top_p": prompt.top_p,
+    }
+
+
+def loose_request_key(provider: str, model: str, request: Dict[str, object]) -> str:
+    """Return a key identifying a request regardless of its ``max_output_tokens``."""
+
+    return stable_hash([provider, model, {name: value for name, value in request.items() if name != "max_output_tokens"}])
+
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+class RecordingLLMClient:
+    """`LLMClient` wrapper that writes every call, including failures, to a cassette."""
+
+    def __init__(self, inner: LLMClient, cassette: Cassette) -> None:
+        self.inner = inner
+        self.identifier = inner.identifier
+        self.model = inner.model
+        self.provider = inner.provider
+        self._cassette = cassette
+
+    def generate(self, prompt: LLMGenerationPrompt) -> LLMGeneration:
+        entry = CassetteEntry(
+            key=GenerationCache.key(self.inner, prompt),
+            sequence=0,
+            client_id=self.identifier,
+            model=self.model,
+            provider=self.provider,
+            request=_request_payload(prompt),
+            latency=0.0,
+            recorded_at=_timestamp(),
+        )
+        started = time.perf_counter()
+        try:
+            generation = self.inner.generate(prompt)
+        except LLMError as exc:
+            entry.latency = time.perf_counter() - started
+            entry.attempts = exc.attempts
+            entry.error = str(exc)
+            entry.status = exc.status
+            self._cassette.record(entry)
+            raise
+        entry.latency = time.perf_counter() - started
+        entry.attempts = generation.attempts
+        entry.text = generation.text
+        entry.raw = generation.raw
+        self._cassette.record(entry)
+        return generation
+
+
+class ReplayLLMClient:
+    """`LLMClient` that serves responses from a cassette instead of a provider.
+
+    ``speed`` controls timing: 0 returns immediately, 1 sleeps for the recorded
+    latency, and other values scale it (2 replays twice as fast). Requests that were
+    never recorded raise `LLMError`, like a provider outage would.
+    """
+
+    def __init__(self, identifier: str, model: str, provider: str, cassette: Cassette, speed: float = 0.0) -> None:
+        self.identifier = identifier
+        self.model = model
+        self.provider = provider
+        self._cassette = cassette
+        self._speed = speed
+        self.misses: List[str] = []
+
+    def generate(self, prompt: LLMGenerationPrompt) -> LLMGeneration:
+        key = GenerationCache.key(self, prompt)
+        entry = self._cassette.take(key, loose_request_key(self.provider, self.model, _request_payload(prompt)))
+        if entry is None:
+            self.misses.append(key)
+            raise LLMError(f"No recorded response for client '{self.identifier}' in cassette {self._cassette.path}.")
+        if self._speed > 0:
+            time.sleep(entry.latency / self._speed)
+        if entry.error is not None:
+            error = LLMError(entry.error, status=entry.status)
+            error.attempts = entry.attempts
+            raise error
+        return LLMGeneration(
+            text=entry.text or "",
+            model=self.model,
+            provider=self.provider,
+            raw=entry.raw,
+            latency=entry.latency,
+            attempts=entry.attempts,
+        )
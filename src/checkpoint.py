@@ -0,0 +1,120 @@
+"""Durable section checkpoints for resumable and incremental drafting runs."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .utils import atomic_write_text, ensure_directory, slugify, stable_hash
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class SectionCheckpoint:
+    """A finished section together with the fingerprint of the inputs that produced it."""
+
+    title: str
+    fingerprint: str
+    text: str
+    completed_at: str
+    dependencies: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class SectionBuildDecision:
+    """Whether a section was reused or rebuilt during a run, and why."""
+
+    title: str
+    action: str
+    reasons: List[str] = field(default_factory=list)
+
+
+class SectionCheckpointStore:
+    """Persist one JSON file per finished section under a checkpoint directory.
+
+    Files are written atomically as soon as a section completes, so a crash or
+    provider outage never loses sections that were already drafted. Each checkpoint
+    keeps the per-component dependency hashes (segments, bullets, prompt template,
+    model parameters) so a rerun can explain exactly why a section was rebuilt.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = ensure_directory(directory)
+        self.decisions: List[SectionBuildDecision] = []
+
+    def load(self, title: str) -> Optional[SectionCheckpoint]:
+        """Return the stored checkpoint for a section title, if any."""
+
+        path = self._path_for(title)
+        if not path.exists():
+            return None
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            return SectionCheckpoint(**payload)
+        except (OSError, TypeError, json.JSONDecodeError) as exc:
+            LOGGER.warning("Ignoring unreadable checkpoint %s: %s", path, exc)
+            return None
+
+    def resolve(self, title: str, dependencies: Dict[str, str], reuse: bool) -> Optional[str]:
+        """Return reusable text for a section, recording the reuse or rebuild decision.
+
+        Parameters
+        ----------
+        title:
+            Section title used as the checkpoint key.
+        dependencies:
+            Mapping of dependency component names to content hashes.
+        reuse:
+            When False every section is rebuilt and the decision says so.
+        """
+
+        previous = self.load(title) if reuse else None
+        if not reuse:
+            reasons = ["reuse disabled"]
+        elif previous is None:
+            reasons = ["no previous output"]
+        elif previous.fingerprint == stable_hash(dependencies):
+            self.decisions.append(SectionBuildDecision(title=title, action="reused"))
+            return previous.text
+        else:
+            components = sorted(set(previous.dependencies) | set(dependencies))
+            changed = [name for name in components if previous.dependencies.get(name) != dependencies.get(name)]
+            reasons = [f"{name} changed" for name in changed] or ["fingerprint changed"]
+        self.decisions.append(SectionBuildDecision(title=title, action="rebuilt", reasons=reasons))
+        return None
+
+    def save(self, title: str, dependencies: Dict[str, str], text: str) -> None:
+        """Durably record a finished section."""
+
+        checkpoint = SectionCheckpoint(
+            title=title,
+            fingerprint=stable_hash(dependencies),
+            text=text,
+            completed_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            dependencies=dict(dependencies),
+        )
+        atomic_write_text(self._path_for(title), json.dumps(asdict(checkpoint), ensure_ascii=False, indent=2))
+
+    def clear(self) -> None:
+        """Remove every stored checkpoint."""
+
+        for path in self.directory.glob("*.json"):
+            path.unlink()
+
+    def report(self) -> Dict[str, object]:
+        """Summarise which sections were rebuilt or reused in this run."""
+
+        return {
+            "rebuilt": [asdict(decision) for decision in self.decisions if decision.action == "rebuilt"],
+            "reused": [decision.title for decision in self.decisions if decision.action == "reused"],
+        }
+
+    def _path_for(self, title: str) -> Path:
+        digest = hashlib.sha1(title.encode("utf-8")).hexdigest()[:8]
+        return self.directory / f"{slugify(title)}-{digest}.json"
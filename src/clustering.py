@@ -0,0 +1,216 @@
+"""Sparse TF-IDF vectors and mini-batch k-means for grouping segment texts.
+
+NumPy is an optional dependency: it is imported lazily, and `cluster_texts`
+returns None when it is unavailable so callers can fall back to heuristics.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]+")
+
+
+def load_numpy() -> Optional[Any]:
+    """Return the numpy module, or None when it is not installed."""
+
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def text_terms(text: str) -> List[str]:
+    """Split text into features: lowercase Latin words and CJK character bigrams."""
+
+    terms: List[str] = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token[0] >= "\u4e00":
+            terms.extend(token[index : index + 2] for index in range(len(token) - 1))
+        elif len(token) > 1:
+            terms.append(token)
+    return terms
+
+
+class SparseRows:
+    """Minimal CSR matrix of L2-normalised TF-IDF rows, with the products k-means needs."""
+
+    def __init__(self, np: Any, indptr: Any, indices: Any, data: Any, n_features: int) -> None:
+        self.np = np
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.n_features = n_features
+        self.n_rows = len(indptr) - 1
+        self.row_ids = np.repeat(np.arange(self.n_rows), np.diff(indptr))
+
+    def take(self, rows: Any) -> "SparseRows":
+        """Return the sub-matrix made of ``rows``, in that order."""
+
+        np = self.np
+        lengths = np.diff(self.indptr)[rows]
+        indptr = np.concatenate(([0], np.cumsum(lengths)))
+        positions = np.repeat(self.indptr[rows] - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return SparseRows(np, indptr, self.indices[positions], self.data[positions], self.n_features)
+
+    def dot(self, dense: Any) -> Any:
+        """Return ``self @ dense.T`` for a dense ``(k, n_features)`` array."""
+
+        np = self.np
+        result = np.empty((self.n_rows, dense.shape[0]))
+        for column in range(dense.shape[0]):
+            result[:, column] = np.bincount(
+                self.row_ids, weights=self.data * dense[column, self.indices], minlength=self.n_rows
+            )
+        return result
+
+    def group_sums(self, labels: Any, groups: int) -> Any:
+        """Return the dense sum of the rows assigned to each of ``groups`` labels."""
+
+        flat = labels[self.row_ids] * self.n_features + self.indices
+        return self.np.bincount(flat, weights=self.data, minlength=groups * self.n_features).reshape(
+            groups, self.n_features
+        )
+
+
+def tfidf_rows(np: Any, texts: Sequence[str], max_features: int = 20000) -> Tuple[SparseRows, List[str]]:
+    """Vectorise texts as sublinear TF-IDF rows over the ``max_features`` most common terms."""
+
+    documents = [text_terms(text) for text in texts]
+    frequencies: Counter[str] = Counter()
+    for terms in documents:
+        frequencies.update(set(terms))
+    count = len(documents)
+    min_df = 2 if count >= 50 else 1
+    max_df = 0.9 * count if count >= 10 else count
+    candidates = [term for term, df in frequencies.items() if min_df <= df <= max_df]
+    vocabulary = sorted(candidates, key=lambda term: (-frequencies[term], term))[:max_features]
+    index = {term: position for position, term in enumerate(vocabulary)}
+
+    indptr = [0]
+    indices: List[int] = []
+    counts: List[int] = []
+    for terms in documents:
+        term_counts = Counter(index[term] for term in terms if term in index)
+        indices.extend(term_counts.keys())
+        counts.extend(term_counts.values())
+        indptr.append(len(indices))
+
+    indices_array = np.asarray(indices, dtype=np.int64)
+    document_frequency = np.asarray([frequencies[term] for term in vocabulary], dtype=np.float64)
+    idf = np.log((1 + count) / (1 + document_frequency)) + 1
+    data = (1 + np.log(np.asarray(counts, dtype=np.float64))) * idf[indices_array]
+    rows = SparseRows(np, np.asarray(indptr, dtype=np.int64), indices_array, data, len(vocabulary))
+    norms = np.sqrt(np.bincount(rows.row_ids, weights=data * data, minlength=rows.n_rows))
+    rows.data = data / np.where(norms > 0, norms, 1)[rows.row_ids]
+    return rows, vocabulary
+
+
+def _normalise(np: Any, centroids: Any) -> Any:
+    norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+    return centroids / np.where(norms > 0, norms, 1)
+
+
+def _seed_centroids(np: Any, rows: SparseRows, k: int, rng: Any, sample_size: int = 2048) -> Any:
+    """Choose initial centroids with k-means++ on a random sample of rows."""
+
+    sample = rows.take(rng.choice(rows.n_rows, size=min(rows.n_rows, sample_size), replace=False))
+    chosen = [int(rng.integers(sample.n_rows))]
+    centroids = sample.take(np.asarray(chosen)).group_sums(np.zeros(1, dtype=np.int64), 1)
+    best = sample.dot(centroids)[:, 0]
+    while len(chosen) < k:
+        distance = np.clip(1 - best, 0, None) ** 2
+        total = distance.sum()
+        candidate = int(rng.choice(sample.n_rows, p=distance / total)) if total > 0 else int(rng.integers(sample.n_rows))
+        chosen.append(candidate)
+        centroid = sample.take(np.asarray([candidate])).group_sums(np.zeros(1, dtype=np.int64), 1)
+        centroids = np.vstack([centroids, centroid])
+        best = np.maximum(best, sample.dot(centroid)[:, 0])
+    return _normalise(np, centroids)
+
+
+def minibatch_kmeans(
+    np: Any,
+    rows: SparseRows,
+    k: int,
+    seed: int = 0,
+    batch_size: int = 1024,
+    max_iterations: int = 100,
+) -> Tuple[Any, Any, Any]:
+    """Spherical mini-batch k-means on unit-length rows.
+
+    Each iteration assigns a random batch to its most similar centroid and moves
+    centroids towards the batch means with per-centroid learning rates, so the cost
+    is ``O(iterations * batch_size * k)`` plus one final ``O(nnz * k)`` assignment.
+
+    Returns
+    -------
+    tuple
+        ``(labels, similarities, centroids)``: the cluster of every row (-1 for rows
+        without features), each row's similarity to every centroid, and the centroids.
+    """
+
+    rng = np.random.default_rng(seed)
+    # Rows without features would pull centroids towards the origin; train without them.
+    training = rows.take(np.flatnonzero(np.diff(rows.indptr) > 0))
+    centroids = _seed_centroids(np, training, k, rng)
+    seen = np.zeros(k)
+    batch = min(batch_size, training.n_rows)
+    iterations = max(10, min(max_iterations, 3 * math.ceil(training.n_rows / batch)))
+    for _ in range(iterations):
+        sample = training.take(rng.choice(training.n_rows, size=batch, replace=False))
+        labels = sample.dot(centroids).argmax(axis=1)
+        batch_counts = np.bincount(labels, minlength=k).astype(np.float64)
+        seen += batch_counts
+        rate = np.divide(batch_counts, seen, out=np.zeros(k), where=seen > 0)[:, None]
+        means = sample.group_sums(labels, k) / np.maximum(batch_counts, 1)[:, None]
+        centroids = _normalise(np, (1 - rate) * centroids + rate * means)
+
+    similarities = rows.dot(centroids)
+    labels = similarities.argmax(axis=1)
+    labels[np.diff(rows.indptr) == 0] = -1
+    return labels, similarities, centroids
+
+
+@dataclass
+class Cluster:
+    """One group of texts, identified by positions in the clustered sequence."""
+
+    members: List[int]
+    representative: int
+    terms: List[str]
+
+
+def cluster_texts(texts: Sequence[str], k: int, seed: int = 0, max_features: int = 20000) -> Optional[List[Cluster]]:
+    """Group texts into at most ``k`` clusters of similar vocabulary.
+
+    Clusters are returned largest first. Each one's representative is the member
+    closest to its centroid and its terms are the centroid's heaviest features.
+    Texts without any usable term belong to no cluster. Returns None when NumPy is
+    not installed.
+    """
+
+    np = load_numpy()
+    if np is None:
+        return None
+    rows, vocabulary = tfidf_rows(np, texts, max_features)
+    with_features = int((np.diff(rows.indptr) > 0).sum())
+    if not vocabulary or with_features == 0:
+        return []
+    labels, similarities, centroids = minibatch_kmeans(np, rows, min(k, with_features), seed=seed)
+
+    clusters: List[Cluster] = []
+    for label in range(centroids.shape[0]):
+        members = np.flatnonzero(labels == label)
+        if members.size == 0:
+            continue
+        representative = int(members[similarities[members, label].argmax()])
+        top_terms = [vocabulary[term] for term in np.argsort(-centroids[label])[:2] if centroids[label, term] > 0]
+        clusters.append(Cluster(members=members.tolist(), representative=representative, terms=top_terms))
+    clusters.sort(key=lambda cluster: (-len(cluster.members), cluster.members[0]))
+    return clusters
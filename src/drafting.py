@@ -2,13 +2,18 @@
 
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Protocol, Sequence
+from typing import Dict, Iterator, List, Optional, Protocol, Sequence
 
+from . import profiling, tracing
+from .checkpoint import SectionCheckpointStore
 from .organization import Segment
 from .outline import OutlinePlan, OutlineSection
-from .utils import write_text_file
+from .utils import atomic_writer, stable_hash
+
+LOGGER = logging.getLogger(__name__)
 
 
 @dataclass
@@ -21,11 +26,15 @@ class Draft:
     def to_text(self) -> str:
         """Render the draft into a single markdown string."""
 
-        lines: List[str] = [f"# {self.title}"]
+        return "".join(self.iter_markdown())
+
+    def iter_markdown(self) -> Iterator[str]:
+        """Yield the markdown rendering piece by piece, one section at a time."""
+
+        yield f"# {self.title}"
         for heading, content in self.sections.items():
-            lines.append(f"\n## {heading}\n")
-            lines.append(content)
-        return "\n".join(lines)
+            yield f"\n\n## {heading}\n\n"
+            yield content
 
 
 class SectionWriter(Protocol):
@@ -35,28 +44,93 @@ class SectionWriter(Protocol):
         """Return fully drafted prose for the supplied outline section."""
 
 
+def section_segments(section: OutlineSection, segment_lookup: Dict[str, List[Segment]]) -> List[Segment]:
+    """Return the organised segments that back an outline section."""
+
+    bucket_segments = segment_lookup.get(section.bucket_name, [])
+    if not section.segment_ids:
+        return bucket_segments
+    wanted = set(section.segment_ids)
+    return [segment for segment in bucket_segments if segment.identifier in wanted]
+
+
+def section_dependencies(
+    section: OutlineSection,
+    segments: Sequence[Segment],
+    section_writer: Optional[SectionWriter] = None,
+) -> Dict[str, str]:
+    """Return per-component hashes of everything that determines a section's text.
+
+    Writers that expose a ``dependencies(section, segments)`` method (such as
+    `DualLLMSectionWriter`, which also covers its prompt template and model
+    parameters) are consulted first; otherwise the segments and bullets are hashed.
+    """
+
+    dependencies = getattr(section_writer, "dependencies", None)
+    if dependencies is not None:
+        return dependencies(section, segments)
+    return {
+        "segments": stable_hash([[segment.identifier, segment.text] for segment in segments]),
+        "bullets": stable_hash(section.bullet_points),
+        "writer": type(section_writer).__name__ if section_writer is not None else "stitched",
+    }
+
+
 def build_draft(
     outline: OutlinePlan,
     segment_lookup: Dict[str, List[Segment]],
     title: str,
     section_writer: Optional[SectionWriter] = None,
+    checkpoints: Optional[SectionCheckpointStore] = None,
+    reuse: bool = False,
 ) -> Draft:
-    """Create a draft by delegating each section to the configured writer."""
+    """Create a draft by delegating each section to the configured writer.
+
+    When a checkpoint store is supplied every finished section is recorded as soon as
+    it completes. With ``reuse`` enabled, sections whose dependency fingerprint
+    matches the stored checkpoint are taken from the store instead of being drafted
+    again; the store records which sections were rebuilt and why.
+    """
 
     sections: Dict[str, str] = {}
+    begin_draft = getattr(section_writer, "begin_draft", None)
+    if begin_draft is not None:
+        begin_draft(outline, title)
     for section in outline.sections:
-        key = section.title.lower().replace(" ", "_")
-        bucket_segments = segment_lookup.get(key, [])
-        if section_writer is not None:
-            generated = section_writer.write_section(section, bucket_segments)
-            sections[section.title] = generated or "TODO: Add content"
-            continue
-        combined = "\n\n".join(segment.text for segment in bucket_segments)
-        sections[section.title] = combined or "TODO: Add content"
+        bucket_segments = section_segments(section, segment_lookup)
+        with tracing.span(section.title, "section"), profiling.profile("draft", section.title):
+            tracing.annotate(items=len(bucket_segments))
+            sections[section.title] = _draft_section(section, bucket_segments, section_writer, checkpoints, reuse)
     return Draft(title=title, sections=sections)
 
 
+def _draft_section(
+    section: OutlineSection,
+    bucket_segments: Sequence[Segment],
+    section_writer: Optional[SectionWriter],
+    checkpoints: Optional[SectionCheckpointStore],
+    reuse: bool,
+) -> str:
+    dependencies: Dict[str, str] = {}
+    if checkpoints is not None:
+        dependencies = section_dependencies(section, bucket_segments, section_writer)
+        cached = checkpoints.resolve(section.title, dependencies, reuse)
+        if cached is not None:
+            LOGGER.info("Reusing section '%s' from checkpoint.", section.title)
+            tracing.annotate(reused=True)
+            return cached
+    if section_writer is not None:
+        text = section_writer.write_section(section, bucket_segments) or "TODO: Add content"
+    else:
+        text = "\n\n".join(segment.text for segment in bucket_segments) or "TODO: Add content"
+    if checkpoints is not None and section.title not in getattr(section_writer, "degraded_sections", ()):
+        checkpoints.save(section.title, dependencies, text)
+    return text
+
+
 def save_draft(draft: Draft, destination: Path) -> None:
     """Write the draft's text representation to disk."""
 
-    write_text_file(destination, draft.to_text())
+    with atomic_writer(destination) as stream:
+        stream.writelines(draft.iter_markdown())
+    LOGGER.info("Wrote text output to %s", destination)
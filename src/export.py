@@ -2,13 +2,114 @@
 
 from __future__ import annotations
 
+import html
 import json
-from dataclasses import dataclass
+import logging
+from contextlib import ExitStack
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Sequence, TextIO, Tuple, Type
 
 from .drafting import Draft
-from .utils import write_text_file
+from .metrics import current_recorder
+from .tracing import current_tracer
+from .utils import atomic_writer
+
+LOGGER = logging.getLogger(__name__)
+
+
+class DeliverableFormat:
+    """Streaming renderer for one deliverable file.
+
+    `DeliveryPackage.write` walks the draft once and hands every section to each
+    active format in turn, so no format needs the whole document in memory.
+    """
+
+    file_name = ""
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+
+    def begin(self, title: str) -> None:
+        """Write anything that precedes the first section."""
+
+    def section(self, index: int, heading: str, content: str) -> None:
+        """Write one section."""
+
+    def end(self) -> None:
+        """Write anything that follows the last section."""
+
+
+class MarkdownFormat(DeliverableFormat):
+    """The canonical markdown deliverable, identical to `Draft.to_text`."""
+
+    file_name = "deliverable.md"
+
+    def begin(self, title: str) -> None:
+        self.stream.write(f"# {title}")
+
+    def section(self, index: int, heading: str, content: str) -> None:
+        self.stream.write(f"\n\n## {heading}\n\n")
+        self.stream.write(content)
+
+
+class HtmlFormat(DeliverableFormat):
+    """A standalone HTML page with one ``<section>`` per draft section."""
+
+    file_name = "deliverable.html"
+
+    def begin(self, title: str) -> None:
+        escaped = html.escape(title)
+        self.stream.write(
+            "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{escaped}</title>\n"
+            "<style>body{max-width:46rem;margin:2rem auto;padding:0 1rem;font-family:serif;line-height:1.7}</style>\n"
+            f"</head>\n<body>\n<h1>{escaped}</h1>\n"
+        )
+
+    def section(self, index: int, heading: str, content: str) -> None:
+        self.stream.write(f"<section id=\"section-{index}\">\n<h2>{html.escape(heading)}</h2>\n")
+        for paragraph in content.split("\n\n"):
+            if paragraph.strip():
+                body = "<br>\n".join(html.escape(line) for line in paragraph.strip().splitlines())
+                self.stream.write(f"<p>{body}</p>\n")
+        self.stream.write("</section>\n")
+
+    def end(self) -> None:
+        self.stream.write("</body>\n</html>\n")
+
+
+class PlainTextFormat(DeliverableFormat):
+    """Plain text without markdown markup, for pasting into forms."""
+
+    file_name = "deliverable.txt"
+
+    def begin(self, title: str) -> None:
+        self.stream.write(f"{title}\n")
+
+    def section(self, index: int, heading: str, content: str) -> None:
+        self.stream.write(f"\n{heading}\n\n{content.strip()}\n")
+
+
+class SectionJsonFormat(DeliverableFormat):
+    """One JSON object per line and section, for downstream tooling."""
+
+    file_name = "sections.jsonl"
+
+    def begin(self, title: str) -> None:
+        self._title = title
+
+    def section(self, index: int, heading: str, content: str) -> None:
+        record = {"index": index, "title": self._title, "heading": heading, "text": content, "characters": len(content)}
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+EXPORT_FORMATS: Dict[str, Type[DeliverableFormat]] = {
+    "markdown": MarkdownFormat,
+    "html": HtmlFormat,
+    "text": PlainTextFormat,
+    "json": SectionJsonFormat,
+}
 
 
 @dataclass
@@ -17,12 +118,46 @@ class DeliveryPackage:
 
     draft: Draft
     metadata: Dict[str, str]
+    formats: Sequence[str] = ("markdown",)
+    mirrors: Sequence[Path] = field(default_factory=tuple)
 
     def write(self, destination: Path) -> None:
-        """Persist the package to the destination folder."""
+        """Persist the package to the destination folder.
 
-        markdown_path = destination / "deliverable.md"
-        write_text_file(markdown_path, self.draft.to_text())
+        Every format in ``formats`` (see `EXPORT_FORMATS`) is rendered in a single
+        pass over the draft's sections and streamed to a temporary file; the files,
+        and ``metadata.json``, are swapped into place only once all of them were
+        written. ``mirrors`` are extra paths that receive a copy of the markdown
+        rendering in the same pass.
+        """
+
+        unknown = [name for name in self.formats if name not in EXPORT_FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown export formats {unknown}; expected some of {sorted(EXPORT_FORMATS)}.")
+        targets: List[Tuple[Path, Type[DeliverableFormat]]] = [
+            (destination / EXPORT_FORMATS[name].file_name, EXPORT_FORMATS[name]) for name in dict.fromkeys(self.formats)
+        ]
+        targets.extend((mirror, MarkdownFormat) for mirror in self.mirrors)
 
         metadata_path = destination / "metadata.json"
-        write_text_file(metadata_path, json.dumps(self.metadata, indent=2))
+        with ExitStack() as stack:
+            renderers = [renderer(stack.enter_context(atomic_writer(path))) for path, renderer in targets]
+            for renderer in renderers:
+                renderer.begin(self.draft.title)
+            for index, (heading, content) in enumerate(self.draft.sections.items(), start=1):
+                for renderer in renderers:
+                    renderer.section(index, heading, content)
+            for renderer in renderers:
+                renderer.end()
+
+            payload: Dict[str, object] = dict(self.metadata)
+            tracer = current_tracer()
+            if tracer is not None:
+                # Spans still open (such as the export stage itself) are not included.
+                payload["timing"] = tracer.breakdown()
+            recorder = current_recorder()
+            if recorder is not None:
+                payload["llm_metrics"] = recorder.summary()
+            stack.enter_context(atomic_writer(metadata_path)).write(json.dumps(payload, indent=2))
+        for path, _ in targets:
+            LOGGER.info("Wrote text output to %s", path)
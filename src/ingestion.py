@@ -2,11 +2,20 @@
 
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass, field
+from functools import partial
+from itertools import groupby
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
 
-from .utils import read_text_directory
+from .archives import MaterialSource, ZipBundle, find_material_sources, iter_tar_members, open_compressed
+from .utils import MMAP_THRESHOLD, decode_text, file_digest, iter_ordered, iter_paragraphs, read_text_file, stable_hash
+
+# Materials at least this large are not read into memory at ingestion; their
+# paragraphs are streamed from disk during segmentation instead. This avoids the
+# raw text copy only: the cleaned paragraphs and segments are still held in memory.
+STREAM_THRESHOLD = 64 * 1024 * 1024
 
 
 @dataclass
@@ -27,16 +36,131 @@ class MaterialRecord:
     identifier: str
     content: str
     metadata: Dict[str, str] = field(default_factory=dict)
+    source: Optional[Path] = None
+    digest: str = ""
+
+    @property
+    def streamed(self) -> bool:
+        """Whether the text stays on disk at ``source`` instead of in ``content``."""
+
+        return self.source is not None
+
+    def fingerprint(self) -> str:
+        """Return a hash identifying the material's text."""
+
+        return self.digest if self.streamed else stable_hash(self.content)
+
+    def paragraphs(self) -> Iterator[str]:
+        """Yield the blank-line-delimited blocks of the text, streaming them for large files.
+
+        Streaming only avoids keeping the raw text in ``content``; callers that collect
+        the blocks (such as `classify_material`) still hold all of them.
+        """
+
+        if self.source is not None:
+            return iter_paragraphs(self.source, opener=open_compressed)
+        return iter(self.content.split("\n\n"))
+
+
+def _load_file(source: MaterialSource, mmap_threshold: int, stream_threshold: int) -> MaterialRecord:
+    if source.path.stat().st_size >= stream_threshold:
+        return MaterialRecord(identifier=source.name, content="", source=source.path, digest=file_digest(source.path))
+    if source.kind == "compressed":
+        with open_compressed(source.path) as stream:
+            return MaterialRecord(identifier=source.name, content=decode_text(stream.read()))
+    return MaterialRecord(identifier=source.name, content=read_text_file(source.path, mmap_threshold))
+
+
+def _load_zip_member(bundle: ZipBundle, archive_name: str, member: str) -> MaterialRecord:
+    return MaterialRecord(identifier=f"{archive_name}/{member}", content=decode_text(bundle.read(member)))
+
+
+def iter_materials(
+    raw_directory: Path,
+    max_workers: int = 4,
+    mmap_threshold: int = MMAP_THRESHOLD,
+    stream_threshold: int = STREAM_THRESHOLD,
+) -> Iterator[MaterialRecord]:
+    """Yield the text materials below the raw materials directory as records.
+
+    Plain `.txt` files, compressed `.txt.gz`/`.bz2`/`.xz`/`.zst` files and the `.txt`
+    members of zip and tar archives (optionally gzip, bzip2, xz or zstd compressed)
+    are read without extracting anything to disk. Sources are visited in sorted
+    order of their relative path and archive members in archive order, so the
+    sequence is deterministic. A member's identifier is the archive's relative path
+    followed by the member path, e.g. ``bundle.zip/chapter1/notes.txt``.
+
+    Parameters
+    ----------
+    raw_directory: Path
+        Folder containing user-provided source materials.
+    max_workers: int
+        Number of files and zip members decoded concurrently. Zip archives are
+        opened one at a time. Tar archives are a single compressed stream and are
+        read sequentially.
+    mmap_threshold: int
+        Size in bytes from which plain files are decoded through a memory map.
+    stream_threshold: int
+        On-disk size in bytes from which plain and compressed files are not read at
+        all: the record only keeps the path and a digest, and
+        `MaterialRecord.paragraphs` streams the text.
+    """
+
+    sources = find_material_sources(raw_directory)
+    for kind, group in groupby(sources, key=lambda source: source.kind if source.kind in ("tar", "zip") else "file"):
+        if kind == "file":
+            load = partial(_load_file, mmap_threshold=mmap_threshold, stream_threshold=stream_threshold)
+            yield from iter_ordered(load, list(group), max_workers)
+            continue
+        for source in group:
+            if kind == "tar":
+                for member, data in iter_tar_members(source.path):
+                    yield MaterialRecord(identifier=f"{source.name}/{member}", content=decode_text(data))
+                continue
+            # One archive is open at a time, so directories with many bundles do not run out of handles.
+            bundle = ZipBundle(source.path)
+            try:
+                yield from iter_ordered(partial(_load_zip_member, bundle, source.name), list(bundle.members), max_workers)
+            finally:
+                bundle.close()
+
+
+def read_text_directory(directory: Path, max_workers: int = 4) -> Dict[str, str]:
+    """Return a mapping of material identifiers to their UTF-8 text contents.
+
+    Plain `.txt` files, compressed text files and the `.txt` members of zip and tar
+    archives are included (see `iter_materials`).
+
+    Parameters
+    ----------
+    directory: Path
+        Folder containing text files that should be ingested.
+    max_workers: int
+        Number of files read concurrently.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the directory does not exist.
+    UnicodeDecodeError
+        If a file cannot be decoded using UTF-8.
+    """
+
+    return {
+        record.identifier: record.content
+        for record in iter_materials(directory, max_workers=max_workers, stream_threshold=sys.maxsize)
+    }
 
 
-def load_materials(raw_directory: Path) -> List[MaterialRecord]:
-    """Load `.txt` files from the raw materials directory.
+def load_materials(raw_directory: Path, max_workers: int = 4) -> List[MaterialRecord]:
+    """Load text materials, including archived ones, from the raw materials directory.
 
     Parameters
     ----------
     raw_directory: Path
         Folder containing user-provided source materials.
+    max_workers: int
+        Number of files read concurrently (see `iter_materials`).
     """
 
-    contents = read_text_directory(raw_directory)
-    return [MaterialRecord(identifier=name, content=text) for name, text in contents.items()]
+    return list(iter_materials(raw_directory, max_workers=max_workers))
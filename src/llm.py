@@ -5,20 +5,60 @@ from __future__ import annotations
 import json
 import logging
 import os
-from dataclasses import dataclass, field
-from typing import Dict, Optional, Protocol
-from urllib import error, request
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Protocol, Sequence, Set, Tuple
+
+from .utils import stable_hash
+
+if TYPE_CHECKING:
+    import http.client
+    from pathlib import Path
+
+    from .cassette import Cassette
+
+# The HTTP stack (http.client, urllib.request, ssl) is imported on first use so that
+# code paths which never call a provider, such as plan-only runs, do not pay for it.
 
 LOGGER = logging.getLogger(__name__)
 
 
 class LLMError(RuntimeError):
-    """Exception raised when an LLM call cannot be completed."""
+    """Exception raised when an LLM call cannot be completed.
+
+    ``status`` carries the HTTP status when the provider answered, ``retryable``
+    marks transient failures (network errors, 429 and 5xx responses) and
+    ``attempts`` records how many requests were made before giving up.
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = False) -> None:
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.attempts = 1
+
+
+@dataclass
+class LLMEndpoint:
+    """One base URL and API key through which a model can be reached."""
+
+    base_url: str
+    api_key_env: Optional[str] = None
+    api_key: Optional[str] = None
+    name: Optional[str] = None
 
 
 @dataclass
 class LLMClientConfig:
-    """Configuration block describing how to reach a chat-completion model."""
+    """Configuration block describing how to reach a chat-completion model.
+
+    When ``endpoints`` is non-empty the model is served by a `LoadBalancedClient`
+    spreading calls over those endpoints (``base_url`` and the key fields then only
+    provide defaults); ``routing``, ``eject_after_failures`` and
+    ``ejection_seconds`` tune how calls are routed and when endpoints are ejected.
+    """
 
     identifier: str
     model: str
@@ -28,6 +68,37 @@ class LLMClientConfig:
     base_url: Optional[str] = None
     timeout: float = 60.0
     extra_headers: Dict[str, str] = field(default_factory=dict)
+    max_retries: int = 0
+    retry_backoff: float = 1.0
+    endpoints: List[LLMEndpoint] = field(default_factory=list)
+    routing: str = "least_outstanding"
+    eject_after_failures: int = 3
+    ejection_seconds: float = 30.0
+
+    def endpoint_configs(self) -> List[Tuple[str, "LLMClientConfig"]]:
+        """Return ``(name, config)`` pairs for each endpoint, inheriting unset fields."""
+
+        configs: List[Tuple[str, LLMClientConfig]] = []
+        for index, endpoint in enumerate(self.endpoints):
+            name = endpoint.name or _endpoint_host(endpoint.base_url) or f"endpoint-{index}"
+            if any(existing == name for existing, _ in configs):
+                name = f"{name}#{index}"
+            configs.append(
+                (
+                    name,
+                    replace(
+                        self,
+                        identifier=f"{self.identifier}@{name}",
+                        base_url=endpoint.base_url,
+                        api_key_env=endpoint.api_key_env or self.api_key_env,
+                        api_key=endpoint.api_key or (None if endpoint.api_key_env else self.api_key),
+                        # The balancer fails over between endpoints instead of retrying one.
+                        max_retries=0,
+                        endpoints=[],
+                    ),
+                )
+            )
+        return configs
 
     def resolve_api_key(self) -> str:
         """Return the API key, preferring explicit value over environment."""
@@ -54,6 +125,43 @@ class LLMGenerationPrompt:
     top_p: float = 0.9
 
 
+@dataclass
+class LLMUsage:
+    """Token accounting reported by the provider for a single call."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, object]) -> "LLMUsage":
+        """Extract usage counters from an OpenAI-compatible response payload.
+
+        Cached prompt tokens are read from ``usage.prompt_tokens_details.cached_tokens``
+        (OpenAI, Zhipu) and fall back to ``usage.prompt_cache_hit_tokens`` (DeepSeek).
+        Missing fields default to zero.
+        """
+
+        usage = raw.get("usage")
+        if not isinstance(usage, dict):
+            return cls()
+        details = usage.get("prompt_tokens_details")
+        cached = details.get("cached_tokens") if isinstance(details, dict) else None
+        if cached is None:
+            cached = usage.get("prompt_cache_hit_tokens", 0)
+        return cls(
+            prompt_tokens=_as_int(usage.get("prompt_tokens")),
+            completion_tokens=_as_int(usage.get("completion_tokens")),
+            cached_tokens=_as_int(cached),
+        )
+
+
+def _as_int(value: object) -> int:
+    if isinstance(value, (int, float)):
+        return int(value)
+    return 0
+
+
 @dataclass
 class LLMGeneration:
     """Normalized representation of a model response."""
@@ -62,6 +170,32 @@ class LLMGeneration:
     model: str
     provider: str
     raw: Dict[str, object] = field(default_factory=dict)
+    latency: float = 0.0
+    attempts: int = 1
+    cached: bool = False
+
+    @property
+    def usage(self) -> LLMUsage:
+        """Return the provider-reported token usage for this generation."""
+
+        return LLMUsage.from_raw(self.raw)
+
+    @property
+    def finish_reason(self) -> Optional[str]:
+        """Return why the provider stopped generating (``stop``, ``length``, ...), if reported."""
+
+        choices = self.raw.get("choices")
+        if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+            reason = choices[0].get("finish_reason")
+            if isinstance(reason, str):
+                return reason
+        return None
+
+    @property
+    def truncated(self) -> bool:
+        """Whether the response was cut off by ``max_output_tokens``."""
+
+        return self.finish_reason in ("length", "max_tokens")
 
 
 class LLMClient(Protocol):
@@ -75,10 +209,93 @@ class LLMClient(Protocol):
         """Return a generation for the supplied prompt."""
 
 
+class HTTPConnectionPool:
+    """Keep-alive HTTP(S) connections shared by every client that uses the pool.
+
+    Idle connections are kept per ``(scheme, host, port)`` so consecutive calls to the
+    same provider skip the TCP and TLS handshakes. The pool talks to endpoints
+    directly and therefore does not honour proxy environment variables.
+    """
+
+    def __init__(self, max_idle_per_host: int = 8) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def post(self, url: str, body: bytes, headers: Dict[str, str], timeout: float) -> Tuple[int, bytes]:
+        """Send a POST request and return the status code and response body."""
+
+        import http.client
+        from urllib import parse
+
+        retryable = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+        parts = parse.urlsplit(url)
+        scheme = parts.scheme or "https"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+
+        for attempt in range(2):
+            connection, reused = self._acquire(key, timeout)
+            try:
+                connection.request("POST", path or "/", body=body, headers=headers)
+                response = connection.getresponse()
+                payload = response.read()
+            except retryable:
+                connection.close()
+                # A reused keep-alive connection may have been closed by the server.
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(key, connection)
+            return response.status, payload
+        raise ConnectionError(f"Unable to send request to {url}")
+
+    def close(self) -> None:
+        """Close every idle connection."""
+
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _acquire(self, key: Tuple[str, str, int], timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            connections = self._idle.get(key)
+            if connections:
+                self.reused += 1
+                connection = connections.pop()
+                connection.timeout = timeout
+                return connection, True
+            self.created += 1
+        import http.client
+
+        scheme, host, port = key
+        factory = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return factory(host, port, timeout=timeout), False
+
+    def _release(self, key: Tuple[str, str, int], connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < self.max_idle_per_host:
+                connections.append(connection)
+                return
+        connection.close()
+
+
 class OpenAICompatibleClient:
     """Thin wrapper for OpenAI's chat completion API and compatible providers."""
 
-    def __init__(self, config: LLMClientConfig) -> None:
+    def __init__(self, config: LLMClientConfig, pool: Optional[HTTPConnectionPool] = None) -> None:
         if config.provider not in {"openai", "openai-compatible"}:
             raise LLMError(
                 f"OpenAICompatibleClient only supports provider 'openai' or 'openai-compatible', got '{config.provider}'."
@@ -90,6 +307,9 @@ class OpenAICompatibleClient:
         self._base_url = (config.base_url or "https://api.openai.com").rstrip("/")
         self._timeout = config.timeout
         self._extra_headers = config.extra_headers
+        self._max_retries = max(config.max_retries, 0)
+        self._retry_backoff = config.retry_backoff
+        self._pool = pool
 
     def generate(self, prompt: LLMGenerationPrompt) -> LLMGeneration:
         payload = {
@@ -109,8 +329,50 @@ class OpenAICompatibleClient:
             **self._extra_headers,
         }
         url = f"{self._base_url}/v1/chat/completions"
-        req = request.Request(url, data=body, headers=headers, method="POST")
+        started = time.perf_counter()
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                if self._pool is not None:
+                    response_bytes = self._post_pooled(url, body, headers)
+                else:
+                    response_bytes = self._post(url, body, headers)
+                break
+            except LLMError as exc:
+                exc.attempts = attempts
+                if not exc.retryable or attempts > self._max_retries:
+                    raise
+                delay = self._retry_backoff * 2 ** (attempts - 1)
+                LOGGER.warning(
+                    "Retrying LLM %s in %.1fs after transient error (attempt %d of %d).",
+                    self.identifier,
+                    delay,
+                    attempts,
+                    self._max_retries + 1,
+                )
+                time.sleep(delay)
 
+        try:
+            parsed = json.loads(response_bytes.decode("utf-8"))
+            content = parsed["choices"][0]["message"]["content"].strip()
+        except (KeyError, IndexError, json.JSONDecodeError) as exc:
+            LOGGER.error("Unexpected payload when calling LLM %s: %s", self.identifier, response_bytes)
+            raise LLMError("Unable to parse LLM response payload") from exc
+
+        return LLMGeneration(
+            text=content,
+            model=self.model,
+            provider=self.provider,
+            raw=parsed,
+            latency=time.perf_counter() - started,
+            attempts=attempts,
+        )
+
+    def _post(self, url: str, body: bytes, headers: Dict[str, str]) -> bytes:
+        from urllib import error, request
+
+        req = request.Request(url, data=body, headers=headers, method="POST")
         try:
             with request.urlopen(req, timeout=self._timeout) as response:
                 response_bytes = response.read()
@@ -119,16 +381,426 @@ class OpenAICompatibleClient:
             LOGGER.error(
                 "HTTP error from LLM provider %s (%s): %s", self.provider, self.identifier, detail
             )
-            raise LLMError(f"LLM request failed with status {exc.code}: {detail}") from exc
-        except error.URLError as exc:
+            raise LLMError(
+                f"LLM request failed with status {exc.code}: {detail}",
+                status=exc.code,
+                retryable=_is_retryable_status(exc.code),
+            ) from exc
+        except (error.URLError, OSError) as exc:
             LOGGER.error("Network error contacting LLM provider %s: %s", self.identifier, exc)
-            raise LLMError(f"Failed to reach LLM provider {self.identifier}: {exc}") from exc
+            raise LLMError(f"Failed to reach LLM provider {self.identifier}: {exc}", retryable=True) from exc
+        return response_bytes
+
+    def _post_pooled(self, url: str, body: bytes, headers: Dict[str, str]) -> bytes:
+        import http.client
 
+        assert self._pool is not None
         try:
-            parsed = json.loads(response_bytes.decode("utf-8"))
-            content = parsed["choices"][0]["message"]["content"].strip()
-        except (KeyError, IndexError, json.JSONDecodeError) as exc:
-            LOGGER.error("Unexpected payload when calling LLM %s: %s", self.identifier, response_bytes)
-            raise LLMError("Unable to parse LLM response payload") from exc
+            status, response_bytes = self._pool.post(url, body, headers, self._timeout)
+        except (OSError, http.client.HTTPException) as exc:
+            LOGGER.error("Network error contacting LLM provider %s: %s", self.identifier, exc)
+            raise LLMError(f"Failed to reach LLM provider {self.identifier}: {exc}", retryable=True) from exc
+        if status >= 400:
+            detail = response_bytes.decode("utf-8", errors="ignore")
+            LOGGER.error(
+                "HTTP error from LLM provider %s (%s): %s", self.provider, self.identifier, detail
+            )
+            raise LLMError(
+                f"LLM request failed with status {status}: {detail}",
+                status=status,
+                retryable=_is_retryable_status(status),
+            )
+        return response_bytes
+
+
+def _is_retryable_status(status: int) -> bool:
+    return status == 429 or status >= 500
+
+
+def _endpoint_host(url: str) -> str:
+    from urllib import parse
+
+    return parse.urlsplit(url).netloc
+
+
+class GenerationCache:
+    """Thread-safe LRU cache of generations keyed by model and prompt."""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, LLMGeneration]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(client: LLMClient, prompt: LLMGenerationPrompt) -> str:
+        return stable_hash(
+            [
+                client.provider,
+                client.model,
+                prompt.system_prompt,
+                prompt.user_prompt,
+                prompt.temperature,
+                prompt.max_output_tokens,
+                prompt.top_p,
+            ]
+        )
+
+    def get(self, key: str) -> Optional[LLMGeneration]:
+        with self._lock:
+            generation = self._entries.get(key)
+            if generation is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return generation
+
+    def put(self, key: str, generation: LLMGeneration) -> None:
+        with self._lock:
+            self._entries[key] = generation
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RateLimiter:
+    """Cap concurrent requests and requests per minute for one endpoint."""
+
+    def __init__(self, max_concurrency: int = 4, requests_per_minute: float = 0.0) -> None:
+        self._semaphore = threading.BoundedSemaphore(max(max_concurrency, 1))
+        self._interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "RateLimiter":
+        self._semaphore.acquire()
+        if self._interval:
+            with self._lock:
+                now = time.monotonic()
+                slot = max(self._next_slot, now)
+                self._next_slot = slot + self._interval
+            if slot > now:
+                time.sleep(slot - now)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._semaphore.release()
+
+
+class SharedLLMClient:
+    """`LLMClient` wrapper adding a shared generation cache and rate limiter."""
+
+    def __init__(
+        self,
+        inner: LLMClient,
+        cache: Optional[GenerationCache] = None,
+        limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        self.inner = inner
+        self.identifier = inner.identifier
+        self.model = inner.model
+        self.provider = inner.provider
+        self._cache = cache
+        self._limiter = limiter
+
+    def generate(self, prompt: LLMGenerationPrompt) -> LLMGeneration:
+        key = GenerationCache.key(self.inner, prompt) if self._cache is not None else ""
+        if self._cache is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                # The stored usage describes the original request; this one cost nothing.
+                return replace(cached, latency=0.0, attempts=0, cached=True)
+        if self._limiter is not None:
+            with self._limiter:
+                generation = self.inner.generate(prompt)
+        else:
+            generation = self.inner.generate(prompt)
+        if self._cache is not None:
+            self._cache.put(key, generation)
+        return generation
+
+
+ROUTING_STRATEGIES = ("least_outstanding", "latency")
+# Authentication failures are specific to one key, so they also trigger failover.
+_FAILOVER_STATUSES = {401, 403}
+
+
+@dataclass
+class EndpointStats:
+    """Routing state and counters for one endpoint of a `LoadBalancedClient`."""
+
+    name: str
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ejections: int = 0
+    latency_ewma: float = 0.0
+    ejected_until: float = 0.0
+
+    def is_ejected(self, now: float) -> bool:
+        return self.ejected_until > now
+
+    def as_dict(self, now: float) -> Dict[str, object]:
+        return {
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "latency_ewma": round(self.latency_ewma, 4),
+            "healthy": not self.is_ejected(now),
+        }
+
+
+class LoadBalancedClient:
+    """`LLMClient` spreading calls for one logical model over several endpoints.
+
+    Each call goes to the healthy endpoint with the fewest requests in flight
+    (``least_outstanding``) or the lowest smoothed latency weighted by its in-flight
+    requests (``latency``). Transient and authentication failures fail over to the
+    next endpoint; an endpoint failing ``eject_after_failures`` times in a row is
+    ejected for ``ejection_seconds`` and then probed again. When every endpoint is
+    ejected, calls still go to the one whose ejection expires first. If all
+    endpoints fail, the round is retried up to ``max_retries`` times with backoff.
+    """
+
+    _LATENCY_SMOOTHING = 0.3
+
+    def __init__(
+        self,
+        identifier: str,
+        model: str,
+        provider: str,
+        members: Sequence[Tuple[str, LLMClient]],
+        routing: str = "least_outstanding",
+        eject_after_failures: int = 3,
+        ejection_seconds: float = 30.0,
+        max_retries: int = 0,
+        retry_backoff: float = 1.0,
+    ) -> None:
+        if routing not in ROUTING_STRATEGIES:
+            raise LLMError(f"Unknown routing strategy '{routing}'; expected one of {ROUTING_STRATEGIES}.")
+        if not members:
+            raise LLMError(f"LLM client '{identifier}' has no endpoints.")
+        self.identifier = identifier
+        self.model = model
+        self.provider = provider
+        self._members = dict(members)
+        self._stats = {name: EndpointStats(name) for name, _ in members}
+        self._routing = routing
+        self._eject_after = max(eject_after_failures, 1)
+        self._ejection_seconds = ejection_seconds
+        self._max_retries = max(max_retries, 0)
+        self._retry_backoff = retry_backoff
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(
+        cls,
+        config: LLMClientConfig,
+        member_factory: Callable[[LLMClientConfig], LLMClient],
+    ) -> "LoadBalancedClient":
+        """Build a balancer whose members are created by ``member_factory`` per endpoint."""
+
+        return cls(
+            config.identifier,
+            config.model,
+            config.provider,
+            [(name, member_factory(member)) for name, member in config.endpoint_configs()],
+            routing=config.routing,
+            eject_after_failures=config.eject_after_failures,
+            ejection_seconds=config.ejection_seconds,
+            max_retries=config.max_retries,
+            retry_backoff=config.retry_backoff,
+        )
+
+    def generate(self, prompt: LLMGenerationPrompt) -> LLMGeneration:
+        attempts = 0
+        last_error: Optional[LLMError] = None
+        for round_index in range(self._max_retries + 1):
+            if round_index:
+                time.sleep(self._retry_backoff * 2 ** (round_index - 1))
+            tried: Set[str] = set()
+            while True:
+                name = self._acquire(tried)
+                if name is None:
+                    break
+                tried.add(name)
+                attempts += 1
+                started = time.perf_counter()
+                try:
+                    generation = self._members[name].generate(prompt)
+                except LLMError as exc:
+                    failover = exc.retryable or exc.status in _FAILOVER_STATUSES
+                    self._release(name, ok=not failover, latency=None)
+                    exc.attempts = attempts
+                    if not failover:
+                        raise
+                    LOGGER.warning("Endpoint %s of LLM %s failed; failing over: %s", name, self.identifier, exc)
+                    last_error = exc
+                    continue
+                except BaseException:
+                    self._release(name, ok=True, latency=None)
+                    raise
+                self._release(name, ok=True, latency=time.perf_counter() - started)
+                generation.attempts = attempts
+                return generation
+        assert last_error is not None
+        raise last_error
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        """Return per-endpoint request, failure, latency and health figures."""
+
+        now = time.monotonic()
+        with self._lock:
+            return {name: stats.as_dict(now) for name, stats in self._stats.items()}
+
+    def _acquire(self, exclude: Set[str]) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [stats for name, stats in self._stats.items() if name not in exclude]
+            healthy = [stats for stats in candidates if not stats.is_ejected(now)]
+            if not healthy:
+                if any(not stats.is_ejected(now) for stats in self._stats.values()):
+                    # Healthy endpoints were already tried in this round; leave ejected ones alone.
+                    return None
+                healthy = sorted(candidates, key=lambda stats: stats.ejected_until)[:1]
+            if not healthy:
+                return None
+            if self._routing == "latency":
+                chosen = min(healthy, key=lambda stats: (stats.latency_ewma * (stats.outstanding + 1), stats.outstanding))
+            else:
+                chosen = min(healthy, key=lambda stats: (stats.outstanding, stats.requests))
+            chosen.outstanding += 1
+            chosen.requests += 1
+            return chosen.name
+
+    def _release(self, name: str, ok: bool, latency: Optional[float]) -> None:
+        with self._lock:
+            stats = self._stats[name]
+            stats.outstanding -= 1
+            if ok:
+                stats.consecutive_failures = 0
+                stats.ejected_until = 0.0
+                if latency is not None:
+                    alpha = self._LATENCY_SMOOTHING
+                    stats.latency_ewma = latency if not stats.latency_ewma else (1 - alpha) * stats.latency_ewma + alpha * latency
+                return
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= self._eject_after:
+                stats.ejected_until = time.monotonic() + self._ejection_seconds
+                stats.ejections += 1
+                LOGGER.warning(
+                    "Ejecting endpoint %s of LLM %s for %.0fs after %d consecutive failures.",
+                    name,
+                    self.identifier,
+                    self._ejection_seconds,
+                    stats.consecutive_failures,
+                )
+
+
+class SharedLLMResources:
+    """Process-wide LLM clients, connection pool, rate limits and generation cache.
+
+    Pipelines that receive the same instance reuse one client per distinct
+    configuration, so concurrent jobs share keep-alive connections, per-endpoint rate
+    limits and previously generated responses. They also share one recording
+    cassette per path, so the jobs of a batch or service are recorded into a single
+    file instead of each truncating it.
+    """
+
+    def __init__(
+        self,
+        max_concurrency_per_endpoint: int = 4,
+        requests_per_minute: float = 0.0,
+        cache_size: int = 256,
+        pool: Optional[HTTPConnectionPool] = None,
+    ) -> None:
+        from urllib import request
+
+        if pool is None and not request.getproxies():
+            pool = HTTPConnectionPool()
+        self.pool = pool
+        self.cache = GenerationCache(cache_size) if cache_size > 0 else None
+        self._max_concurrency = max_concurrency_per_endpoint
+        self._requests_per_minute = requests_per_minute
+        self._clients: Dict[str, LLMClient] = {}
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._balancers: Dict[str, LoadBalancedClient] = {}
+        self._cassettes: Dict[str, "Cassette"] = {}
+        self._lock = threading.Lock()
+
+    def client_for(self, config: LLMClientConfig) -> LLMClient:
+        """Return the shared client for a configuration, creating it on first use."""
+
+        key = stable_hash(
+            [
+                config.identifier,
+                config.provider,
+                config.model,
+                config.base_url,
+                config.api_key_env,
+                config.api_key,
+                [[endpoint.base_url, endpoint.api_key_env, endpoint.api_key] for endpoint in config.endpoints],
+            ]
+        )
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                return client
+            if config.endpoints:
+                # Rate limits apply per endpoint; the generation cache spans all of them.
+                balancer = LoadBalancedClient.from_config(
+                    config, lambda member: SharedLLMClient(self._direct_client(member), limiter=self._limiter_for(member))
+                )
+                self._balancers[key] = balancer
+                client = SharedLLMClient(balancer, cache=self.cache)
+            else:
+                client = SharedLLMClient(self._direct_client(config), cache=self.cache, limiter=self._limiter_for(config))
+            self._clients[key] = client
+            return client
+
+    def recording_cassette(self, path: "Path") -> "Cassette":
+        """Return the cassette recording to ``path``, opening (and truncating) it on first use."""
+
+        from .cassette import Cassette
+
+        key = str(path.resolve())
+        with self._lock:
+            cassette = self._cassettes.get(key)
+            if cassette is None:
+                cassette = self._cassettes[key] = Cassette(path, "record")
+            return cassette
+
+    def stats(self) -> Dict[str, object]:
+        """Return cache and connection reuse counters, plus per-endpoint routing stats."""
+
+        return {
+            "clients": len(self._clients),
+            "cache_hits": self.cache.hits if self.cache else 0,
+            "cache_misses": self.cache.misses if self.cache else 0,
+            "connections_created": self.pool.created if self.pool else 0,
+            "connections_reused": self.pool.reused if self.pool else 0,
+            "endpoints": {balancer.identifier: balancer.stats() for balancer in self._balancers.values()},
+        }
+
+    def _direct_client(self, config: LLMClientConfig) -> LLMClient:
+        return OpenAICompatibleClient(config, pool=self.pool)
+
+    def _limiter_for(self, config: LLMClientConfig) -> RateLimiter:
+        endpoint = config.base_url or "https://api.openai.com"
+        return self._limiters.setdefault(endpoint, RateLimiter(self._max_concurrency, self._requests_per_minute))
+
+    def close(self) -> None:
+        """Release pooled connections and close recording cassettes."""
 
-        return LLMGeneration(text=content, model=self.model, provider=self.provider, raw=parsed)
\ No newline at end of file
+        if self.pool is not None:
+            self.pool.close()
+        with self._lock:
+            cassettes = list(self._cassettes.values())
+            self._cassettes.clear()
+        for cassette in cassettes:
+            cassette.close()
\ No newline at end of file
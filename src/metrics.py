@@ -0,0 +1,189 @@
+"""Token, latency and cost accounting for every LLM call in a pipeline run."""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import math
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from .utils import write_text_file
+
+LOGGER = logging.getLogger(__name__)
+LATENCY_BUCKETS: Sequence[float] = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0, math.inf)
+
+
+@dataclass
+class LLMCallRecord:
+    """Measurements captured for one logical LLM call (including its retries)."""
+
+    client_id: str
+    model: str
+    provider: str
+    section: str
+    latency: float
+    attempts: int = 1
+    ok: bool = True
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    max_output_tokens: int = 0
+    truncated: bool = False
+    cached: bool = False
+
+
+@dataclass
+class ModelPrice:
+    """USD prices per million tokens for one model."""
+
+    input: float = 0.0
+    output: float = 0.0
+    cached_input: Optional[float] = None
+
+    def cost(self, record: LLMCallRecord) -> float:
+        cached_rate = self.input if self.cached_input is None else self.cached_input
+        uncached = max(record.prompt_tokens - record.cached_tokens, 0)
+        return (uncached * self.input + record.cached_tokens * cached_rate + record.completion_tokens * self.output) / 1e6
+
+
+class PriceTable:
+    """Mapping of model names to token prices used for cost estimates."""
+
+    def __init__(self, prices: Optional[Dict[str, ModelPrice]] = None) -> None:
+        self.prices = prices or {}
+
+    @classmethod
+    def from_file(cls, path: Optional[Path]) -> "PriceTable":
+        """Load ``{"model": {"input": .., "output": .., "cached_input": ..}}`` from JSON.
+
+        Prices are USD per million tokens. A missing or unreadable file yields an empty
+        table, in which case costs are reported as unpriced.
+        """
+
+        if path is None or not path.exists():
+            return cls()
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            return cls({model: ModelPrice(**entry) for model, entry in payload.items()})
+        except (OSError, TypeError, json.JSONDecodeError) as exc:
+            LOGGER.warning("Ignoring unreadable price table %s: %s", path, exc)
+            return cls()
+
+    def cost(self, record: LLMCallRecord) -> Optional[float]:
+        price = self.prices.get(record.model)
+        return price.cost(record) if price is not None else None
+
+
+def _percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of an already sorted sequence."""
+
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+class MetricsRecorder:
+    """Thread-safe collector that aggregates LLM calls per provider and per section."""
+
+    def __init__(self, prices: Optional[PriceTable] = None) -> None:
+        self.prices = prices or PriceTable()
+        self.records: List[LLMCallRecord] = []
+        self._lock = threading.Lock()
+
+    def record(self, record: LLMCallRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self) -> Dict[str, object]:
+        """Return per-provider latency histograms, token totals and per-section costs."""
+
+        with self._lock:
+            records = list(self.records)
+
+        providers: Dict[str, Dict[str, object]] = {}
+        for key in sorted({(record.client_id, record.model, record.provider) for record in records}):
+            group = [record for record in records if (record.client_id, record.model, record.provider) == key]
+            latencies = sorted(record.latency for record in group if not record.cached) or [0.0]
+            histogram = {
+                ("+Inf" if math.isinf(bound) else f"le_{bound:g}s"): sum(1 for value in latencies if value <= bound)
+                for bound in LATENCY_BUCKETS
+            }
+            providers[key[0]] = {
+                "model": key[1],
+                "provider": key[2],
+                **self._totals(group),
+                "latency_seconds": {
+                    "mean": round(sum(latencies) / len(latencies), 4),
+                    "p50": round(_percentile(latencies, 0.50), 4),
+                    "p95": round(_percentile(latencies, 0.95), 4),
+                    "p99": round(_percentile(latencies, 0.99), 4),
+                    "max": round(latencies[-1], 4),
+                    "cumulative_histogram": histogram,
+                },
+            }
+
+        sections: Dict[str, Dict[str, object]] = {}
+        for title in dict.fromkeys(record.section for record in records):
+            sections[title] = self._totals([record for record in records if record.section == title])
+
+        return {"providers": providers, "sections": sections, "total": self._totals(records)}
+
+    def write(self, destination: Path) -> None:
+        """Persist the summary together with the raw call records."""
+
+        with self._lock:
+            raw = [asdict(record) for record in self.records]
+        payload = {"summary": self.summary(), "calls": raw}
+        write_text_file(destination, json.dumps(payload, ensure_ascii=False, indent=2))
+
+    def _totals(self, records: Sequence[LLMCallRecord]) -> Dict[str, object]:
+        costs = [0.0 if record.cached else self.prices.cost(record) for record in records]
+        priced = [cost for cost in costs if cost is not None]
+        return {
+            "calls": sum(1 for record in records if not record.cached),
+            "cache_hits": sum(1 for record in records if record.cached),
+            "failures": sum(1 for record in records if not record.ok),
+            "retries": sum(max(record.attempts - 1, 0) for record in records),
+            "truncated": sum(1 for record in records if record.truncated),
+            "prompt_tokens": sum(record.prompt_tokens for record in records),
+            "completion_tokens": sum(record.completion_tokens for record in records),
+            "cached_tokens": sum(record.cached_tokens for record in records),
+            "estimated_cost_usd": round(sum(priced), 6) if priced else None,
+            "unpriced_calls": len(costs) - len(priced),
+        }
+
+
+_ACTIVE_RECORDER: contextvars.ContextVar[Optional[MetricsRecorder]] = contextvars.ContextVar(
+    "active_metrics_recorder", default=None
+)
+
+
+def current_recorder() -> Optional[MetricsRecorder]:
+    """Return the metrics recorder active in this context, if any."""
+
+    return _ACTIVE_RECORDER.get()
+
+
+@contextmanager
+def activate(recorder: MetricsRecorder) -> Iterator[MetricsRecorder]:
+    """Route `record_call` invocations in this context to ``recorder``."""
+
+    token = _ACTIVE_RECORDER.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _ACTIVE_RECORDER.reset(token)
+
+
+def record_call(record: LLMCallRecord) -> None:
+    """Record a call on the active recorder; a no-op when metrics are not active."""
+
+    recorder = _ACTIVE_RECORDER.get()
+    if recorder is not None:
+        recorder.record(record)
@@ -2,13 +2,17 @@
 
 from __future__ import annotations
 
+import csv
 import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Set, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, MutableMapping, Optional, Set, Tuple
 
 from .ingestion import MaterialRecord
-from .utils import ensure_directory, write_text_file
+from .utils import atomic_writer, ensure_directory, stable_hash, write_text_file
+
+if TYPE_CHECKING:
+    from .segment_store import SegmentStore
 
 
 @dataclass(frozen=True)
@@ -454,13 +458,57 @@ def _bucket_bonus(bucket: str, normalized: str) -> int:
     return 0
 
 
-def segment_materials(materials: Iterable[MaterialRecord]) -> Dict[str, List[Segment]]:
+def classify_material(record: MaterialRecord) -> List[Tuple[str, str]]:
+    """Return ``(bucket, paragraph)`` pairs for the usable paragraphs of one material.
+
+    Classification depends only on the material's own text, so results can be cached
+    per file and reused when other materials change.
+    """
+
+    # Blocks are cleaned as they stream in, so the raw text of large files is never resident;
+    # the cleaned paragraphs of the whole material still are.
+    cleaned_paragraphs = [
+        cleaned for cleaned in (_clean_paragraph(block) for block in record.paragraphs() if block.strip()) if cleaned
+    ]
+    merged_paragraphs = _merge_stage_sequences(cleaned_paragraphs)
+    merged_paragraphs = _merge_enumerated_sequences(merged_paragraphs)
+    merged_paragraphs = _merge_short_headings(merged_paragraphs)
+    merged_paragraphs = _merge_unfinished_paragraphs(merged_paragraphs)
+
+    classified: List[Tuple[str, str]] = []
+    for paragraph in merged_paragraphs:
+        if _should_skip_paragraph(paragraph):
+            continue
+
+        normalized = _normalize(paragraph)
+        best_bucket = "misc"
+        best_score = 0
+
+        for bucket, definition in BUCKET_DEFINITIONS.items():
+            score = sum(1 for keyword in definition.keywords if keyword.lower() in normalized)
+            score += _bucket_bonus(bucket, normalized)
+            if score > best_score or (score and score == best_score and definition.priority < BUCKET_DEFINITIONS[best_bucket].priority):
+                best_bucket = bucket
+                best_score = score
+        classified.append((best_bucket, paragraph))
+    return classified
+
+
+def segment_materials(
+    materials: Iterable[MaterialRecord],
+    cache: Optional[MutableMapping[str, List[Tuple[str, str]]]] = None,
+) -> Dict[str, List[Segment]]:
     """Group material paragraphs into topical buckets aligned with the outline.
 
     Parameters
     ----------
     materials:
         Iterable of normalized source artifacts loaded from `materials/raw`.
+    cache:
+        Optional mapping of material fingerprints to `classify_material` results.
+        Unchanged materials are served from it, so only new or edited files are
+        re-segmented; entries for materials no longer present are evicted. A
+        `SharedSegmentCache` also reuses results saved by other runs and reports.
 
     Returns
     -------
@@ -470,38 +518,25 @@ def segment_materials(materials: Iterable[MaterialRecord]) -> Dict[str, List[Seg
 
     segments: Dict[str, List[Segment]] = {bucket: [] for bucket in BUCKET_DEFINITIONS}
     seen_per_bucket: Dict[str, Set[str]] = {bucket: set() for bucket in BUCKET_DEFINITIONS}
-    counter = 1
+    identifiers: Set[str] = set()
+    used_keys: Set[str] = set()
 
     for record in materials:
-        raw_paragraphs = [block for block in record.content.split("\n\n") if block.strip()]
-        cleaned_paragraphs = [_clean_paragraph(paragraph) for paragraph in raw_paragraphs]
-        cleaned_paragraphs = [paragraph for paragraph in cleaned_paragraphs if paragraph]
-        merged_paragraphs = _merge_stage_sequences(cleaned_paragraphs)
-        merged_paragraphs = _merge_enumerated_sequences(merged_paragraphs)
-        merged_paragraphs = _merge_short_headings(merged_paragraphs)
-        merged_paragraphs = _merge_unfinished_paragraphs(merged_paragraphs)
-
-        for paragraph in merged_paragraphs:
-            if _should_skip_paragraph(paragraph):
-                continue
-
+        if cache is None:
+            classified = classify_material(record)
+        else:
+            key = record.fingerprint()
+            used_keys.add(key)
+            if key not in cache:
+                cache[key] = classify_material(record)
+            classified = cache[key]
+
+        for best_bucket, paragraph in classified:
             normalized = _normalize(paragraph)
-            best_bucket = "misc"
-            best_score = 0
-
-            for bucket, definition in BUCKET_DEFINITIONS.items():
-                score = sum(1 for keyword in definition.keywords if keyword.lower() in normalized)
-                score += _bucket_bonus(bucket, normalized)
-                if score > best_score or (score and score == best_score and definition.priority < BUCKET_DEFINITIONS[best_bucket].priority):
-                    best_bucket = bucket
-                    best_score = score
-
-            identifier = f"SEG-{counter:03d}"
-            counter += 1
-            notes = paragraph.splitlines()[0][:120]
-
             if normalized in seen_per_bucket[best_bucket]:
                 continue
+            identifier = _segment_identifier(record.identifier, paragraph, identifiers)
+            notes = paragraph.splitlines()[0][:120]
 
             segments[best_bucket].append(
                 Segment(
@@ -514,15 +549,56 @@ def segment_materials(materials: Iterable[MaterialRecord]) -> Dict[str, List[Seg
                 )
             )
             seen_per_bucket[best_bucket].add(normalized)
+    if cache is not None:
+        for stale in set(cache) - used_keys:
+            del cache[stale]
     # Remove empty buckets to keep downstream processing tidy.
     return {bucket: bucket_segments for bucket, bucket_segments in segments.items() if bucket_segments}
 
 
-def persist_segments(segments: Dict[str, List[Segment]], destination: Path) -> None:
-    """Write organized segments to disk following the canonical directory layout."""
+def _segment_identifier(source: str, paragraph: str, taken: Set[str]) -> str:
+    """Return an identifier derived from the paragraph and its source, unique within ``taken``.
+
+    Content-derived identifiers stay the same when other materials or other
+    paragraphs change, so section dependency hashes only move for edited text.
+    """
+
+    base = f"SEG-{stable_hash([source, paragraph])[:10]}"
+    identifier, suffix = base, 2
+    while identifier in taken:
+        identifier, suffix = f"{base}-{suffix}", suffix + 1
+    taken.add(identifier)
+    return identifier
+
+
+INDEX_COLUMNS: Tuple[str, ...] = ("identifier", "topic", "priority", "notes", "source_path")
+
+
+def write_segment_index(destination: Path, segments: Iterable[Segment]) -> None:
+    """Write a CSV index of segments with standard quoting, so notes keep their commas."""
+
+    with atomic_writer(destination) as stream:
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(INDEX_COLUMNS)
+        for segment in segments:
+            writer.writerow([segment.identifier, segment.topic, segment.priority, segment.notes, segment.source_path])
+
+
+def persist_segments(
+    segments: Dict[str, List[Segment]],
+    destination: Path,
+    store: Optional["SegmentStore"] = None,
+    label: str = "",
+    index_csv: bool = True,
+) -> None:
+    """Write organized segments to disk following the canonical directory layout.
+
+    Segments outside the ``misc`` bucket are also recorded as a new run in ``store``
+    when one is given, and listed in ``_index.csv`` when ``index_csv`` is set (a
+    stale index is removed otherwise).
+    """
 
     destination = ensure_directory(destination)
-    index_rows: List[str] = ["identifier,topic,priority,notes,source_path"]
 
     for bucket_dir in destination.iterdir():
         if not bucket_dir.is_dir():
@@ -533,6 +609,8 @@ def persist_segments(segments: Dict[str, List[Segment]], destination: Path) -> N
             for existing in bucket_dir.glob("*.txt"):
                 existing.unlink()
 
+    # Work on a shallow copy: callers (and concurrently running stages) keep using the mapping.
+    segments = dict(segments)
     misc_segments = segments.pop("misc", [])
 
     for bucket, bucket_segments in segments.items():
@@ -543,17 +621,6 @@ def persist_segments(segments: Dict[str, List[Segment]], destination: Path) -> N
         for segment in bucket_segments:
             file_name = f"{segment.priority:02d}-{segment.identifier}.txt"
             write_text_file(bucket_dir / file_name, segment.text)
-            index_rows.append(
-                ",".join(
-                    [
-                        segment.identifier,
-                        bucket,
-                        str(segment.priority),
-                        segment.notes.replace(",", " "),
-                        segment.source_path,
-                    ]
-                )
-            )
 
     if misc_segments:
         archive_dir = ensure_directory(destination / "staging" / "archived_misc")
@@ -563,5 +630,10 @@ def persist_segments(segments: Dict[str, List[Segment]], destination: Path) -> N
             file_name = f"{segment.priority:02d}-{segment.identifier}.txt"
             write_text_file(archive_dir / file_name, segment.text)
 
+    if store is not None:
+        store.add_run(segments, label=label)
     index_path = destination / "_index.csv"
-    write_text_file(index_path, "\n".join(index_rows))
+    if index_csv:
+        write_segment_index(index_path, (segment for bucket_segments in segments.values() for segment in bucket_segments))
+    else:
+        index_path.unlink(missing_ok=True)
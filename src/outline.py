@@ -2,18 +2,34 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
 
+from .clustering import cluster_texts, load_numpy
 from .organization import Segment
 
+LOGGER = logging.getLogger(__name__)
+
 
 @dataclass
 class OutlineSection:
-    """Description of a single outline section."""
+    """Description of a single outline section.
+
+    ``bucket`` names the segment bucket behind the section (derived from the title
+    when empty) and ``segment_ids`` restricts it to part of that bucket, for
+    sections split out of an oversized bucket.
+    """
 
     title: str
     bullet_points: List[str]
+    bucket: str = ""
+    segment_ids: List[str] = field(default_factory=list)
+
+    @property
+    def bucket_name(self) -> str:
+        return self.bucket or self.title.lower().replace(" ", "_")
 
 
 @dataclass
@@ -30,13 +46,102 @@ def _title_from_bucket(bucket_name: str) -> str:
     return " ".join(word.capitalize() for word in words)
 
 
-def generate_outline(segments: Dict[str, List[Segment]]) -> OutlinePlan:
+def outline_engine() -> str:
+    """Return the bullet selection strategy available in this environment."""
+
+    return "tfidf-kmeans" if load_numpy() is not None else "leading-segments"
+
+
+def _snippet(segment: Segment) -> str:
+    return segment.text.split("。")[0].split(".")[0].strip()
+
+
+def _leading_bullets(segments: Sequence[Segment], limit: int) -> List[str]:
+    """Return bullets for the first segments with a usable opening sentence."""
+
+    bullets: List[str] = []
+    for segment in segments:
+        snippet = _snippet(segment)
+        if not snippet:
+            continue
+        bullets.append(f"{snippet} ({segment.identifier})")
+        if len(bullets) == limit:
+            break
+    return bullets
+
+
+def _clustered_bullets(segments: Sequence[Segment], limit: int) -> List[str]:
+    """Return one bullet per topical cluster, taken from the segment nearest its centroid."""
+
+    if len(segments) <= limit:
+        return _leading_bullets(segments, limit)
+    clusters = cluster_texts([segment.text for segment in segments], limit)
+    if clusters is None:
+        return _leading_bullets(segments, limit)
+    bullets: List[str] = []
+    for cluster in clusters:
+        representative = segments[cluster.representative]
+        snippet = _snippet(representative)
+        if snippet:
+            bullets.append(f"{snippet} ({representative.identifier})")
+    return bullets or _leading_bullets(segments, limit)
+
+
+def _split_bucket(
+    segments: Sequence[Segment],
+    max_section_segments: int,
+    max_subsections: int,
+) -> List[Tuple[str, List[Segment]]]:
+    """Split an oversized bucket into topical groups labelled by their top terms.
+
+    Returns a single unlabelled group when the bucket is small enough, splitting is
+    disabled, or NumPy is unavailable. Groups keep the segments' original order and
+    are ordered by their first segment.
+    """
+
+    if max_section_segments <= 0 or len(segments) <= max_section_segments:
+        return [("", list(segments))]
+    groups = min(max_subsections, math.ceil(len(segments) / max_section_segments))
+    clusters = cluster_texts([segment.text for segment in segments], groups)
+    if not clusters or len(clusters) < 2:
+        return [("", list(segments))]
+    clusters.sort(key=lambda cluster: cluster.members[0])
+    clustered = {member for cluster in clusters for member in cluster.members}
+    # Segments without any usable term join the first group so none are dropped.
+    unclustered = [position for position in range(len(segments)) if position not in clustered]
+    labelled: List[Tuple[str, List[Segment]]] = []
+    for number, cluster in enumerate(clusters, start=1):
+        members = sorted(cluster.members + (unclustered if number == 1 else []))
+        label = " / ".join(cluster.terms) or str(number)
+        labelled.append((label, [segments[position] for position in members]))
+    return labelled
+
+
+def generate_outline(
+    segments: Dict[str, List[Segment]],
+    bullets_per_section: int = 5,
+    max_section_segments: int = 400,
+    max_subsections: int = 6,
+) -> OutlinePlan:
     """Build a skeleton outline from material segments.
 
+    With NumPy installed, each bucket's segments are clustered on sparse TF-IDF
+    vectors (see `clustering.cluster_texts`) and the segment closest to each cluster
+    centroid becomes a bullet, largest cluster first. Buckets with more than
+    ``max_section_segments`` segments are split into up to ``max_subsections``
+    sections, one per cluster. Without NumPy the first segments of each bucket are
+    used as bullets and buckets are not split.
+
     Parameters
     ----------
     segments:
         Mapping produced by `organization.segment_materials`.
+    bullets_per_section:
+        Maximum number of bullets per section.
+    max_section_segments:
+        Bucket size above which the bucket is split; 0 disables splitting.
+    max_subsections:
+        Maximum number of sections a single bucket is split into.
     """
 
     sections: List[OutlineSection] = []
@@ -44,13 +149,24 @@ def generate_outline(segments: Dict[str, List[Segment]]) -> OutlinePlan:
         if bucket_name == "misc":
             continue
         title = _title_from_bucket(bucket_name)
-        bullets: List[str] = []
-        for segment in bucket_segments:
-            snippet = segment.text.split("。")[0].split(".")[0].strip()
-            if not snippet:
-                continue
-            bullets.append(f"{snippet} ({segment.identifier})")
-            if len(bullets) == 5:
-                break
-        sections.append(OutlineSection(title=title, bullet_points=bullets))
+        groups = _split_bucket(bucket_segments, max_section_segments, max_subsections)
+        if len(groups) == 1:
+            bullets = _clustered_bullets(bucket_segments, bullets_per_section)
+            sections.append(OutlineSection(title=title, bullet_points=bullets, bucket=bucket_name))
+            continue
+        LOGGER.info("Split bucket %s (%d segments) into %d sections.", bucket_name, len(bucket_segments), len(groups))
+        used_titles = set()
+        for number, (label, group) in enumerate(groups, start=1):
+            section_title = f"{title}: {label}"
+            if section_title in used_titles:
+                section_title = f"{title} {number}: {label}"
+            used_titles.add(section_title)
+            sections.append(
+                OutlineSection(
+                    title=section_title,
+                    bullet_points=_clustered_bullets(group, bullets_per_section),
+                    bucket=bucket_name,
+                    segment_ids=[segment.identifier for segment in group],
+                )
+            )
     return OutlinePlan(sections=sections)
@@ -2,24 +2,50 @@
 
 from __future__ import annotations
 
+import json
 import logging
 import os
+from contextlib import nullcontext
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional, Set
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Sequence, Set, Tuple
 
+from .archives import find_material_sources
+from .blob_store import BlobStore, SharedSegmentCache
+from .budget import OutputTokenBudget
+from .cassette import Cassette, RecordingLLMClient, ReplayLLMClient
+from .checkpoint import SectionCheckpointStore
 from .drafting import Draft, SectionWriter, build_draft, save_draft
 from .export import DeliveryPackage
-from .ingestion import load_materials
-from .organization import persist_segments, segment_materials
-from .outline import generate_outline
-from .revision import apply_revision_directives
-from .llm import LLMClientConfig, LLMError, OpenAICompatibleClient
-from .writing import DualLLMSectionWriter, SectionWriterConfig
+from .ingestion import STREAM_THRESHOLD, iter_materials
+from .organization import ADMIN_KEYWORDS, BUCKET_DEFINITIONS, Segment, persist_segments, segment_materials
+from .outline import OutlinePlan, generate_outline, outline_engine
+from .planning import DraftPlan, plan_draft
+from .profiling import ProfileSettings, StageProfiler
+from .revision import apply_directives, parse_revision_file, regenerate_sections, rewrite_requests
+from .review import ReviewComment, load_review_comments
+from .segment_store import SegmentStore
+from . import metrics, profiling, tracing
+from .stages import ArtifactStore, Stage, StageGraph, StageListener
+from .utils import stable_hash, write_text_file
+from .llm import (
+    ROUTING_STRATEGIES,
+    LLMClient,
+    LLMClientConfig,
+    LLMEndpoint,
+    LLMError,
+    LoadBalancedClient,
+    OpenAICompatibleClient,
+    SharedLLMResources,
+)
+from .writing import PROMPT_LAYOUTS, DualLLMSectionWriter, SectionWriterConfig
 
 LOGGER = logging.getLogger(__name__)
 GLM_DEFAULT_BASE_URL = "https://open.bigmodel.cn/api/paas/v4"
 _LOADED_ENV_PATHS: Set[Path] = set()
+# Bump when stage implementations change in ways cached artifacts would not reflect.
+_STAGE_CACHE_VERSION = 3
+STAGE_NAMES = ("ingest", "segment", "persist_segments", "outline", "draft", "revise", "save_draft", "export")
 
 
 def _optional_env(name: str) -> Optional[str]:
@@ -51,6 +77,60 @@ def _get_env_int(name: str, default: int) -> int:
         return default
 
 
+def _get_env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None or raw == "":
+        return default
+    normalized = raw.strip().lower()
+    if normalized in {"1", "true", "yes", "on"}:
+        return True
+    if normalized in {"0", "false", "no", "off"}:
+        return False
+    LOGGER.warning("Environment variable %s=%s is not a valid boolean; using %s", name, raw, default)
+    return default
+
+
+def _get_env_choice(name: str, default: str, choices: Sequence[str]) -> str:
+    raw = os.getenv(name)
+    if raw is None or raw == "":
+        return default
+    if raw in choices:
+        return raw
+    LOGGER.warning("Environment variable %s=%s is not one of %s; using %s", name, raw, ", ".join(choices), default)
+    return default
+
+
+def _parse_endpoints(raw: Optional[str]) -> List[LLMEndpoint]:
+    """Parse ``url[|API_KEY_ENV],url[|API_KEY_ENV]`` into endpoint definitions."""
+
+    endpoints: List[LLMEndpoint] = []
+    for entry in (raw or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        base_url, _, key_env = entry.partition("|")
+        endpoints.append(LLMEndpoint(base_url=base_url.strip(), api_key_env=key_env.strip() or None))
+    return endpoints
+
+
+def _directory_signature(directory: Path) -> List[List[object]]:
+    """Return name, size and mtime for every material source (text file or archive) below a directory."""
+
+    if not directory.exists():
+        return []
+    return [
+        [source.name, stat.st_size, stat.st_mtime_ns]
+        for source in find_material_sources(directory)
+        for stat in (source.path.stat(),)
+    ]
+
+
+def _segmentation_rules() -> List[object]:
+    """Return the inputs besides the materials that decide how they are segmented."""
+
+    return [_STAGE_CACHE_VERSION, repr(BUCKET_DEFINITIONS), ADMIN_KEYWORDS]
+
+
 def _load_env_file(base_path: Path) -> None:
     env_path = base_path / ".env"
     if env_path in _LOADED_ENV_PATHS:
@@ -86,6 +166,21 @@ class PipelineConfig:
     final_dir: Path
     revision_directives_path: Path
     llm: "LLMOrchestrationConfig"
+    checkpoint_dir: Optional[Path] = None
+    stage_cache_dir: Optional[Path] = None
+    trace_path: Optional[Path] = None
+    metrics_path: Optional[Path] = None
+    export_formats: Tuple[str, ...] = ("markdown", "html", "text", "json")
+    ingest_workers: int = 4
+    stream_threshold: int = STREAM_THRESHOLD
+    segment_store_path: Optional[Path] = None
+    segment_store_keep_runs: int = 50
+    segment_index_csv: bool = False
+    blob_store_dir: Optional[Path] = None
+    review_comments_path: Optional[Path] = None
+    rewrite_workers: int = 4
+    profile: Optional[ProfileSettings] = None
+    profile_dir: Optional[Path] = None
 
 
 @dataclass
@@ -101,6 +196,18 @@ class LLMOrchestrationConfig:
     log_dir: Path | None = None
     max_context_segments: int = 10
     min_paragraph_score: float = 0.25
+    shingle_size: int = 3
+    near_duplicate_threshold: float = 0.6
+    expand_logs: bool = False
+    log_max_bytes: int = 16 * 1024 * 1024
+    prompt_layout: str = "sectioned"
+    price_table_path: Path | None = None
+    cassette_path: Path | None = None
+    cassette_mode: str | None = None
+    replay_speed: float = 0.0
+    adaptive_output_tokens: bool = True
+    max_output_tokens_ceiling: int = 0
+    output_budget_path: Path | None = None
 
     @classmethod
     def from_env(cls, base_path: Path) -> "LLMOrchestrationConfig":
@@ -123,15 +230,38 @@ class LLMOrchestrationConfig:
             base_url=secondary_base_url,
         )
 
+        routing = _get_env_choice("LLM_ENDPOINT_ROUTING", "least_outstanding", ROUTING_STRATEGIES)
+        for prefix, client_config in (("LLM_PRIMARY", primary), ("LLM_SECONDARY", secondary)):
+            client_config.endpoints = _parse_endpoints(_optional_env(f"{prefix}_ENDPOINTS"))
+            client_config.routing = routing
+            client_config.eject_after_failures = _get_env_int("LLM_ENDPOINT_EJECT_AFTER", 3)
+            client_config.ejection_seconds = _get_env_float("LLM_ENDPOINT_EJECTION_SECONDS", 30.0)
+
         temperature = _get_env_float("LLM_TEMPERATURE", 0.3)
         max_output_tokens = _get_env_int("LLM_MAX_OUTPUT_TOKENS", 900)
         top_p = _get_env_float("LLM_TOP_P", 0.9)
+        max_retries = _get_env_int("LLM_MAX_RETRIES", 2)
+        retry_backoff = _get_env_float("LLM_RETRY_BACKOFF", 1.0)
+        primary.max_retries = secondary.max_retries = max_retries
+        primary.retry_backoff = secondary.retry_backoff = retry_backoff
         language = os.getenv("LLM_PROMPT_LANGUAGE", "zh")
+        prompt_layout = _get_env_choice("LLM_PROMPT_LAYOUT", "sectioned", PROMPT_LAYOUTS)
         max_context_segments = _get_env_int("LLM_MAX_CONTEXT_SEGMENTS", 10)
         min_paragraph_score = _get_env_float("LLM_MIN_PARAGRAPH_SCORE", 0.25)
+        shingle_size = _get_env_int("LLM_SHINGLE_SIZE", 3)
+        near_duplicate_threshold = _get_env_float("LLM_NEAR_DUPLICATE_THRESHOLD", 0.6)
 
         log_dir_env = _optional_env("LLM_LOG_DIR")
         log_dir = Path(log_dir_env) if log_dir_env else base_path / "materials" / "output" / "logs" / "llm"
+        expand_logs = _get_env_bool("LLM_LOG_EXPANDED", False)
+        price_table_env = _optional_env("LLM_PRICE_TABLE")
+        price_table_path = Path(price_table_env) if price_table_env else base_path / "llm-prices.json"
+        log_max_bytes = _get_env_int("LLM_LOG_MAX_BYTES", 16 * 1024 * 1024)
+        cassette_env = _optional_env("LLM_CASSETTE")
+        cassette_mode = _optional_env("LLM_CASSETTE_MODE") or ("replay" if cassette_env else None)
+        replay_speed = _get_env_float("LLM_REPLAY_SPEED", 0.0)
+        adaptive_output_tokens = _get_env_bool("LLM_ADAPTIVE_OUTPUT_TOKENS", True)
+        max_output_tokens_ceiling = _get_env_int("LLM_MAX_OUTPUT_TOKENS_CEILING", 4 * max_output_tokens)
 
         return cls(
             primary=primary,
@@ -143,39 +273,336 @@ class LLMOrchestrationConfig:
             log_dir=log_dir,
             max_context_segments=max_context_segments,
             min_paragraph_score=min_paragraph_score,
+            shingle_size=shingle_size,
+            near_duplicate_threshold=near_duplicate_threshold,
+            expand_logs=expand_logs,
+            log_max_bytes=log_max_bytes,
+            prompt_layout=prompt_layout,
+            price_table_path=price_table_path,
+            cassette_path=Path(cassette_env) if cassette_env else None,
+            cassette_mode=cassette_mode if cassette_env else None,
+            replay_speed=replay_speed,
+            adaptive_output_tokens=adaptive_output_tokens,
+            max_output_tokens_ceiling=max_output_tokens_ceiling,
+            output_budget_path=base_path / "materials" / "output" / "logs" / "output-tokens.json",
         )
 
 
 class WritingPipeline:
     """Orchestrate the end-to-end document creation workflow."""
 
-    def __init__(self, config: PipelineConfig, section_writer: Optional[SectionWriter] = None) -> None:
+    def __init__(
+        self,
+        config: PipelineConfig,
+        section_writer: Optional[SectionWriter] = None,
+        resources: Optional[SharedLLMResources] = None,
+        client_factory: Optional[Callable[[LLMClientConfig], LLMClient]] = None,
+    ) -> None:
         self.config = config
-        self.section_writer = section_writer or self._build_section_writer()
-
-    def run(self, metadata_overrides: Optional[Dict[str, str]] = None) -> DeliveryPackage:
-        """Execute the pipeline and return a delivery package."""
-
-        materials = load_materials(self.config.raw_dir)
-        segments = segment_materials(materials)
-        persist_segments(segments, self.config.organized_dir)
+        self.resources = resources
+        # Builds the LLM clients instead of the configured providers (e.g. fakes for benchmarks).
+        self.client_factory = client_factory
+        self.last_trace: Optional[tracing.Tracer] = None
+        self.last_metrics: Optional[metrics.MetricsRecorder] = None
+        self._section_writer = section_writer
+        self._cassette: Optional[Cassette] = None
+        self._cassette_shared = False
+        self._clients: List[LLMClient] = []
+        # Per-material segmentation results, reused across runs of this pipeline object.
+        self._segment_cache: Dict[str, List[Tuple[str, str]]] = {}
+
+    @property
+    def section_writer(self) -> SectionWriter:
+        """Return the section writer, building the LLM clients on first use.
+
+        Construction is deferred so runs that never draft (such as `plan`) work
+        without API keys and never open the audit log.
+        """
+
+        if self._section_writer is None:
+            self._section_writer = self._build_section_writer()
+        return self._section_writer
+
+    def close(self) -> None:
+        """Release per-pipeline resources such as the writer's audit log sink."""
+
+        close = getattr(self._section_writer, "close", None)
+        if close is not None:
+            close()
+        # A recording cassette from shared resources is closed with them.
+        if self._cassette is not None and not self._cassette_shared:
+            self._cassette.close()
+
+    def plan(self) -> DraftPlan:
+        """Run ingestion, segmentation and outlining only, and size every section prompt.
+
+        No LLM client is constructed. Upstream stages are served from the stage cache
+        when the materials are unchanged, so repeated previews are cheap.
+        """
+
+        graph = self._build_stage_graph(None, incremental=False)
+        result = graph.run(stop="outline")
+        llm = self.config.llm
+        return plan_draft(
+            result.artifacts["outline"],
+            result.artifacts["segments"],
+            self.config.title,
+            self._writer_config(),
+            [llm.primary, llm.secondary],
+            metrics.PriceTable.from_file(llm.price_table_path),
+            materials_count=result.artifacts["materials_count"],
+            output_budget=self._output_budget(),
+        )
 
-        outline = generate_outline(segments)
-        draft = build_draft(outline, segments, self.config.title, section_writer=self.section_writer)
-        draft = apply_revision_directives(draft, self.config.revision_directives_path)
-        save_draft(draft, self.config.draft_path)
+    def run(
+        self,
+        metadata_overrides: Optional[Dict[str, str]] = None,
+        incremental: bool = False,
+        start_stage: Optional[str] = None,
+        stop_stage: Optional[str] = None,
+        listener: Optional[StageListener] = None,
+    ) -> Optional[DeliveryPackage]:
+        """Execute the pipeline and return a delivery package.
+
+        The workflow runs as a stage graph (see `STAGE_NAMES`): independent stages
+        such as persisting segments and drafting overlap, and ingestion, segmentation
+        and outlining are reused from the stage cache when their inputs are unchanged.
+        ``start_stage``/``stop_stage`` restrict the run to part of the graph; inputs of
+        the first selected stages are loaded from the previous run's artifacts. The
+        package is only returned when the ``export`` stage ran. ``listener`` receives
+        ``(stage, event)`` progress notifications.
+
+        Every run is traced: stages, sections, LLM calls and scoring/merge steps are
+        recorded as spans, summarised into ``metadata.json`` and, when
+        ``config.trace_path`` is set, exported as a Chrome trace. With ``config.profile``
+        set, the selected stages and sections are also profiled into ``config.profile_dir``.
+
+        With ``incremental`` enabled, sections checkpointed by an earlier (possibly
+        interrupted) run are reused when their dependency fingerprint is unchanged,
+        and only new or changed sections are redrafted.
+        """
+
+        # When the export stage runs it streams draft.md in the same pass as the deliverables.
+        graph = self._build_stage_graph(metadata_overrides, incremental, draft_in_export=stop_stage in (None, "export"))
+        tracer = tracing.Tracer()
+        recorder = metrics.MetricsRecorder(metrics.PriceTable.from_file(self.config.llm.price_table_path))
+        self.last_trace = tracer
+        self.last_metrics = recorder
+        profiler: ContextManager[object] = nullcontext()
+        if self.config.profile is not None and self.config.profile_dir is not None:
+            profiler = profiling.activate(StageProfiler(self.config.profile, self.config.profile_dir))
+        try:
+            with tracing.activate(tracer), metrics.activate(recorder), profiler:
+                result = graph.run(start=start_stage, stop=stop_stage, listener=listener)
+        finally:
+            # Audit records are written in the background; make sure a finished or
+            # crashed run leaves a complete log behind.
+            flush_logs = getattr(self._section_writer, "flush_logs", None)
+            if flush_logs is not None:
+                flush_logs()
+            output_budget = getattr(self._section_writer, "output_budget", None)
+            if output_budget is not None:
+                output_budget.save()
+            if self.config.trace_path is not None:
+                tracer.write_chrome_trace(self.config.trace_path)
+            if self.config.metrics_path is not None and recorder.records:
+                recorder.write(self.config.metrics_path)
+        if result.cached:
+            LOGGER.info("Reused cached artifacts for stages: %s", ", ".join(result.cached))
+        return result.artifacts.get("package")
+
+    def _build_stage_graph(
+        self,
+        metadata_overrides: Optional[Dict[str, str]],
+        incremental: bool,
+        draft_in_export: bool = False,
+    ) -> StageGraph:
+        config = self.config
+
+        def ingest(_: Dict[str, Any]) -> Dict[str, Any]:
+            # The stage artifact is cached with pickle, so the records are collected here.
+            materials = list(
+                iter_materials(config.raw_dir, max_workers=config.ingest_workers, stream_threshold=config.stream_threshold)
+            )
+            tracing.annotate(items=len(materials))
+            return {"materials": materials, "materials_count": len(materials)}
+
+        def segment(inputs: Dict[str, Any]) -> Dict[str, Any]:
+            if config.blob_store_dir is None:
+                segments = segment_materials(inputs["materials"], cache=self._segment_cache)
+            else:
+                with BlobStore(config.blob_store_dir) as blobs:
+                    cache = SharedSegmentCache(
+                        blobs, self._segment_cache, namespace=stable_hash(_segmentation_rules())[:16]
+                    )
+                    segments = segment_materials(inputs["materials"], cache=cache)
+                    cache.flush()
+                    # The cache now holds exactly this report's materials; keep their manifests alive.
+                    blobs.set_roots(str(config.raw_dir.resolve()), cache.store_keys())
+                tracing.annotate(reused_materials=cache.reused)
+            tracing.annotate(items=sum(len(bucket) for bucket in segments.values()))
+            return {"segments": segments}
+
+        def persist(inputs: Dict[str, Any]) -> Dict[str, Any]:
+            if config.segment_store_path is None:
+                persist_segments(inputs["segments"], config.organized_dir, index_csv=config.segment_index_csv)
+                return {}
+            with SegmentStore(config.segment_store_path, keep_runs=config.segment_store_keep_runs) as store:
+                persist_segments(
+                    inputs["segments"],
+                    config.organized_dir,
+                    store=store,
+                    label=config.title,
+                    index_csv=config.segment_index_csv,
+                )
+            return {}
+
+        def outline(inputs: Dict[str, Any]) -> Dict[str, Any]:
+            plan = generate_outline(inputs["segments"])
+            tracing.annotate(items=len(plan.sections))
+            return {"outline": plan}
+
+        def draft(inputs: Dict[str, Any]) -> Dict[str, Any]:
+            return self._draft_stage(inputs["outline"], inputs["segments"], incremental)
+
+        def revise(inputs: Dict[str, Any]) -> Dict[str, Any]:
+            return {"revised_draft": self._revise_stage(inputs["draft"], inputs["outline"], inputs["segments"])}
+
+        def save(inputs: Dict[str, Any]) -> Dict[str, Any]:
+            if not draft_in_export:
+                save_draft(inputs["revised_draft"], config.draft_path)
+            return {}
+
+        def export(inputs: Dict[str, Any]) -> Dict[str, Any]:
+            revised = inputs["revised_draft"]
+            metadata: Dict[str, str] = {
+                "title": config.title,
+                "materials_count": str(inputs["materials_count"]),
+                "sections": str(len(revised.sections)),
+            }
+            metadata.update(inputs["draft_metadata"])
+            if metadata_overrides:
+                metadata.update(metadata_overrides)
+            package = DeliveryPackage(
+                draft=revised,
+                metadata=metadata,
+                formats=config.export_formats,
+                mirrors=(config.draft_path,) if draft_in_export else (),
+            )
+            package.write(config.final_dir)
+            return {"package": package}
+
+        stages = [
+            Stage(
+                "ingest",
+                (),
+                ("materials", "materials_count"),
+                ingest,
+                cacheable=True,
+                cache_key=lambda: _directory_signature(config.raw_dir),
+            ),
+            Stage(
+                "segment",
+                ("materials",),
+                ("segments",),
+                segment,
+                cacheable=True,
+                cache_key=_segmentation_rules,
+            ),
+            Stage("persist_segments", ("segments",), (), persist),
+            Stage(
+                "outline",
+                ("segments",),
+                ("outline",),
+                outline,
+                cacheable=True,
+                cache_key=lambda: [_STAGE_CACHE_VERSION, outline_engine()],
+            ),
+            Stage("draft", ("outline", "segments"), ("draft", "draft_metadata"), draft),
+            Stage("revise", ("draft", "outline", "segments"), ("revised_draft",), revise),
+            Stage("save_draft", ("revised_draft",), (), save),
+            Stage("export", ("revised_draft", "draft_metadata", "materials_count"), ("package",), export),
+        ]
+        store = ArtifactStore(config.stage_cache_dir) if config.stage_cache_dir else None
+        return StageGraph(stages, store=store)
+
+    def _revise_stage(self, draft: Draft, outline: OutlinePlan, segments: Dict[str, List[Segment]]) -> Draft:
+        """Apply verbatim directives, then regenerate only the sections with rewrite requests."""
+
+        config = self.config
+        directives = None
+        if config.revision_directives_path.exists():
+            directives = parse_revision_file(config.revision_directives_path)
+            draft = apply_directives(draft, directives)
+        else:
+            LOGGER.info("No revision directives found at %s; skipping revision step.", config.revision_directives_path)
+        comments: List[ReviewComment] = []
+        if config.review_comments_path is not None and config.review_comments_path.exists():
+            comments = load_review_comments(config.review_comments_path)
+        requests = rewrite_requests(directives, comments)
+        if not requests:
+            return draft
+        tracing.annotate(items=len(requests))
+        rewrite_dir = config.checkpoint_dir.parent / "rewrites" if config.checkpoint_dir else None
+        return regenerate_sections(
+            draft,
+            requests,
+            outline,
+            segments,
+            self.section_writer,
+            checkpoints=SectionCheckpointStore(rewrite_dir) if rewrite_dir else None,
+            max_workers=config.rewrite_workers,
+        )
 
-        metadata: Dict[str, str] = {
-            "title": self.config.title,
-            "materials_count": str(len(materials)),
-            "sections": str(len(draft.sections)),
-        }
-        if metadata_overrides:
-            metadata.update(metadata_overrides)
+    def _draft_stage(self, outline: OutlinePlan, segments: Dict[str, List[Segment]], incremental: bool) -> Dict[str, Any]:
+        checkpoints = SectionCheckpointStore(self.config.checkpoint_dir) if self.config.checkpoint_dir else None
+        tracing.annotate(items=len(outline.sections))
+        draft = build_draft(
+            outline,
+            segments,
+            self.config.title,
+            section_writer=self.section_writer,
+            checkpoints=checkpoints,
+            reuse=incremental,
+        )
 
-        package = DeliveryPackage(draft=draft, metadata=metadata)
-        package.write(self.config.final_dir)
-        return package
+        metadata: Dict[str, str] = {}
+        if checkpoints is not None:
+            build_report = checkpoints.report()
+            for decision in build_report["rebuilt"] if incremental else ():
+                LOGGER.info("Rebuilt section '%s': %s", decision["title"], ", ".join(decision["reasons"]))
+            write_text_file(
+                checkpoints.directory.parent / "draft-build-report.json",
+                json.dumps(build_report, ensure_ascii=False, indent=2),
+            )
+            metadata["sections_rebuilt"] = str(len(build_report["rebuilt"]))
+            metadata["sections_reused"] = str(len(build_report["reused"]))
+        prompt_cache_report = getattr(self.section_writer, "prompt_cache_report", None)
+        if prompt_cache_report is not None:
+            report = prompt_cache_report()
+            for client_id, stats in report["clients"].items():
+                LOGGER.info(
+                    "Prompt cache (%s layout) for %s: %s/%s prompt tokens cached (%.1f%%).",
+                    report["layout"],
+                    client_id,
+                    stats["cached_tokens"],
+                    stats["prompt_tokens"],
+                    stats["hit_rate"] * 100,
+                )
+            metadata["prompt_layout"] = str(report["layout"])
+            metadata["prompt_cache_hit_rate"] = str(report["total"]["hit_rate"])
+        for balancer in self._load_balancers():
+            for endpoint, stats in balancer.stats().items():
+                LOGGER.info(
+                    "Endpoint %s of %s: %s requests, %s failures, %.2fs smoothed latency, %s.",
+                    endpoint,
+                    balancer.identifier,
+                    stats["requests"],
+                    stats["failures"],
+                    stats["latency_ewma"],
+                    "healthy" if stats["healthy"] else "ejected",
+                )
+        return {"draft": draft, "draft_metadata": metadata}
 
     def _build_section_writer(self) -> SectionWriter:
         try:
@@ -184,7 +611,22 @@ class WritingPipeline:
         except LLMError as exc:
             raise RuntimeError(f"Failed to initialise LLM clients: {exc}") from exc
 
-        writer_config = SectionWriterConfig(
+        return DualLLMSectionWriter(
+            primary_client, secondary_client, self._writer_config(), output_budget=self._output_budget()
+        )
+
+    def _output_budget(self) -> Optional[OutputTokenBudget]:
+        llm = self.config.llm
+        if not llm.adaptive_output_tokens:
+            return None
+        return OutputTokenBudget(
+            llm.output_budget_path,
+            default=llm.max_output_tokens,
+            ceiling=llm.max_output_tokens_ceiling or 4 * llm.max_output_tokens,
+        )
+
+    def _writer_config(self) -> SectionWriterConfig:
+        return SectionWriterConfig(
             temperature=self.config.llm.temperature,
             max_output_tokens=self.config.llm.max_output_tokens,
             top_p=self.config.llm.top_p,
@@ -192,14 +634,57 @@ class WritingPipeline:
             log_dir=self.config.llm.log_dir,
             max_context_segments=self.config.llm.max_context_segments,
             min_paragraph_score=self.config.llm.min_paragraph_score,
+            shingle_size=self.config.llm.shingle_size,
+            near_duplicate_threshold=self.config.llm.near_duplicate_threshold,
+            expand_logs=self.config.llm.expand_logs,
+            log_max_bytes=self.config.llm.log_max_bytes,
+            prompt_layout=self.config.llm.prompt_layout,
         )
-        return DualLLMSectionWriter(primary_client, secondary_client, writer_config)
 
-    def _create_client(self, config: LLMClientConfig) -> OpenAICompatibleClient:
+    def _create_client(self, config: LLMClientConfig) -> LLMClient:
+        cassette = self._open_cassette()
+        if cassette is not None and cassette.mode == "replay":
+            # Replays never touch the network, so no API key or provider support is needed.
+            return ReplayLLMClient(config.identifier, config.model, config.provider, cassette, self.config.llm.replay_speed)
+        if self.client_factory is not None:
+            client = self.client_factory(config)
+            return RecordingLLMClient(client, cassette) if cassette is not None else client
         if config.provider in {"openai", "openai-compatible"}:
-            return OpenAICompatibleClient(config)
+            if self.resources is not None:
+                client = self.resources.client_for(config)
+            elif config.endpoints:
+                client = LoadBalancedClient.from_config(config, OpenAICompatibleClient)
+            else:
+                client = OpenAICompatibleClient(config)
+            self._clients.append(client)
+            return RecordingLLMClient(client, cassette) if cassette is not None else client
         raise LLMError(f"Unsupported LLM provider '{config.provider}' for client '{config.identifier}'.")
 
+    def _load_balancers(self) -> List[LoadBalancedClient]:
+        balancers: List[LoadBalancedClient] = []
+        for client in self._clients:
+            # Unwrap shared-resource wrappers to reach the balancer, if any.
+            while not isinstance(client, LoadBalancedClient) and hasattr(client, "inner"):
+                client = client.inner  # type: ignore[attr-defined]
+            if isinstance(client, LoadBalancedClient):
+                balancers.append(client)
+        return balancers
+
+    def _open_cassette(self) -> Optional[Cassette]:
+        llm = self.config.llm
+        if llm.cassette_path is None or llm.cassette_mode is None:
+            return None
+        if self._cassette is None:
+            try:
+                if llm.cassette_mode == "record" and self.resources is not None:
+                    self._cassette = self.resources.recording_cassette(llm.cassette_path)
+                    self._cassette_shared = True
+                else:
+                    self._cassette = Cassette(llm.cassette_path, llm.cassette_mode)
+            except (OSError, ValueError) as exc:
+                raise LLMError(f"Unable to open LLM cassette {llm.cassette_path}: {exc}") from exc
+        return self._cassette
+
 
 def default_config(base_path: Path, title: str) -> PipelineConfig:
     """Construct a PipelineConfig rooted at the given base path."""
@@ -211,12 +696,51 @@ def default_config(base_path: Path, title: str) -> PipelineConfig:
         draft_path=base_path / "materials" / "output" / "drafts" / "draft.md",
         final_dir=base_path / "materials" / "output" / "final",
         revision_directives_path=base_path / "materials" / "output" / "logs" / "revision-directives.md",
+        review_comments_path=base_path / "materials" / "output" / "logs" / "review-comments.json",
         llm=LLMOrchestrationConfig.from_env(base_path),
+        checkpoint_dir=base_path / "materials" / "output" / "checkpoints" / "sections",
+        stage_cache_dir=base_path / "materials" / "output" / "cache" / "stages",
+        metrics_path=base_path / "materials" / "output" / "logs" / "metrics.json",
+        profile_dir=base_path / "materials" / "output" / "logs" / "profile",
+        ingest_workers=max(1, _get_env_int("INGEST_WORKERS", 4)),
+        stream_threshold=_get_env_int("INGEST_STREAM_THRESHOLD_MB", STREAM_THRESHOLD // (1024 * 1024)) * 1024 * 1024,
+        segment_store_path=base_path / "materials" / "organized" / "segments.sqlite3",
+        segment_store_keep_runs=_get_env_int("SEGMENT_STORE_KEEP_RUNS", 50),
+        segment_index_csv=_get_env_bool("SEGMENT_INDEX_CSV", False),
+        blob_store_dir=Path(_optional_env("SEGMENT_BLOB_STORE") or base_path / "materials" / "blobs"),
     )
 
 
-def run_default(base_path: Path, title: str, metadata_overrides: Optional[Dict[str, str]] = None) -> DeliveryPackage:
+def run_default(
+    base_path: Path,
+    title: str,
+    metadata_overrides: Optional[Dict[str, str]] = None,
+    incremental: bool = False,
+    start_stage: Optional[str] = None,
+    stop_stage: Optional[str] = None,
+    trace_path: Optional[Path] = None,
+    cassette_path: Optional[Path] = None,
+    cassette_mode: Optional[str] = None,
+    profile: Optional[ProfileSettings] = None,
+) -> Optional[DeliveryPackage]:
     """Convenience helper to execute the pipeline given a root path and title."""
 
-    pipeline = WritingPipeline(default_config(base_path, title))
-    return pipeline.run(metadata_overrides=metadata_overrides)
+    config = default_config(base_path, title)
+    config.trace_path = trace_path
+    config.profile = profile
+    if cassette_path is not None:
+        config.llm.cassette_path = cassette_path
+        config.llm.cassette_mode = cassette_mode or "replay"
+    pipeline = WritingPipeline(config)
+    return pipeline.run(
+        metadata_overrides=metadata_overrides,
+        incremental=incremental,
+        start_stage=start_stage,
+        stop_stage=stop_stage,
+    )
+
+
+def plan_default(base_path: Path, title: str) -> DraftPlan:
+    """Preview the outline and per-section prompt sizes and cost without calling an LLM."""
+
+    return WritingPipeline(default_config(base_path, title)).plan()
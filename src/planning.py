@@ -0,0 +1,164 @@
+"""Offline draft planning: prompt sizes, token estimates and projected cost per section."""
+
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from .budget import OutputTokenBudget
+from .drafting import section_segments
+from .llm import LLMClientConfig
+from .metrics import LLMCallRecord, PriceTable
+from .organization import Segment
+from .outline import OutlinePlan
+from .writing import SectionWriterConfig, build_section_prompt, build_shared_context
+
+_CJK_PATTERN = re.compile(r"[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate a tokenizer: one token per CJK character, four characters otherwise."""
+
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+@dataclass
+class SectionEstimate:
+    """Projected size and cost of drafting one section."""
+
+    title: str
+    segments: int
+    prompt_chars: int
+    prompt_tokens: int
+    cached_prefix_tokens: int
+    max_output_tokens: int
+    projected_cost_usd: Optional[float] = None
+
+
+@dataclass
+class DraftPlan:
+    """Outline-level preview of a drafting run, produced without contacting any LLM."""
+
+    title: str
+    prompt_layout: str
+    materials_count: int
+    models: List[str]
+    sections: List[SectionEstimate] = field(default_factory=list)
+
+    def totals(self) -> Dict[str, object]:
+        costs = [section.projected_cost_usd for section in self.sections if section.projected_cost_usd is not None]
+        return {
+            "sections": len(self.sections),
+            "llm_calls": len(self.sections) * len(self.models),
+            "prompt_tokens": sum(section.prompt_tokens for section in self.sections) * len(self.models),
+            "max_output_tokens": sum(section.max_output_tokens for section in self.sections) * len(self.models),
+            "projected_cost_usd": round(sum(costs), 6) if costs else None,
+        }
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "title": self.title,
+            "prompt_layout": self.prompt_layout,
+            "materials_count": self.materials_count,
+            "models": self.models,
+            "sections": [asdict(section) for section in self.sections],
+            "total": self.totals(),
+        }
+
+    def format_table(self) -> str:
+        """Render the plan as a fixed-width text table for terminal output."""
+
+        width = max([len(section.title) for section in self.sections] + [len("Section")])
+        lines = [
+            f"{self.title}: {self.materials_count} materials, {len(self.sections)} sections, "
+            f"layout '{self.prompt_layout}', models: {', '.join(self.models)}",
+            "",
+            f"{'Section':<{width}}  {'Segs':>5}  {'Chars':>8}  {'Prompt tok':>10}  {'Cached':>7}  {'Max out':>7}  {'Cost USD':>9}",
+        ]
+        for section in self.sections:
+            lines.append(
+                f"{section.title:<{width}}  {section.segments:>5}  {section.prompt_chars:>8}  "
+                f"{section.prompt_tokens:>10}  {section.cached_prefix_tokens:>7}  {section.max_output_tokens:>7}  "
+                f"{_format_cost(section.projected_cost_usd):>9}"
+            )
+        totals = self.totals()
+        lines.append("")
+        lines.append(
+            f"Total: {totals['llm_calls']} LLM calls, ~{totals['prompt_tokens']} prompt tokens, "
+            f"<= {totals['max_output_tokens']} output tokens, projected cost {_format_cost(totals['projected_cost_usd'])}"
+            " (output priced at the max_output_tokens ceiling)."
+        )
+        return "\n".join(lines)
+
+
+def plan_draft(
+    outline: OutlinePlan,
+    segment_lookup: Dict[str, List[Segment]],
+    title: str,
+    writer_config: SectionWriterConfig,
+    clients: Sequence[LLMClientConfig],
+    prices: Optional[PriceTable] = None,
+    materials_count: int = 0,
+    output_budget: Optional[OutputTokenBudget] = None,
+) -> DraftPlan:
+    """Estimate prompt sizes, token counts and cost for every outline section.
+
+    Prompts are rendered exactly as the section writer would render them. Token
+    counts are heuristic, and output is priced at ``max_output_tokens`` (each
+    section's learned limit when ``output_budget`` is given) so the projected cost
+    is an upper bound. In the ``prefix_cache`` layout the shared
+    system prompt and outline are counted as cached after the first section.
+    """
+
+    prices = prices or PriceTable()
+    shared_context = build_shared_context(outline, title)
+    plan = DraftPlan(
+        title=title,
+        prompt_layout=writer_config.prompt_layout,
+        materials_count=materials_count,
+        models=[client.model for client in clients],
+    )
+    for index, section in enumerate(outline.sections):
+        segments = section_segments(section, segment_lookup)
+        prompt = build_section_prompt(writer_config, section, segments, shared_context)
+        prompt_text = prompt.system_prompt + prompt.user_prompt
+        prompt_tokens = estimate_tokens(prompt_text)
+        max_output_tokens = output_budget.limit(section) if output_budget else writer_config.max_output_tokens
+        cached = 0
+        if writer_config.prompt_layout == "prefix_cache" and index > 0:
+            cached = min(estimate_tokens(prompt.system_prompt + shared_context), prompt_tokens)
+        costs = [
+            prices.cost(
+                LLMCallRecord(
+                    client_id=client.identifier,
+                    model=client.model,
+                    provider=client.provider,
+                    section=section.title,
+                    latency=0.0,
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=max_output_tokens,
+                    cached_tokens=cached,
+                )
+            )
+            for client in clients
+        ]
+        priced = [cost for cost in costs if cost is not None]
+        plan.sections.append(
+            SectionEstimate(
+                title=section.title,
+                segments=len(segments),
+                prompt_chars=len(prompt_text),
+                prompt_tokens=prompt_tokens,
+                cached_prefix_tokens=cached,
+                max_output_tokens=max_output_tokens,
+                projected_cost_usd=round(sum(priced), 6) if priced else None,
+            )
+        )
+    return plan
+
+
+def _format_cost(cost: object) -> str:
+    return "n/a" if cost is None else f"${cost:.4f}"
@@ -0,0 +1,173 @@
+"""Opt-in cProfile and tracemalloc profiling of pipeline stages and sections."""
+
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from .utils import ensure_directory, slugify, stable_hash, write_text_file
+
+LOGGER = logging.getLogger(__name__)
+PROFILE_MODES = ("cprofile", "tracemalloc")
+# Stages whose work happens per section; they are profiled section by section.
+SECTION_STAGES = frozenset({"draft"})
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+@dataclass
+class ProfileSettings:
+    """Which stages to profile and how.
+
+    ``modes`` holds ``cprofile`` and/or ``tracemalloc``. ``sample_rate`` is the
+    fraction of sections (drafts and rewrites) that are profiled; sections are
+    picked by a hash of their title, so reruns profile the same ones. ``top`` is
+    the number of allocation sites listed per tracemalloc report.
+    """
+
+    stages: Tuple[str, ...]
+    modes: Tuple[str, ...] = ("cprofile",)
+    sample_rate: float = 1.0
+    top: int = 25
+
+    def __post_init__(self) -> None:
+        unknown = set(self.modes) - set(PROFILE_MODES)
+        if unknown:
+            raise ValueError(f"Unknown profiling modes {sorted(unknown)}; expected {PROFILE_MODES}.")
+
+
+class StageProfiler:
+    """Write a `.prof` file and/or a top-N allocation report per profiled stage or section.
+
+    cProfile only observes the thread that enters `profile`, so work a stage
+    hands to worker threads (such as parallel LLM candidates) shows up as waiting.
+    tracemalloc is process-wide: reports of units that overlap in time include
+    each other's allocations.
+    """
+
+    def __init__(self, settings: ProfileSettings, directory: Path) -> None:
+        self.settings = settings
+        self.directory = directory
+        self.written: List[Path] = []
+        self._lock = threading.Lock()
+        self._started_tracing = False
+
+    def start(self) -> None:
+        """Clear reports of earlier runs and start tracemalloc if it is needed."""
+
+        ensure_directory(self.directory)
+        for pattern in ("*.prof", "*.alloc.txt"):
+            for stale in self.directory.glob(pattern):
+                stale.unlink()
+        if "tracemalloc" in self.settings.modes and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        if self.written:
+            LOGGER.info("Wrote %d profiling reports to %s", len(self.written), self.directory)
+
+    def wants(self, stage: str, unit: Optional[str] = None) -> bool:
+        """Whether ``stage`` (or the section ``unit`` of it) should be profiled."""
+
+        if stage not in self.settings.stages:
+            return False
+        if unit is None:
+            return stage not in SECTION_STAGES
+        rate = self.settings.sample_rate
+        return rate >= 1 or int(stable_hash([stage, unit])[:8], 16) < rate * 0x100000000
+
+    @contextmanager
+    def profile(self, stage: str, unit: Optional[str] = None) -> Iterator[None]:
+        if not self.wants(stage, unit):
+            yield
+            return
+        name = stage if unit is None else f"{stage}-{slugify(unit)}"
+        profiler: Optional[cProfile.Profile] = None
+        if "cprofile" in self.settings.modes:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as exc:
+                # Python 3.12+ allows a single active cProfile per process.
+                LOGGER.warning("Not running cProfile for %s: %s", name, exc)
+                profiler = None
+        before = tracemalloc.take_snapshot() if "tracemalloc" in self.settings.modes else None
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                destination = self.directory / f"{name}.prof"
+                profiler.dump_stats(str(destination))
+                self._record(destination)
+            if before is not None:
+                self._write_allocations(name, before, tracemalloc.take_snapshot())
+
+    def _write_allocations(self, name: str, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> None:
+        statistics = after.filter_traces(_SNAPSHOT_FILTERS).compare_to(before.filter_traces(_SNAPSHOT_FILTERS), "lineno")
+        growth = sorted((stat for stat in statistics if stat.size_diff > 0), key=lambda stat: -stat.size_diff)
+        total = sum(stat.size_diff for stat in statistics)
+        blocks = sum(stat.count_diff for stat in statistics)
+        lines = [
+            f"Allocations retained by {name}: {total / 1024:+.1f} KiB in {blocks:+d} blocks",
+            f"Top {self.settings.top} allocation sites by growth:",
+        ]
+        for stat in growth[: self.settings.top]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"  {frame.filename}:{frame.lineno}: {stat.size_diff / 1024:+.1f} KiB "
+                f"({stat.count_diff:+d} blocks, {stat.size / 1024:.1f} KiB live)"
+            )
+        destination = self.directory / f"{name}.alloc.txt"
+        write_text_file(destination, "\n".join(lines) + "\n")
+        self._record(destination)
+
+    def _record(self, path: Path) -> None:
+        with self._lock:
+            self.written.append(path)
+
+
+_ACTIVE_PROFILER: contextvars.ContextVar[Optional[StageProfiler]] = contextvars.ContextVar(
+    "active_profiler", default=None
+)
+
+
+@contextmanager
+def activate(profiler: StageProfiler) -> Iterator[StageProfiler]:
+    """Make ``profiler`` handle `profile` calls in this context for the duration of the block."""
+
+    token = _ACTIVE_PROFILER.set(profiler)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _ACTIVE_PROFILER.reset(token)
+
+
+@contextmanager
+def profile(stage: str, unit: Optional[str] = None) -> Iterator[None]:
+    """Profile the enclosed block as ``stage`` (or one of its sections); a no-op when profiling is off."""
+
+    profiler = _ACTIVE_PROFILER.get()
+    if profiler is None:
+        yield
+        return
+    with profiler.profile(stage, unit):
+        yield
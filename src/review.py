@@ -2,28 +2,35 @@
 
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 
 from .utils import write_text_file
 
 
 @dataclass
 class ReviewComment:
-    """Feedback item captured during a review cycle."""
+    """Feedback item captured during a review cycle.
+
+    Comments that name a draft ``section`` are treated as rewrite instructions for
+    that section (see `revision.rewrite_requests`).
+    """
 
     author: str
     message: str
     severity: str
     timestamp: datetime = field(default_factory=datetime.utcnow)
+    section: Optional[str] = None
 
     def format_markdown(self) -> str:
         """Render the comment as a markdown bullet."""
 
         ts = self.timestamp.isoformat(timespec="seconds")
-        return f"- **{self.severity}** | {self.author} | {ts}: {self.message}"
+        target = f" | {self.section}" if self.section else ""
+        return f"- **{self.severity}** | {self.author} | {ts}{target}: {self.message}"
 
 
 def export_review_notes(comments: Iterable[ReviewComment], destination: Path) -> None:
@@ -32,3 +39,24 @@ def export_review_notes(comments: Iterable[ReviewComment], destination: Path) ->
     lines: List[str] = ["# Review Notes", ""]
     lines.extend(comment.format_markdown() for comment in comments)
     write_text_file(destination, "\n".join(lines))
+
+
+def load_review_comments(path: Path) -> List[ReviewComment]:
+    """Read comments from a JSON list of objects with the `ReviewComment` fields.
+
+    ``timestamp`` is optional and parsed from ISO 8601 when present.
+    """
+
+    comments: List[ReviewComment] = []
+    for entry in json.loads(path.read_text(encoding="utf-8")):
+        timestamp = entry.get("timestamp")
+        comments.append(
+            ReviewComment(
+                author=str(entry.get("author", "")),
+                message=str(entry["message"]),
+                severity=str(entry.get("severity", "info")),
+                timestamp=datetime.fromisoformat(timestamp) if timestamp else datetime.utcnow(),
+                section=entry.get("section") or None,
+            )
+        )
+    return comments
@@ -2,23 +2,37 @@
 
 from __future__ import annotations
 
+import contextvars
 import logging
 from collections import OrderedDict
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from .drafting import Draft
+from . import profiling, tracing
+from .checkpoint import SectionCheckpointStore
+from .drafting import Draft, SectionWriter, section_dependencies, section_segments
+from .organization import Segment
+from .outline import OutlinePlan, OutlineSection
+from .review import ReviewComment
+from .utils import stable_hash
 
 LOGGER = logging.getLogger(__name__)
+REWRITE_MARKER = "[rewrite]"
 
 
 @dataclass
 class RevisionDirectives:
-    """Normalized representation of revision instructions."""
+    """Normalized representation of revision instructions.
+
+    ``sections`` maps section titles to verbatim replacements and ``rewrites`` maps
+    section titles to instructions for re-prompting the section writer.
+    """
 
     title: str | None
     sections: Dict[str, str]
+    rewrites: Dict[str, List[str]] = field(default_factory=dict)
 
 
 def parse_revision_file(path: Path) -> RevisionDirectives:
@@ -28,22 +42,30 @@ def parse_revision_file(path: Path) -> RevisionDirectives:
 
     - Optional first-level heading (`# New Title`) to override the draft title.
     - One or more second-level headings (`## Section Name`) followed by replacement text.
+    - Second-level headings ending in ``[rewrite]`` (`## Section Name [rewrite]`)
+      followed by instructions for regenerating that section.
 
-    All content under a section heading replaces the corresponding draft section
-    verbatim. Sections not present in the directives remain untouched.
+    All content under a plain section heading replaces the corresponding draft
+    section verbatim. Sections not present in the directives remain untouched.
     """
 
     text = path.read_text(encoding="utf-8")
     title: str | None = None
     sections: "OrderedDict[str, str]" = OrderedDict()
+    rewrites: Dict[str, List[str]] = {}
 
     current_section: str | None = None
+    rewrite = False
     buffer: list[str] = []
 
     def flush() -> None:
         if current_section is None:
             return
-        sections[current_section] = "\n".join(buffer).strip()
+        content = "\n".join(buffer).strip()
+        if not rewrite:
+            sections[current_section] = content
+        elif content:
+            rewrites.setdefault(current_section, []).append(content)
 
     for raw_line in text.splitlines():
         line = raw_line.rstrip()
@@ -58,23 +80,34 @@ def parse_revision_file(path: Path) -> RevisionDirectives:
         if line.startswith("## "):
             flush()
             current_section = line[3:].strip()
+            rewrite = current_section.lower().endswith(REWRITE_MARKER)
+            if rewrite:
+                current_section = current_section[: -len(REWRITE_MARKER)].strip()
             buffer = []
             continue
         buffer.append(line)
 
     flush()
     cleaned_sections = {key: value for key, value in sections.items() if value}
-    return RevisionDirectives(title=title, sections=cleaned_sections)
+    return RevisionDirectives(title=title, sections=cleaned_sections, rewrites=rewrites)
 
 
 def apply_revision_directives(draft: Draft, directives_path: Path) -> Draft:
-    """Return a new draft with revisions applied when directives are present."""
+    """Return a new draft with revisions applied when directives are present.
+
+    Only verbatim replacements are applied here; rewrite directives need a section
+    writer and are handled by `regenerate_sections`.
+    """
 
     if not directives_path.exists():
         LOGGER.info("No revision directives found at %s; skipping revision step.", directives_path)
         return draft
+    return apply_directives(draft, parse_revision_file(directives_path))
+
+
+def apply_directives(draft: Draft, directives: RevisionDirectives) -> Draft:
+    """Return a new draft with the title override and verbatim replacements applied."""
 
-    directives = parse_revision_file(directives_path)
     updated_sections: Dict[str, str] = dict(draft.sections)
 
     for section, replacement in directives.sections.items():
@@ -93,3 +126,95 @@ def apply_revision_directives(draft: Draft, directives_path: Path) -> Draft:
 
     new_title = directives.title or draft.title
     return Draft(title=new_title, sections=updated_sections)
+
+
+def rewrite_requests(
+    directives: Optional[RevisionDirectives],
+    comments: Iterable[ReviewComment] = (),
+) -> Dict[str, List[str]]:
+    """Collect rewrite instructions per section from directives and section-targeted comments.
+
+    Several instructions for one section are combined, so each section is
+    regenerated at most once.
+    """
+
+    requests: Dict[str, List[str]] = {}
+    if directives is not None:
+        for section, instructions in directives.rewrites.items():
+            requests.setdefault(section, []).extend(instructions)
+    for comment in comments:
+        if comment.section:
+            requests.setdefault(comment.section, []).append(comment.message.strip())
+    return {section: instructions for section, instructions in requests.items() if any(instructions)}
+
+
+def regenerate_sections(
+    draft: Draft,
+    requests: Dict[str, List[str]],
+    outline: OutlinePlan,
+    segment_lookup: Dict[str, List[Segment]],
+    section_writer: SectionWriter,
+    checkpoints: Optional[SectionCheckpointStore] = None,
+    max_workers: int = 4,
+) -> Draft:
+    """Re-prompt only the requested sections with their instructions, in parallel.
+
+    Every other section is reused from ``draft`` unchanged. The writer must provide
+    ``rewrite_section(section, segments, current_text, instructions)``. With a
+    checkpoint store, a rewrite whose current text, instructions and writer inputs
+    are unchanged is served from the store instead of calling the LLMs again.
+    """
+
+    rewrite = getattr(section_writer, "rewrite_section", None)
+    if rewrite is None:
+        LOGGER.warning(
+            "Section writer %s cannot rewrite sections; ignoring %d rewrite requests.",
+            type(section_writer).__name__,
+            len(requests),
+        )
+        return draft
+    known = {section.title: section for section in outline.sections}
+    targets: List[Tuple[OutlineSection, List[str]]] = []
+    for title, instructions in requests.items():
+        if title not in draft.sections:
+            LOGGER.warning("Rewrite requested for section '%s', which is not in the draft; skipping.", title)
+            continue
+        targets.append((known.get(title, OutlineSection(title=title, bullet_points=[])), instructions))
+    if not targets:
+        return draft
+
+    begin_draft = getattr(section_writer, "begin_draft", None)
+    if begin_draft is not None:
+        begin_draft(outline, draft.title)
+
+    def regenerate(section: OutlineSection, instructions: List[str]) -> str:
+        current = draft.sections[section.title]
+        segments = section_segments(section, segment_lookup)
+        with tracing.span(section.title, "rewrite"), profiling.profile("revise", section.title):
+            tracing.annotate(items=len(instructions))
+            dependencies: Dict[str, str] = {}
+            if checkpoints is not None:
+                dependencies = {
+                    "current_text": stable_hash(current),
+                    "instructions": stable_hash(instructions),
+                    **section_dependencies(section, segments, section_writer),
+                }
+                cached = checkpoints.resolve(section.title, dependencies, reuse=True)
+                if cached is not None:
+                    LOGGER.info("Reusing rewrite of section '%s' from checkpoint.", section.title)
+                    tracing.annotate(reused=True)
+                    return cached
+            LOGGER.info("Rewriting section '%s' (%d instructions).", section.title, len(instructions))
+            text = rewrite(section, segments, current, instructions)
+            if checkpoints is not None and section.title not in getattr(section_writer, "degraded_sections", ()):
+                checkpoints.save(section.title, dependencies, text)
+            return text
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets))), thread_name_prefix="rewrite") as pool:
+        # Each task runs in a copy of the caller's context so spans and metrics nest correctly.
+        futures = [
+            (section.title, pool.submit(contextvars.copy_context().run, regenerate, section, instructions))
+            for section, instructions in targets
+        ]
+        rewritten = {title: future.result() for title, future in futures}
+    return Draft(title=draft.title, sections={title: rewritten.get(title, text) for title, text in draft.sections.items()})
@@ -0,0 +1,273 @@
+"""Embedded SQLite store of organized segments with full-text search."""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .organization import BUCKET_DEFINITIONS, Segment, write_segment_index
+from .utils import ensure_directory, stable_hash
+
+LOGGER = logging.getLogger(__name__)
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    segment_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL,
+    summary_hint TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    identifier TEXT NOT NULL,
+    bucket TEXT NOT NULL REFERENCES buckets(name),
+    priority INTEGER NOT NULL,
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    notes TEXT NOT NULL,
+    text TEXT NOT NULL,
+    UNIQUE (run_id, identifier)
+);
+CREATE INDEX IF NOT EXISTS segments_by_bucket ON segments (run_id, bucket, priority);
+CREATE INDEX IF NOT EXISTS segments_by_source ON segments (source_id, run_id, priority);
+CREATE TRIGGER IF NOT EXISTS segments_fts_insert AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts (rowid, text, notes) VALUES (new.id, new.text, new.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_fts_delete AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts (segments_fts, rowid, text, notes) VALUES ('delete', old.id, old.text, old.notes);
+END;
+"""
+
+# Trigram tokens make substring search work for Chinese, which has no word breaks.
+# SQLite builds older than 3.34 lack the tokenizer and fall back to unicode61.
+_FTS_TOKENIZERS = ("trigram", "unicode61")
+
+_SEGMENT_COLUMNS = "s.identifier, s.bucket, s.priority, s.text, src.path, s.notes"
+
+
+class SegmentStore:
+    """Segments of every persisted run, queryable by bucket, source and full text.
+
+    Each call to `add_run` stores one segmentation result as a run. Queries read the
+    latest run unless ``run_id`` is given. Only the newest ``keep_runs`` runs are kept
+    (all of them when ``keep_runs`` is 0), and a run identical to the latest one is
+    not stored twice.
+    """
+
+    def __init__(self, path: Path, keep_runs: int = 0) -> None:
+        self.path = path
+        self.keep_runs = keep_runs
+        ensure_directory(path.parent)
+        self._connection = sqlite3.connect(str(path))
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._create_schema()
+
+    def __enter__(self) -> "SegmentStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def add_run(self, segments: Dict[str, List[Segment]], label: str = "") -> int:
+        """Store a bucket-to-segments mapping as a new run and return its id."""
+
+        rows = [segment for bucket_segments in segments.values() for segment in bucket_segments]
+        fingerprint = stable_hash([[segment.identifier, segment.topic, segment.text, segment.source_path] for segment in rows])
+        latest = self._connection.execute("SELECT id, fingerprint FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+        if latest is not None and latest[1] == fingerprint:
+            LOGGER.debug("Segments unchanged since run %d; not storing a new run.", latest[0])
+            return int(latest[0])
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO buckets (name, priority, summary_hint) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET priority = excluded.priority, summary_hint = excluded.summary_hint",
+                [
+                    (segment.topic, segment.priority, getattr(BUCKET_DEFINITIONS.get(segment.topic), "summary_hint", ""))
+                    for segment in {segment.topic: segment for segment in rows}.values()
+                ],
+            )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO sources (path) VALUES (?)", [(path,) for path in {s.source_path for s in rows}]
+            )
+            source_ids = dict(self._connection.execute("SELECT path, id FROM sources"))
+            cursor = self._connection.execute(
+                "INSERT INTO runs (label, created_at, fingerprint, segment_count) VALUES (?, ?, ?, ?)",
+                (label, datetime.now(timezone.utc).isoformat(timespec="seconds"), fingerprint, len(rows)),
+            )
+            run_id = int(cursor.lastrowid)
+            self._connection.executemany(
+                "INSERT INTO segments (run_id, identifier, bucket, priority, source_id, notes, text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, s.identifier, s.topic, s.priority, source_ids[s.source_path], s.notes, s.text)
+                    for s in rows
+                ],
+            )
+            if self.keep_runs > 0:
+                self._connection.execute(
+                    "DELETE FROM runs WHERE id NOT IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)", (self.keep_runs,)
+                )
+                self._connection.execute("DELETE FROM sources WHERE id NOT IN (SELECT source_id FROM segments)")
+        LOGGER.info("Stored %d segments as run %d in %s", len(rows), run_id, self.path)
+        return run_id
+
+    def runs(self) -> List[Dict[str, object]]:
+        """Return every stored run, newest first."""
+
+        cursor = self._connection.execute(
+            "SELECT id, label, created_at, segment_count FROM runs ORDER BY id DESC"
+        )
+        return [
+            {"id": run_id, "label": label, "created_at": created_at, "segments": count}
+            for run_id, label, created_at, count in cursor
+        ]
+
+    def latest_run(self) -> Optional[int]:
+        row = self._connection.execute("SELECT MAX(id) FROM runs").fetchone()
+        return None if row[0] is None else int(row[0])
+
+    def buckets(self, run_id: Optional[int] = None) -> Dict[str, int]:
+        """Return the number of segments per bucket, ordered by bucket priority."""
+
+        cursor = self._connection.execute(
+            "SELECT s.bucket, COUNT(*) FROM segments s JOIN buckets b ON b.name = s.bucket "
+            "WHERE s.run_id = ? GROUP BY s.bucket ORDER BY b.priority",
+            (self._run(run_id),),
+        )
+        return {bucket: count for bucket, count in cursor}
+
+    def by_bucket(self, bucket: str, run_id: Optional[int] = None) -> List[Segment]:
+        return self._select("s.bucket = ?", (bucket,), run_id)
+
+    def by_source(self, source_path: str, run_id: Optional[int] = None) -> List[Segment]:
+        """Return segments from one material; ``source_path`` may end in ``*`` to match a prefix."""
+
+        if source_path.endswith("*"):
+            prefix = source_path[:-1]
+            return self._select("src.path >= ? AND src.path < ?", (prefix, prefix + "\U0010ffff"), run_id)
+        return self._select("src.path = ?", (source_path,), run_id)
+
+    def search(
+        self,
+        query: str,
+        run_id: Optional[int] = None,
+        bucket: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Segment]:
+        """Return segments containing every whitespace-separated term of ``query``, best matches first.
+
+        Terms are matched as substrings. Terms of three or more characters use the
+        full-text index and results are ranked by BM25. Shorter terms, such as
+        two-character Chinese words, are matched with LIKE within the run.
+        """
+
+        terms = query.split()
+        if not terms:
+            return []
+        indexed = [term for term in terms if len(term) >= 3 or self._tokenizer != "trigram"]
+        clauses: List[str] = []
+        parameters: List[object] = []
+        for term in terms:
+            if term not in indexed:
+                clauses.append("s.text LIKE ? ESCAPE '\\'")
+                escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                parameters.append(f"%{escaped}%")
+        if bucket is not None:
+            clauses.append("s.bucket = ?")
+            parameters.append(bucket)
+        if indexed:
+            match = " AND ".join('"{}"'.format(term.replace('"', '""')) for term in indexed)
+            sql = (
+                f"SELECT {_SEGMENT_COLUMNS} FROM segments_fts f JOIN segments s ON s.id = f.rowid "
+                "JOIN sources src ON src.id = s.source_id "
+                f"WHERE segments_fts MATCH ? AND s.run_id = ? {''.join(' AND ' + c for c in clauses)} "
+                "ORDER BY bm25(segments_fts), s.priority, s.id LIMIT ?"
+            )
+            arguments: Tuple[object, ...] = (match, self._run(run_id), *parameters, limit)
+        else:
+            sql = (
+                f"SELECT {_SEGMENT_COLUMNS} FROM segments s JOIN sources src ON src.id = s.source_id "
+                f"WHERE s.run_id = ? {''.join(' AND ' + c for c in clauses)} "
+                "ORDER BY s.priority, s.id LIMIT ?"
+            )
+            arguments = (self._run(run_id), *parameters, limit)
+        return [self._segment(row) for row in self._connection.execute(sql, arguments)]
+
+    def export_csv(self, destination: Path, run_id: Optional[int] = None) -> None:
+        """Write the run's segments as a quoted CSV index (see `write_segment_index`)."""
+
+        segments = self._select("1 = 1", (), run_id)
+        write_segment_index(destination, segments)
+
+    def _select(self, condition: str, parameters: Sequence[object], run_id: Optional[int]) -> List[Segment]:
+        cursor = self._connection.execute(
+            f"SELECT {_SEGMENT_COLUMNS} FROM segments s JOIN sources src ON src.id = s.source_id "
+            f"WHERE s.run_id = ? AND {condition} ORDER BY s.priority, s.id",
+            (self._run(run_id), *parameters),
+        )
+        return [self._segment(row) for row in cursor]
+
+    def _run(self, run_id: Optional[int]) -> int:
+        if run_id is not None:
+            return run_id
+        latest = self.latest_run()
+        return -1 if latest is None else latest
+
+    @staticmethod
+    def _segment(row: Sequence[object]) -> Segment:
+        identifier, bucket, priority, text, source_path, notes = row
+        return Segment(
+            identifier=str(identifier),
+            topic=str(bucket),
+            priority=int(priority),  # type: ignore[arg-type]
+            text=str(text),
+            source_path=str(source_path),
+            notes=str(notes),
+        )
+
+    def _create_schema(self) -> None:
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"Segment store {self.path} has schema version {version}; expected {SCHEMA_VERSION}.")
+        existing = self._connection.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'segments_fts'"
+        ).fetchone()
+        with self._connection:
+            if existing is None:
+                self._tokenizer = self._create_fts_table()
+            else:
+                self._tokenizer = "trigram" if "trigram" in existing[0] else "unicode61"
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _create_fts_table(self) -> str:
+        for tokenizer in _FTS_TOKENIZERS:
+            try:
+                self._connection.execute(
+                    "CREATE VIRTUAL TABLE segments_fts USING fts5("
+                    f"text, notes, content='segments', content_rowid='id', tokenize='{tokenizer}')"
+                )
+            except sqlite3.OperationalError as exc:
+                LOGGER.debug("FTS5 tokenizer '%s' unavailable: %s", tokenizer, exc)
+                continue
+            return tokenizer
+        raise RuntimeError("This SQLite build lacks FTS5, which the segment store requires.")
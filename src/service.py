@@ -0,0 +1,328 @@
+"""Long-running report service with warm LLM clients and a persistent job queue."""
+
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import threading
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .export import EXPORT_FORMATS
+from .llm import SharedLLMResources
+from .pipeline import STAGE_NAMES, PipelineConfig, WritingPipeline, default_config
+from .utils import atomic_write_text, ensure_directory
+
+LOGGER = logging.getLogger(__name__)
+_TERMINAL_STATES = {"succeeded", "failed"}
+_CONTENT_TYPES = {
+    ".json": "application/json",
+    ".jsonl": "application/x-ndjson; charset=utf-8",
+    ".md": "text/markdown; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+    ".txt": "text/plain; charset=utf-8",
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+@dataclass
+class ServiceJob:
+    """A submitted pipeline run and its progress."""
+
+    identifier: str
+    base_path: str
+    title: str
+    metadata: Dict[str, str] = field(default_factory=dict)
+    incremental: bool = False
+    status: str = "queued"
+    submitted_at: str = field(default_factory=_now)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    stages_done: List[str] = field(default_factory=list)
+    current_stages: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    outputs: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def progress(self) -> float:
+        return round(len(self.stages_done) / len(STAGE_NAMES), 3)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {**asdict(self), "progress": self.progress}
+
+
+class JobStore:
+    """Persist one JSON document per job so the queue survives restarts."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = ensure_directory(directory)
+        self._jobs: Dict[str, ServiceJob] = {}
+        self._lock = threading.Lock()
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                job = ServiceJob(**json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, TypeError, json.JSONDecodeError) as exc:
+                LOGGER.warning("Ignoring unreadable job file %s: %s", path, exc)
+                continue
+            self._jobs[job.identifier] = job
+
+    def add(self, job: ServiceJob) -> None:
+        with self._lock:
+            self._jobs[job.identifier] = job
+            self._save(job)
+
+    def get(self, identifier: str) -> Optional[ServiceJob]:
+        with self._lock:
+            return self._jobs.get(identifier)
+
+    def all(self) -> List[ServiceJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.submitted_at)
+
+    def update(self, identifier: str, mutate: Callable[[ServiceJob], None]) -> None:
+        with self._lock:
+            job = self._jobs[identifier]
+            mutate(job)
+            self._save(job)
+
+    def pending(self) -> List[ServiceJob]:
+        """Return jobs that were queued or interrupted mid-run, oldest first."""
+
+        return [job for job in self.all() if job.status not in _TERMINAL_STATES]
+
+    def _save(self, job: ServiceJob) -> None:
+        atomic_write_text(self.directory / f"{job.identifier}.json", json.dumps(asdict(job), ensure_ascii=False, indent=2))
+
+
+class ReportService:
+    """Execute submitted jobs on a fixed pool of workers that share warm LLM clients.
+
+    Jobs that target the same base path are serialised, because they share an output
+    tree; jobs for different base paths run concurrently up to ``concurrency``.
+    """
+
+    def __init__(
+        self,
+        state_dir: Path,
+        concurrency: int = 2,
+        resources: Optional[SharedLLMResources] = None,
+        allowed_roots: Sequence[Path] = (),
+        config_factory: Callable[[Path, str], PipelineConfig] = default_config,
+    ) -> None:
+        self.store = JobStore(state_dir / "jobs")
+        self.resources = resources or SharedLLMResources()
+        self.allowed_roots = [root.resolve() for root in allowed_roots]
+        self._config_factory = config_factory
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._path_locks: Dict[str, threading.Lock] = {}
+        self._path_locks_guard = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"report-worker-{index}", daemon=True)
+            for index in range(max(concurrency, 1))
+        ]
+
+    def start(self) -> None:
+        """Requeue unfinished jobs from a previous process and start the workers."""
+
+        for job in self.store.pending():
+            if job.status == "running":
+                LOGGER.warning("Requeueing job %s interrupted by a previous shutdown.", job.identifier)
+                self.store.update(job.identifier, _reset_job)
+            self._queue.put(job.identifier)
+        for worker in self._workers:
+            worker.start()
+
+    def stop(self) -> None:
+        """Ask workers to exit once their current job finishes."""
+
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self.resources.close()
+
+    def submit(self, payload: Dict[str, object]) -> ServiceJob:
+        """Validate a job request and enqueue it."""
+
+        base_path = payload.get("base_path")
+        title = payload.get("title")
+        if not isinstance(base_path, str) or not isinstance(title, str) or not title:
+            raise ValueError("Job requires string fields 'base_path' and 'title'.")
+        resolved = Path(base_path).resolve()
+        if self.allowed_roots and not any(resolved.is_relative_to(root) for root in self.allowed_roots):
+            raise ValueError(f"Base path {resolved} is outside the allowed roots.")
+        metadata = payload.get("metadata") or {}
+        if not isinstance(metadata, dict):
+            raise ValueError("'metadata' must be an object of string values.")
+        job = ServiceJob(
+            identifier=uuid.uuid4().hex[:12],
+            base_path=str(resolved),
+            title=title,
+            metadata={str(key): str(value) for key, value in metadata.items()},
+            incremental=bool(payload.get("incremental", False)),
+        )
+        self.store.add(job)
+        self._queue.put(job.identifier)
+        return job
+
+    def _work(self) -> None:
+        while True:
+            identifier = self._queue.get()
+            if identifier is None:
+                return
+            job = self.store.get(identifier)
+            if job is None or job.status in _TERMINAL_STATES:
+                continue
+            with self._lock_for(job.base_path):
+                self._execute(job)
+
+    def _execute(self, job: ServiceJob) -> None:
+        def mark_started(target: ServiceJob) -> None:
+            target.status = "running"
+            target.started_at = _now()
+
+        def on_stage(stage: str, event: str) -> None:
+            def mutate(target: ServiceJob) -> None:
+                if event == "started":
+                    target.current_stages.append(stage)
+                    return
+                if stage in target.current_stages:
+                    target.current_stages.remove(stage)
+                target.stages_done.append(stage)
+
+            self.store.update(job.identifier, mutate)
+
+        self.store.update(job.identifier, mark_started)
+        pipeline: Optional[WritingPipeline] = None
+        try:
+            config = self._config_factory(Path(job.base_path), job.title)
+            pipeline = WritingPipeline(config, resources=self.resources)
+            pipeline.run(metadata_overrides=job.metadata, incremental=job.incremental, listener=on_stage)
+        except Exception as exc:  # noqa: BLE001 - a failed job must not kill the worker
+            LOGGER.exception("Job %s failed", job.identifier)
+            message = str(exc)
+
+            def mark_failed(target: ServiceJob) -> None:
+                target.status = "failed"
+                target.error = message
+                target.finished_at = _now()
+
+            self.store.update(job.identifier, mark_failed)
+            return
+        finally:
+            if pipeline is not None:
+                pipeline.close()
+
+        outputs = {
+            EXPORT_FORMATS[name].file_name: str(config.final_dir / EXPORT_FORMATS[name].file_name)
+            for name in config.export_formats
+        }
+        outputs["metadata.json"] = str(config.final_dir / "metadata.json")
+        outputs["draft.md"] = str(config.draft_path)
+
+        def mark_succeeded(target: ServiceJob) -> None:
+            target.status = "succeeded"
+            target.finished_at = _now()
+            target.current_stages = []
+            target.outputs = outputs
+
+        self.store.update(job.identifier, mark_succeeded)
+
+    def _lock_for(self, base_path: str) -> threading.Lock:
+        with self._path_locks_guard:
+            return self._path_locks.setdefault(base_path, threading.Lock())
+
+
+def _reset_job(job: ServiceJob) -> None:
+    job.status = "queued"
+    job.started_at = None
+    job.stages_done = []
+    job.current_stages = []
+
+
+def _make_handler(service: ReportService) -> type:
+    class ReportRequestHandler(BaseHTTPRequestHandler):
+        """Small JSON API: submit jobs, poll status, fetch delivery outputs."""
+
+        server_version = "tiangong-aria-report"
+
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            parts = [part for part in self.path.split("?")[0].split("/") if part]
+            if parts == ["health"]:
+                self._send_json({"status": "ok", "resources": service.resources.stats()})
+            elif parts == ["jobs"]:
+                self._send_json({"jobs": [job.as_dict() for job in service.store.all()]})
+            elif len(parts) == 2 and parts[0] == "jobs":
+                job = service.store.get(parts[1])
+                self._send_job(job, lambda found: self._send_json(found.as_dict()))
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "outputs":
+                job = service.store.get(parts[1])
+                self._send_job(job, lambda found: self._send_json({"outputs": sorted(found.outputs)}))
+            elif len(parts) == 4 and parts[0] == "jobs" and parts[2] == "outputs":
+                job = service.store.get(parts[1])
+                self._send_job(job, lambda found: self._send_output(found, parts[3]))
+            else:
+                self._send_json({"error": "not found"}, HTTPStatus.NOT_FOUND)
+
+        def do_POST(self) -> None:  # noqa: N802 - http.server naming
+            if self.path.rstrip("/") != "/jobs":
+                self._send_json({"error": "not found"}, HTTPStatus.NOT_FOUND)
+                return
+            try:
+                length = int(self.headers.get("Content-Length", "0"))
+                payload = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+                if not isinstance(payload, dict):
+                    raise ValueError("Request body must be a JSON object.")
+                job = service.submit(payload)
+            except (ValueError, json.JSONDecodeError) as exc:
+                self._send_json({"error": str(exc)}, HTTPStatus.BAD_REQUEST)
+                return
+            self._send_json(job.as_dict(), HTTPStatus.ACCEPTED)
+
+        def log_message(self, format: str, *args: object) -> None:  # noqa: A002 - signature from base class
+            LOGGER.debug("%s - %s", self.address_string(), format % args)
+
+        def _send_job(self, job: Optional[ServiceJob], respond: Callable[[ServiceJob], None]) -> None:
+            if job is None:
+                self._send_json({"error": "unknown job"}, HTTPStatus.NOT_FOUND)
+                return
+            respond(job)
+
+        def _send_output(self, job: ServiceJob, name: str) -> None:
+            location = job.outputs.get(name)
+            if location is None or not Path(location).exists():
+                self._send_json({"error": f"output '{name}' not available"}, HTTPStatus.NOT_FOUND)
+                return
+            content_type = _CONTENT_TYPES.get(Path(name).suffix, "application/octet-stream")
+            self._send_bytes(Path(location).read_bytes(), content_type)
+
+        def _send_json(self, payload: object, status: HTTPStatus = HTTPStatus.OK) -> None:
+            body = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+            self._send_bytes(body, "application/json; charset=utf-8", status)
+
+        def _send_bytes(self, body: bytes, content_type: str, status: HTTPStatus = HTTPStatus.OK) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return ReportRequestHandler
+
+
+def serve(service: ReportService, address: Tuple[str, int] = ("127.0.0.1", 8750)) -> ThreadingHTTPServer:
+    """Start the service workers and return an HTTP server bound to ``address``."""
+
+    service.start()
+    server = ThreadingHTTPServer(address, _make_handler(service))
+    LOGGER.info("Report service listening on http://%s:%s", *server.server_address[:2])
+    return server
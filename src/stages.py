@@ -0,0 +1,287 @@
+"""Stage DAG scheduling with content-hashed artifact caching for the pipeline."""
+
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import json
+import logging
+import pickle
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from . import profiling, tracing
+from .utils import atomic_write_text, ensure_directory, stable_hash
+
+LOGGER = logging.getLogger(__name__)
+StageListener = Callable[[str, str], None]
+
+
+class StageError(RuntimeError):
+    """Raised when a stage graph is misconfigured or cannot be scheduled."""
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A unit of pipeline work with declared input and output artifacts.
+
+    ``run`` receives a mapping of input artifact names to values and must return a
+    mapping with exactly the declared outputs. Cacheable stages are skipped when an
+    earlier run already produced outputs for the same input hashes and ``cache_key``.
+    """
+
+    name: str
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    run: Callable[[Dict[str, Any]], Dict[str, Any]]
+    cacheable: bool = False
+    cache_key: Optional[Callable[[], object]] = None
+
+
+class ArtifactStore:
+    """Pickle stage outputs under their content hash and remember the latest of each.
+
+    The manifest keeps, per stage, the cache key of its last execution and the hashes
+    of the outputs it produced, plus the most recent hash of every artifact so a later
+    run can start in the middle of the graph.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = ensure_directory(directory)
+        self._blob_dir = ensure_directory(directory / "artifacts")
+        self._manifest_path = directory / "manifest.json"
+        self._lock = threading.Lock()
+        self._manifest: Dict[str, Dict[str, Any]] = {"stages": {}, "latest": {}}
+        if self._manifest_path.exists():
+            try:
+                self._manifest = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as exc:
+                LOGGER.warning("Ignoring unreadable stage manifest %s: %s", self._manifest_path, exc)
+
+    def put(self, value: Any) -> str:
+        """Store a value and return its content hash."""
+
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self._blob_dir / f"{digest}.pkl"
+        if not path.exists():
+            temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            temp_path.write_bytes(payload)
+            temp_path.replace(path)
+        return digest
+
+    def get(self, digest: str) -> Any:
+        """Return the value stored under a content hash."""
+
+        return pickle.loads((self._blob_dir / f"{digest}.pkl").read_bytes())
+
+    def cached_outputs(self, stage: str, key: str) -> Optional[Dict[str, str]]:
+        """Return output hashes recorded for a stage execution with the same key."""
+
+        with self._lock:
+            entry = self._manifest["stages"].get(stage)
+        if not entry or entry.get("key") != key:
+            return None
+        outputs: Dict[str, str] = entry["outputs"]
+        if not all((self._blob_dir / f"{digest}.pkl").exists() for digest in outputs.values()):
+            return None
+        return outputs
+
+    def latest(self, artifact: str) -> Optional[str]:
+        """Return the hash of the most recently produced value of an artifact."""
+
+        with self._lock:
+            return self._manifest["latest"].get(artifact)
+
+    def record(self, stage: str, key: str, outputs: Dict[str, str]) -> None:
+        """Remember a stage execution and mark its outputs as the latest artifacts."""
+
+        with self._lock:
+            self._manifest["stages"][stage] = {"key": key, "outputs": outputs}
+            self._manifest["latest"].update(outputs)
+            atomic_write_text(self._manifest_path, json.dumps(self._manifest, indent=2))
+
+    def prune(self) -> None:
+        """Delete blobs no longer referenced by the manifest."""
+
+        with self._lock:
+            referenced = set(self._manifest["latest"].values())
+            for entry in self._manifest["stages"].values():
+                referenced.update(entry["outputs"].values())
+        for path in self._blob_dir.glob("*.pkl"):
+            if path.stem not in referenced:
+                path.unlink(missing_ok=True)
+
+
+@dataclass
+class StageRun:
+    """Outcome of scheduling a stage graph."""
+
+    artifacts: Dict[str, Any] = field(default_factory=dict)
+    executed: List[str] = field(default_factory=list)
+    cached: List[str] = field(default_factory=list)
+
+
+class StageGraph:
+    """Schedule stages in dependency order, running independent stages concurrently."""
+
+    def __init__(self, stages: Sequence[Stage], store: Optional[ArtifactStore] = None, max_workers: int = 4) -> None:
+        self.stages: Dict[str, Stage] = {}
+        self._producers: Dict[str, str] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise StageError(f"Duplicate stage name '{stage.name}'.")
+            self.stages[stage.name] = stage
+            for output in stage.outputs:
+                if output in self._producers:
+                    raise StageError(f"Artifact '{output}' is produced by both '{self._producers[output]}' and '{stage.name}'.")
+                self._producers[output] = stage.name
+        self.store = store
+        self.max_workers = max_workers
+
+    @property
+    def names(self) -> List[str]:
+        """Return stage names in declaration order."""
+
+        return list(self.stages)
+
+    def select(self, start: Optional[str] = None, stop: Optional[str] = None) -> List[Stage]:
+        """Return the stages downstream of ``start`` and upstream of ``stop`` (inclusive)."""
+
+        for name in (start, stop):
+            if name is not None and name not in self.stages:
+                raise StageError(f"Unknown stage '{name}'; expected one of {', '.join(self.stages)}.")
+        selected: Set[str] = set(self.stages)
+        if start is not None:
+            selected &= self._closure(start, downstream=True)
+        if stop is not None:
+            selected &= self._closure(stop, downstream=False)
+        if not selected:
+            raise StageError(f"Stage '{stop}' does not depend on stage '{start}'.")
+        return [stage for name, stage in self.stages.items() if name in selected]
+
+    def run(
+        self,
+        start: Optional[str] = None,
+        stop: Optional[str] = None,
+        listener: Optional[StageListener] = None,
+    ) -> StageRun:
+        """Execute the selected part of the graph and return the produced artifacts.
+
+        ``listener`` is called with ``(stage, event)`` where event is ``"started"``,
+        ``"finished"`` or ``"cached"``; it runs on the worker thread of the stage.
+        """
+
+        selected = self.select(start, stop)
+        produced = {output for stage in selected for output in stage.outputs}
+        result = StageRun()
+        hashes: Dict[str, str] = {}
+        for stage in selected:
+            for artifact in stage.inputs:
+                if artifact in produced or artifact in result.artifacts:
+                    continue
+                digest = self.store.latest(artifact) if self.store else None
+                if digest is None:
+                    raise StageError(
+                        f"Stage '{stage.name}' needs artifact '{artifact}' from stage "
+                        f"'{self._producers.get(artifact, '?')}'; run that stage first."
+                    )
+                result.artifacts[artifact] = self.store.get(digest)  # type: ignore[union-attr]
+                hashes[artifact] = digest
+
+        pending = list(selected)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as pool:
+            running: Dict[Future, Stage] = {}
+            while pending or running:
+                for stage in list(pending):
+                    if all(artifact in result.artifacts for artifact in stage.inputs):
+                        pending.remove(stage)
+                        inputs = {artifact: result.artifacts[artifact] for artifact in stage.inputs}
+                        input_hashes = [hashes.get(artifact, "") for artifact in stage.inputs]
+                        # Copy the context so spans opened by the stage attach to the caller's tracer.
+                        context = contextvars.copy_context()
+                        running[pool.submit(context.run, self._execute, stage, inputs, input_hashes, listener)] = stage
+                if not running:
+                    raise StageError(f"Stages {[stage.name for stage in pending]} have unsatisfiable inputs.")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    outputs, output_hashes, from_cache = future.result()
+                    result.artifacts.update(outputs)
+                    hashes.update(output_hashes)
+                    (result.cached if from_cache else result.executed).append(stage.name)
+        if self.store is not None:
+            self.store.prune()
+        return result
+
+    def _execute(
+        self,
+        stage: Stage,
+        inputs: Dict[str, Any],
+        input_hashes: List[str],
+        listener: Optional[StageListener] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, str], bool]:
+        with tracing.span(stage.name, "stage"), profiling.profile(stage.name):
+            return self._execute_stage(stage, inputs, input_hashes, listener)
+
+    def _execute_stage(
+        self,
+        stage: Stage,
+        inputs: Dict[str, Any],
+        input_hashes: List[str],
+        listener: Optional[StageListener],
+    ) -> Tuple[Dict[str, Any], Dict[str, str], bool]:
+        key = ""
+        if self.store is not None:
+            key = stable_hash(
+                {
+                    "stage": stage.name,
+                    "inputs": input_hashes,
+                    "extra": stage.cache_key() if stage.cache_key else None,
+                }
+            )
+            if stage.cacheable and all(input_hashes):
+                cached = self.store.cached_outputs(stage.name, key)
+                if cached is not None:
+                    LOGGER.info("Stage '%s' inputs unchanged; reusing cached artifacts.", stage.name)
+                    tracing.annotate(cached=True)
+                    if listener is not None:
+                        listener(stage.name, "cached")
+                    return {name: self.store.get(digest) for name, digest in cached.items()}, cached, True
+
+        LOGGER.info("Running stage '%s'.", stage.name)
+        if listener is not None:
+            listener(stage.name, "started")
+        outputs = stage.run(inputs)
+        missing = set(stage.outputs) - set(outputs)
+        if missing:
+            raise StageError(f"Stage '{stage.name}' did not produce {sorted(missing)}.")
+        output_hashes: Dict[str, str] = {}
+        if self.store is not None:
+            output_hashes = {name: self.store.put(outputs[name]) for name in stage.outputs}
+            self.store.record(stage.name, key, output_hashes)
+        if listener is not None:
+            listener(stage.name, "finished")
+        return outputs, output_hashes, False
+
+    def _closure(self, name: str, downstream: bool) -> Set[str]:
+        seen: Set[str] = set()
+        frontier = [name]
+        while frontier:
+            current = frontier.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            stage = self.stages[current]
+            if downstream:
+                frontier.extend(
+                    other.name
+                    for other in self.stages.values()
+                    if any(artifact in stage.outputs for artifact in other.inputs)
+                )
+            else:
+                frontier.extend(self._producers[artifact] for artifact in stage.inputs if artifact in self._producers)
+        return seen
@@ -0,0 +1,169 @@
+"""Lightweight tracing spans for pipeline stages, sections and LLM calls."""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .utils import write_text_file
+
+
+@dataclass
+class Span:
+    """A timed unit of work with wall time, thread CPU time and an optional item count."""
+
+    name: str
+    category: str
+    start: float
+    thread_id: int
+    thread_name: str
+    parent: Optional[str] = None
+    wall: float = 0.0
+    cpu: float = 0.0
+    items: Optional[int] = None
+    attributes: Dict[str, object] = field(default_factory=dict)
+
+
+_ACTIVE_TRACER: contextvars.ContextVar[Optional["Tracer"]] = contextvars.ContextVar("active_tracer", default=None)
+_CURRENT_SPAN: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Collect spans from every thread working on one pipeline run."""
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str = "stage", **attributes: object) -> Iterator[Span]:
+        """Time the enclosed block and record it once it exits."""
+
+        thread = threading.current_thread()
+        parent = _CURRENT_SPAN.get()
+        record = Span(
+            name=name,
+            category=category,
+            start=time.perf_counter() - self.origin,
+            thread_id=thread.ident or 0,
+            thread_name=thread.name,
+            parent=parent.name if parent else None,
+            attributes=dict(attributes),
+        )
+        token = _CURRENT_SPAN.set(record)
+        cpu_start = time.thread_time()
+        wall_start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall = time.perf_counter() - wall_start
+            record.cpu = time.thread_time() - cpu_start
+            _CURRENT_SPAN.reset(token)
+            with self._lock:
+                self.spans.append(record)
+
+    def breakdown(self) -> Dict[str, object]:
+        """Aggregate finished spans by category and name."""
+
+        with self._lock:
+            spans = list(self.spans)
+        categories: Dict[str, Dict[str, Dict[str, object]]] = {}
+        for record in spans:
+            entry = categories.setdefault(record.category, {}).setdefault(
+                record.name, {"count": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "items": 0}
+            )
+            entry["count"] += 1  # type: ignore[operator]
+            entry["wall_seconds"] += record.wall  # type: ignore[operator]
+            entry["cpu_seconds"] += record.cpu  # type: ignore[operator]
+            entry["items"] += record.items or 0  # type: ignore[operator]
+        for entries in categories.values():
+            for entry in entries.values():
+                entry["wall_seconds"] = round(entry["wall_seconds"], 4)  # type: ignore[arg-type]
+                entry["cpu_seconds"] = round(entry["cpu_seconds"], 4)  # type: ignore[arg-type]
+        return {
+            "elapsed_seconds": round(time.perf_counter() - self.origin, 4),
+            "span_count": len(spans),
+            "categories": categories,
+        }
+
+    def to_chrome_trace(self) -> Dict[str, object]:
+        """Return spans in the Chrome trace-event format (viewable in Perfetto)."""
+
+        with self._lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        events: List[Dict[str, object]] = []
+        for thread_id, thread_name in sorted({(record.thread_id, record.thread_name) for record in spans}):
+            events.append(
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id, "args": {"name": thread_name}}
+            )
+        for record in spans:
+            args: Dict[str, object] = {"cpu_ms": round(record.cpu * 1000, 3), **record.attributes}
+            if record.items is not None:
+                args["items"] = record.items
+            events.append(
+                {
+                    "name": record.name,
+                    "cat": record.category,
+                    "ph": "X",
+                    "ts": round(record.start * 1_000_000, 1),
+                    "dur": round(record.wall * 1_000_000, 1),
+                    "pid": pid,
+                    "tid": record.thread_id,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, destination: Path) -> None:
+        """Persist the Chrome trace JSON for flame-graph viewing."""
+
+        write_text_file(destination, json.dumps(self.to_chrome_trace(), ensure_ascii=False))
+
+
+def current_tracer() -> Optional[Tracer]:
+    """Return the tracer active in this context, if any."""
+
+    return _ACTIVE_TRACER.get()
+
+
+@contextmanager
+def activate(tracer: Tracer) -> Iterator[Tracer]:
+    """Make ``tracer`` the destination for `span` calls in this context."""
+
+    token = _ACTIVE_TRACER.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _ACTIVE_TRACER.reset(token)
+
+
+@contextmanager
+def span(name: str, category: str = "stage", **attributes: object) -> Iterator[Optional[Span]]:
+    """Record a span on the active tracer; a no-op when tracing is not active."""
+
+    tracer = _ACTIVE_TRACER.get()
+    if tracer is None:
+        yield None
+        return
+    with tracer.span(name, category, **attributes) as record:
+        yield record
+
+
+def annotate(items: Optional[int] = None, **attributes: object) -> None:
+    """Attach an item count or attributes to the innermost open span."""
+
+    record = _CURRENT_SPAN.get()
+    if record is None:
+        return
+    if items is not None:
+        record.items = items
+    record.attributes.update(attributes)
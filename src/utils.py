@@ -2,37 +2,142 @@
 
 from __future__ import annotations
 
+import codecs
+import hashlib
+import io
+import json
 import logging
+import mmap
+import os
+import re
+import secrets
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict
+from typing import BinaryIO, Callable, Deque, Iterable, Iterator, TextIO, Tuple, TypeVar
 
 LOGGER = logging.getLogger(__name__)
+_SLUG_PATTERN = re.compile(r"[^A-Za-z0-9\u4e00-\u9fa5]+")
+_T = TypeVar("_T")
+_R = TypeVar("_R")
 
 
-def read_text_directory(directory: Path) -> Dict[str, str]:
-    """Return a mapping of relative file names to their UTF-8 text contents.
+# Files at least this large are decoded straight from a memory map instead of
+# being copied into an intermediate bytes object first.
+MMAP_THRESHOLD = 4 * 1024 * 1024
+# Block size used when scanning files incrementally.
+CHUNK_SIZE = 1024 * 1024
 
-    Parameters
-    ----------
-    directory: Path
-        Folder containing text files that should be ingested.
+
+def _translate_newlines(text: str) -> str:
+    """Apply universal-newline translation, as text-mode `open` does."""
+
+    if "\r" not in text:
+        return text
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def decode_text(data: bytes) -> str:
+    """Decode UTF-8 bytes with the newline handling of `read_text_file`."""
+
+    return _translate_newlines(data.decode("utf-8"))
+
+
+def read_text_file(path: Path, mmap_threshold: int = MMAP_THRESHOLD) -> str:
+    """Return the UTF-8 contents of ``path``, memory-mapping files of ``mmap_threshold`` bytes or more."""
+
+    with path.open("rb") as stream:
+        size = os.fstat(stream.fileno()).st_size
+        if size == 0 or size < mmap_threshold:
+            return decode_text(stream.read())
+        with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                return _translate_newlines(str(view, "utf-8"))
+
+
+def iter_paragraphs(
+    path: Path,
+    separator: str = "\n\n",
+    chunk_size: int = CHUNK_SIZE,
+    opener: Callable[[Path], BinaryIO] = lambda path: path.open("rb"),
+) -> Iterator[str]:
+    """Yield the ``separator``-delimited blocks of a UTF-8 file without loading it whole.
+
+    The file is read in ``chunk_size`` blocks through an incremental decoder, so
+    multi-byte sequences and ``\r\n`` pairs split across blocks are handled, and
+    newlines are translated as in text mode. The blocks are exactly those of
+    ``read_text_file(path).split(separator)``; only the current block and one
+    chunk are held in memory. ``opener`` returns the binary stream to scan, for
+    example a decompressing one.
 
     Raises
     ------
-    FileNotFoundError
-        If the directory does not exist.
     UnicodeDecodeError
-        If a file cannot be decoded using UTF-8.
+        If the file cannot be decoded using UTF-8.
+    """
+
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(), translate=True)
+    pending = ""
+    with opener(path) as stream:
+        while True:
+            chunk = stream.read(chunk_size)
+            # Text already scanned cannot hold a separator, except one straddling the new chunk.
+            scan_from = max(0, len(pending) - len(separator) + 1)
+            pending += decoder.decode(chunk, final=not chunk)
+            start = 0
+            while True:
+                index = pending.find(separator, scan_from)
+                if index < 0:
+                    break
+                yield pending[start:index]
+                start = scan_from = index + len(separator)
+            pending = pending[start:]
+            if not chunk:
+                break
+    yield pending
+
+
+def file_digest(path: Path, chunk_size: int = CHUNK_SIZE) -> str:
+    """Return the SHA-256 hex digest of a file's bytes, reading it in blocks."""
+
+    digest = hashlib.sha256()
+    with path.open("rb") as stream:
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_ordered(function: Callable[[_T], _R], items: Iterable[_T], max_workers: int = 4) -> Iterator[_R]:
+    """Yield ``function(item)`` for every item, in input order, computed on a thread pool.
+
+    At most ``2 * max_workers`` results are computed ahead of the consumer, which
+    bounds memory use when results are large. Closing the iterator early cancels
+    work that has not started yet.
     """
 
-    if not directory.exists():
-        raise FileNotFoundError(f"Directory does not exist: {directory}")
+    if max_workers <= 1:
+        for item in items:
+            yield function(item)
+        return
 
-    contents: Dict[str, str] = {}
-    for text_file in directory.rglob("*.txt"):
-        LOGGER.debug("Reading text file: %s", text_file)
-        contents[str(text_file.relative_to(directory))] = text_file.read_text(encoding="utf-8")
-    return contents
+    remaining = iter(items)
+    pending: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest") as executor:
+        try:
+            for item in remaining:
+                pending.append(executor.submit(function, item))
+                if len(pending) >= 2 * max_workers:
+                    break
+            while pending:
+                result = pending.popleft().result()
+                for item in remaining:
+                    pending.append(executor.submit(function, item))
+                    break
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
 
 
 def ensure_directory(path: Path) -> Path:
@@ -49,3 +154,62 @@ def write_text_file(destination: Path, text: str) -> None:
     ensure_directory(destination.parent)
     destination.write_text(text, encoding="utf-8")
     LOGGER.info("Wrote text output to %s", destination)
+
+
+def slugify(value: str, default: str = "section") -> str:
+    """Return a filesystem-friendly slug that keeps CJK characters intact."""
+
+    sanitized = _SLUG_PATTERN.sub("-", value.strip()).strip("-")
+    if not sanitized:
+        return default
+    return sanitized.lower()
+
+
+def _create_temp_sibling(destination: Path) -> Tuple[int, str]:
+    """Create an exclusive temporary file next to ``destination`` and return its descriptor and path.
+
+    Unlike `tempfile.mkstemp`, which creates 0600 files, the file is opened with
+    mode 0666 so the kernel applies the process umask, giving the permissions a
+    plain ``open()`` would.
+    """
+
+    while True:
+        temp_name = str(destination.parent / f".{destination.name}.{secrets.token_hex(6)}.tmp")
+        try:
+            return os.open(temp_name, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666), temp_name
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def atomic_writer(destination: Path) -> Iterator[TextIO]:
+    """Yield a UTF-8 stream to a temporary sibling file that replaces ``destination`` on success.
+
+    If the block raises, the temporary file is removed and ``destination`` is untouched.
+    """
+
+    ensure_directory(destination.parent)
+    handle, temp_name = _create_temp_sibling(destination)
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as stream:
+            yield stream
+            stream.flush()
+            os.fsync(stream.fileno())
+        os.replace(temp_name, destination)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_text(destination: Path, text: str) -> None:
+    """Write text through a temporary sibling file and atomically swap it into place."""
+
+    with atomic_writer(destination) as stream:
+        stream.write(text)
+
+
+def stable_hash(payload: object) -> str:
+    """Return a SHA-256 hex digest of a JSON-serialisable payload with sorted keys."""
+
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
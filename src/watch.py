@@ -0,0 +1,298 @@
+"""Watch raw materials and revision directives and rebuild incrementally on change."""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Protocol, Sequence, Set, Tuple
+
+from .archives import source_kind
+from .pipeline import WritingPipeline
+from .utils import ensure_directory
+
+LOGGER = logging.getLogger(__name__)
+
+# Constants from <sys/inotify.h>.
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_ATTRIB
+_EVENT_HEADER = struct.Struct("iIII")
+
+WatchedDirectory = Tuple[Path, bool]  # (directory, recursive)
+
+
+class _WatchBackend(Protocol):
+    def poll(self, timeout: Optional[float]) -> Set[Path]:
+        """Wait up to ``timeout`` seconds (forever when None) and return changed paths."""
+
+    def close(self) -> None:
+        """Release operating-system resources."""
+
+
+class _InotifyBackend:
+    """Linux inotify watches driven through ctypes, without third-party packages."""
+
+    def __init__(self, directories: Sequence[WatchedDirectory]) -> None:
+        library = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(library or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._watches: Dict[int, Tuple[Path, bool]] = {}
+        self._roots = [directory for directory, _ in directories]
+        try:
+            for directory, recursive in directories:
+                self._add(directory, recursive)
+        except OSError:
+            self.close()
+            raise
+
+    def poll(self, timeout: Optional[float]) -> Set[Path]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed: Set[Path] = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            raw_name = data[offset + _EVENT_HEADER.size : offset + _EVENT_HEADER.size + length]
+            offset += _EVENT_HEADER.size + length
+            if mask & _IN_Q_OVERFLOW:
+                # Events were dropped; report every root so callers rebuild everything.
+                LOGGER.warning("inotify event queue overflowed; treating all watched paths as changed.")
+                changed.update(self._roots)
+                continue
+            watched = self._watches.get(wd)
+            if watched is None:
+                continue
+            if mask & _IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory, recursive = watched
+            name = os.fsdecode(raw_name.rstrip(b"\0"))
+            path = directory / name if name else directory
+            if recursive and mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                try:
+                    self._add(path, recursive=True)
+                except OSError as exc:
+                    LOGGER.warning("Unable to watch new directory %s: %s", path, exc)
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _add(self, directory: Path, recursive: bool) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch({directory}): {os.strerror(errno)}")
+        self._watches[wd] = (directory, recursive)
+        if recursive:
+            for child in directory.iterdir():
+                if child.is_dir() and not child.is_symlink():
+                    self._add(child, recursive=True)
+
+
+class _PollingBackend:
+    """Portable fallback that compares size and mtime snapshots at a fixed interval."""
+
+    def __init__(self, directories: Sequence[WatchedDirectory], interval: float = 1.0) -> None:
+        self._directories = list(directories)
+        self._interval = interval
+        self._snapshot = self._scan()
+
+    def poll(self, timeout: Optional[float]) -> Set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {
+                path
+                for path in current.keys() | self._snapshot.keys()
+                if current.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = current
+            if changed:
+                return changed
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return set()
+            time.sleep(self._interval if remaining is None else min(self._interval, remaining))
+
+    def close(self) -> None:
+        return None
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot: Dict[Path, Tuple[int, int]] = {}
+        for directory, recursive in self._directories:
+            if not directory.exists():
+                continue
+            for path in directory.rglob("*") if recursive else directory.iterdir():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                if path.is_file():
+                    snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+
+@dataclass
+class ChangeSet:
+    """Debounced batch of changes relevant to the pipeline."""
+
+    sources: Set[Path] = field(default_factory=set)
+    directives: bool = False
+
+    def __bool__(self) -> bool:
+        return bool(self.sources) or self.directives
+
+
+class MaterialsWatcher:
+    """Report changes to text materials and archives under ``raw_dir`` and to directive files.
+
+    inotify is used on Linux; elsewhere, or when inotify is unavailable (for example
+    because the watch limit is exhausted), the watcher falls back to polling.
+    """
+
+    def __init__(
+        self,
+        raw_dir: Path,
+        directives_path: Path,
+        use_inotify: bool = True,
+        poll_interval: float = 1.0,
+        extra_directive_paths: Sequence[Path] = (),
+    ) -> None:
+        self.raw_dir = raw_dir
+        self.directives_path = directives_path
+        self.directive_paths = {directives_path, *extra_directive_paths}
+        # Editors often save by renaming a temporary file, so watch the parent directories.
+        parents = dict.fromkeys(ensure_directory(path.parent) for path in sorted(self.directive_paths))
+        directories = [(raw_dir, True), *((parent, False) for parent in parents)]
+        self.backend_name = "polling"
+        backend: Optional[_WatchBackend] = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                backend = _InotifyBackend(directories)
+                self.backend_name = "inotify"
+            except (OSError, AttributeError) as exc:
+                LOGGER.warning("inotify unavailable (%s); falling back to polling every %.1fs.", exc, poll_interval)
+        self._backend: _WatchBackend = backend or _PollingBackend(directories, poll_interval)
+
+    def wait(self, debounce: float = 1.0, timeout: Optional[float] = None) -> ChangeSet:
+        """Block until a relevant change occurs, then until ``debounce`` seconds pass quietly.
+
+        Returns an empty change set when ``timeout`` expires without relevant changes.
+        """
+
+        changes = ChangeSet()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not changes:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return changes
+            self._classify(self._backend.poll(remaining), changes)
+        while True:
+            quiet = ChangeSet()
+            self._classify(self._backend.poll(debounce), quiet)
+            if not quiet:
+                return changes
+            changes.sources |= quiet.sources
+            changes.directives = changes.directives or quiet.directives
+
+    def close(self) -> None:
+        self._backend.close()
+
+    def __enter__(self) -> "MaterialsWatcher":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _classify(self, paths: Set[Path], changes: ChangeSet) -> None:
+        for path in paths:
+            if path in self.directive_paths:
+                changes.directives = True
+            elif path == self.raw_dir:
+                changes.sources.add(path)
+            elif path.is_relative_to(self.raw_dir) and (
+                source_kind(path.name) is not None or path.is_dir() or not path.suffix
+            ):
+                # Directories (and paths that vanished, whose type is unknown) may hold materials.
+                changes.sources.add(path)
+
+
+def watch_pipeline(
+    pipeline: WritingPipeline,
+    metadata_overrides: Optional[Dict[str, str]] = None,
+    debounce: float = 1.0,
+    use_inotify: bool = True,
+    poll_interval: float = 1.0,
+) -> None:
+    """Build once, then rebuild on every debounced change until interrupted.
+
+    Material changes trigger an incremental run: ingestion is rescanned, only new or
+    edited files are re-segmented (see `segment_materials`) and only sections whose
+    dependency fingerprint changed are redrafted. Directive-only changes re-run the
+    ``revise`` stage onwards from the cached draft. Failed rebuilds are logged and the
+    watcher keeps running.
+    """
+
+    config = pipeline.config
+    extra = [config.review_comments_path] if config.review_comments_path is not None else []
+    with MaterialsWatcher(config.raw_dir, config.revision_directives_path, use_inotify, poll_interval, extra) as watcher:
+        LOGGER.info(
+            "Watching %s and %s (%s backend).", config.raw_dir, config.revision_directives_path, watcher.backend_name
+        )
+        built = _rebuild(pipeline, "initial build", metadata_overrides, incremental=True)
+        while True:
+            changes = watcher.wait(debounce)
+            if changes.sources:
+                names = sorted(
+                    str(path.relative_to(config.raw_dir)) if path != config.raw_dir else "." for path in changes.sources
+                )
+                built = _rebuild(pipeline, f"materials changed ({', '.join(names)})", metadata_overrides, incremental=True)
+            elif built and config.stage_cache_dir is not None:
+                _rebuild(pipeline, "revision directives changed", metadata_overrides, start_stage="revise")
+            else:
+                built = _rebuild(pipeline, "revision directives changed", metadata_overrides, incremental=True)
+
+
+def _rebuild(
+    pipeline: WritingPipeline,
+    reason: str,
+    metadata_overrides: Optional[Dict[str, str]],
+    incremental: bool = False,
+    start_stage: Optional[str] = None,
+) -> bool:
+    LOGGER.info("Rebuilding: %s.", reason)
+    started = time.perf_counter()
+    try:
+        pipeline.run(metadata_overrides=metadata_overrides, incremental=incremental, start_stage=start_stage)
+    except Exception:  # noqa: BLE001 - keep watching after a failed rebuild
+        LOGGER.exception("Rebuild failed (%s); waiting for the next change.", reason)
+        return False
+    LOGGER.info("Rebuild finished in %.2fs.", time.perf_counter() - started)
+    return True
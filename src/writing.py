@@ -2,20 +2,35 @@
 
 from __future__ import annotations
 
-import json
 import logging
 import re
-from dataclasses import dataclass
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, replace
 from pathlib import Path
-from typing import List, Sequence
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
 
-from .llm import LLMClient, LLMError, LLMGeneration, LLMGenerationPrompt
+from . import metrics, tracing
+from .audit import AuditLogSink, AuditSinkConfig
+from .budget import OutputTokenBudget
+from .llm import LLMClient, LLMError, LLMGeneration, LLMGenerationPrompt, LLMUsage
 from .organization import Segment
-from .outline import OutlineSection
-from .utils import ensure_directory, write_text_file
+from .outline import OutlinePlan, OutlineSection
+from .utils import stable_hash
 
 LOGGER = logging.getLogger(__name__)
 _WORD_PATTERN = re.compile(r"[A-Za-z0-9\u4e00-\u9fa5]{2,}")
+_SHINGLE_NOISE_PATTERN = re.compile(r"[^A-Za-z0-9\u4e00-\u9fa5]+")
+PROMPT_LAYOUTS = ("sectioned", "prefix_cache")
+_SYSTEM_PROMPT = (
+    "You are an expert educational transformation writer. Compose well-structured, factual prose, "
+    "avoiding plagiarism while grounding claims in the provided excerpts."
+)
+_WRITING_GUIDANCE = (
+    "Write cohesive paragraphs (no bullet lists) that synthesize the ideas, cite identifiers in square brackets"
+    " when drawing directly from an excerpt, and include transitional language for flow."
+)
 
 
 @dataclass
@@ -29,6 +44,36 @@ class SectionWriterConfig:
     log_dir: Path | None = None
     max_context_segments: int = 10
     min_paragraph_score: float = 0.25
+    shingle_size: int = 3
+    near_duplicate_threshold: float = 0.6
+    expand_logs: bool = False
+    log_max_bytes: int = 16 * 1024 * 1024
+    prompt_layout: str = "sectioned"
+
+
+@dataclass
+class PromptCacheStats:
+    """Running tally of provider prompt-prefix cache hits for one client."""
+
+    calls: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the share of prompt tokens served from the provider cache."""
+
+        if not self.prompt_tokens:
+            return 0.0
+        return self.cached_tokens / self.prompt_tokens
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "hit_rate": round(self.hit_rate, 4),
+        }
 
 
 @dataclass
@@ -38,74 +83,347 @@ class _CandidateRecord:
     client_id: str
     generation: LLMGeneration
     score: float
+    latency: float = 0.0
+
+
+def build_shared_context(outline: OutlinePlan, title: str) -> str:
+    """Render the report title and full outline shared by every section prompt."""
+
+    outline_lines: List[str] = []
+    for section in outline.sections:
+        outline_lines.append(f"## {section.title}")
+        outline_lines.extend(f"- {bullet}" for bullet in section.bullet_points if bullet)
+    return f"Report title: {title}\n\nReport outline:\n" + "\n".join(outline_lines)
+
+
+def build_section_prompt(
+    config: SectionWriterConfig,
+    section: OutlineSection,
+    segments: Sequence[Segment],
+    shared_context: str = "",
+) -> LLMGenerationPrompt:
+    """Return the prompt sent to every model for one section.
+
+    Kept independent of any client so prompts can be sized without credentials.
+    """
+
+    context_segments = sorted(segments, key=lambda seg: seg.priority)[: config.max_context_segments]
+    bullet_lines = "\n".join(f"- {bullet}" for bullet in section.bullet_points if bullet)
+    excerpt_lines = "\n".join(f"[{segment.identifier}] {segment.text}" for segment in context_segments)
+
+    instruction_language = "中文" if config.language.lower().startswith("zh") else "English"
+    if config.prompt_layout == "prefix_cache":
+        # Stable text first, section-specific text last: the system prompt, guidance
+        # and shared outline form an identical prefix for every call in the run.
+        system_prompt = f"{_SYSTEM_PROMPT}\n\n{_WRITING_GUIDANCE}"
+        user_prompt = (
+            f"{shared_context or 'Report outline: (not provided)'}\n\n"
+            "---\n\n"
+            "Source excerpts (reference identifiers in brackets where relevant):\n"
+            f"{excerpt_lines or '(No supporting segments available)'}\n\n"
+            f"Outline anchor points:\n{bullet_lines or '- (No bullets extracted)'}\n\n"
+            f"Please draft the section '{section.title}' in {instruction_language}."
+        )
+    else:
+        system_prompt = _SYSTEM_PROMPT
+        user_prompt = (
+            f"Please draft the section '{section.title}' in {instruction_language}.\n\n"
+            f"Outline anchor points:\n{bullet_lines or '- (No bullets extracted)'}\n\n"
+            "Source excerpts (reference identifiers in brackets where relevant):\n"
+            f"{excerpt_lines or '(No supporting segments available)'}\n\n"
+            f"{_WRITING_GUIDANCE}"
+        )
+
+    return LLMGenerationPrompt(
+        system_prompt=system_prompt,
+        user_prompt=user_prompt,
+        temperature=config.temperature,
+        max_output_tokens=config.max_output_tokens,
+        top_p=config.top_p,
+    )
+
+
+def build_rewrite_prompt(
+    config: SectionWriterConfig,
+    section: OutlineSection,
+    segments: Sequence[Segment],
+    current_text: str,
+    instructions: Sequence[str],
+    shared_context: str = "",
+) -> LLMGenerationPrompt:
+    """Return the prompt that asks a model to revise an existing section.
+
+    The drafting prompt is reused unchanged and the current text and instructions
+    are appended, so in the ``prefix_cache`` layout the shared prefix still matches.
+    """
+
+    prompt = build_section_prompt(config, section, segments, shared_context)
+    instruction_language = "中文" if config.language.lower().startswith("zh") else "English"
+    instruction_lines = "\n".join(f"- {instruction}" for instruction in instructions)
+    prompt.user_prompt = (
+        f"{prompt.user_prompt}\n\n"
+        "---\n\n"
+        f"Current text of the section:\n{current_text}\n\n"
+        f"Revision instructions:\n{instruction_lines}\n\n"
+        f"Rewrite the section '{section.title}' in {instruction_language} so that it follows the instructions. "
+        "Keep content the instructions do not ask to change, and return only the revised section text."
+    )
+    return prompt
 
 
 class DualLLMSectionWriter:
     """Request two models, reconcile their responses, and return a merged section."""
 
-    def __init__(self, primary: LLMClient, secondary: LLMClient, config: SectionWriterConfig) -> None:
+    def __init__(
+        self,
+        primary: LLMClient,
+        secondary: LLMClient,
+        config: SectionWriterConfig,
+        audit_sink: Optional[AuditLogSink] = None,
+        output_budget: Optional[OutputTokenBudget] = None,
+    ) -> None:
+        if config.prompt_layout not in PROMPT_LAYOUTS:
+            raise ValueError(f"Unknown prompt layout '{config.prompt_layout}'; expected one of {PROMPT_LAYOUTS}.")
         self._primary = primary
         self._secondary = secondary
         self._config = config
-        self._log_dir = ensure_directory(config.log_dir) if config.log_dir else None
+        self._shared_context = ""
+        self._cache_stats: Dict[str, PromptCacheStats] = {}
+        self._stats_lock = threading.Lock()
+        self.degraded_sections: Set[str] = set()
+        if audit_sink is None and config.log_dir:
+            audit_sink = AuditLogSink(
+                config.log_dir,
+                AuditSinkConfig(expand=config.expand_logs, max_bytes=config.log_max_bytes),
+            )
+        self._audit_sink = audit_sink
+        # Per-section output-token limits; without one every call uses config.max_output_tokens.
+        self.output_budget = output_budget
+
+    def begin_draft(self, outline: OutlinePlan, title: str) -> None:
+        """Prepare run-wide prompt context and reset per-run cache statistics.
+
+        In the ``prefix_cache`` layout every section prompt opens with the same report
+        title and full outline, so providers that cache prompt prefixes automatically
+        can reuse that prefix across all sections of a run and across reruns.
+        """
+
+        self._shared_context = build_shared_context(outline, title)
+        with self._stats_lock:
+            self._cache_stats = {}
+        self.degraded_sections = set()
+
+    def dependencies(self, section: OutlineSection, segments: Sequence[Segment]) -> Dict[str, str]:
+        """Return hashes of the inputs that shape this section, grouped by component.
+
+        The prompt template is fingerprinted by rendering it for a placeholder section,
+        so edits to the template text or layout (and, in the ``prefix_cache`` layout,
+        to the shared report outline) invalidate every section.
+        """
+
+        template_prompt = self._build_prompt(OutlineSection(title="{title}", bullet_points=[]), [])
+        return {
+            "segments": stable_hash([[segment.identifier, segment.text] for segment in segments]),
+            "bullets": stable_hash(section.bullet_points),
+            "prompt_template": stable_hash(
+                [template_prompt.system_prompt, template_prompt.user_prompt, self._config.max_context_segments]
+            ),
+            "model_parameters": stable_hash(
+                {
+                    "sampling": [self._config.temperature, self._config.max_output_tokens, self._config.top_p],
+                    "clients": [
+                        [client.identifier, client.model, client.provider]
+                        for client in (self._primary, self._secondary)
+                    ],
+                    "merge": [
+                        self._config.min_paragraph_score,
+                        self._config.shingle_size,
+                        self._config.near_duplicate_threshold,
+                    ],
+                }
+            ),
+        }
+
+    def prompt_cache_report(self) -> Dict[str, object]:
+        """Return per-client and aggregate prompt-cache hit rates for the current run."""
+
+        with self._stats_lock:
+            per_client = {client_id: stats.as_dict() for client_id, stats in self._cache_stats.items()}
+            total = PromptCacheStats(
+                calls=sum(stats.calls for stats in self._cache_stats.values()),
+                prompt_tokens=sum(stats.prompt_tokens for stats in self._cache_stats.values()),
+                cached_tokens=sum(stats.cached_tokens for stats in self._cache_stats.values()),
+            )
+        return {"layout": self._config.prompt_layout, "clients": per_client, "total": total.as_dict()}
+
+    def flush_logs(self) -> None:
+        """Block until queued audit records have been written."""
+
+        if self._audit_sink is not None:
+            self._audit_sink.flush()
+
+    def close(self) -> None:
+        """Flush and stop the background audit sink."""
+
+        if self._audit_sink is not None:
+            self._audit_sink.close()
 
     def write_section(self, section: OutlineSection, segments: Sequence[Segment]) -> str:
         """Generate prose for the supplied outline section using two LLMs."""
 
-        prompt = self._build_prompt(section, segments)
+        merged = self._generate(section, segments, self._build_prompt(section, segments), learn=True)
+        if merged is None:
+            LOGGER.error(
+                "Both LLM invocations failed for section '%s'; falling back to stitched source segments.",
+                section.title,
+            )
+            self.degraded_sections.add(section.title)
+            return self._fallback_from_segments(segments)
+        return merged
+
+    def rewrite_section(
+        self,
+        section: OutlineSection,
+        segments: Sequence[Segment],
+        current_text: str,
+        instructions: Sequence[str],
+    ) -> str:
+        """Regenerate an existing section according to reviewer instructions using two LLMs."""
+
+        prompt = build_rewrite_prompt(self._config, section, segments, current_text, instructions, self._shared_context)
+        merged = self._generate(section, segments, prompt)
+        if merged is None:
+            LOGGER.error("Both LLM invocations failed to rewrite section '%s'; keeping the current text.", section.title)
+            self.degraded_sections.add(section.title)
+            return current_text
+        return merged
+
+    def _generate(
+        self,
+        section: OutlineSection,
+        segments: Sequence[Segment],
+        prompt: LLMGenerationPrompt,
+        learn: bool = False,
+    ) -> Optional[str]:
+        """Send ``prompt`` to both models and merge their answers, or return None if both fail.
+
+        ``learn`` feeds the answer lengths into the output budget. Only drafts do, since
+        rewrite lengths follow the instructions rather than the section's material.
+        """
+
+        if self.output_budget is not None:
+            prompt = replace(prompt, max_output_tokens=self.output_budget.limit(section))
         candidates: List[_CandidateRecord] = []
 
         for client in (self._primary, self._secondary):
+            started = time.perf_counter()
+            generation = self._call(client, section, prompt, learn)
+            if generation is None:
+                continue
+            latency = time.perf_counter() - started
+            self._record_cache_usage(client.identifier, generation)
+            with tracing.span("score", "writer"):
+                score = self._score_generation(generation.text, segments)
+            candidates.append(
+                _CandidateRecord(client_id=client.identifier, generation=generation, score=score, latency=latency)
+            )
+
+        if not candidates:
+            return None
+
+        with tracing.span("merge", "writer"):
+            merged, merge_decisions = self._merge_candidates(section, segments, candidates)
+            tracing.annotate(items=len(merge_decisions))
+        self._persist_logs(section, candidates, merged, merge_decisions)
+        return merged
+
+    def _call(
+        self,
+        client: LLMClient,
+        section: OutlineSection,
+        prompt: LLMGenerationPrompt,
+        learn: bool,
+    ) -> Optional[LLMGeneration]:
+        """Generate with one client and record the call, or return None if it fails.
+
+        With an output budget, a truncated answer is retried once with a larger
+        limit, and with ``learn`` the length of the final answer is fed back into
+        the budget.
+        """
+
+        for attempt in range(2):
+            started = time.perf_counter()
             try:
-                generation = client.generate(prompt)
+                with tracing.span(f"{client.identifier}.generate", "llm", model=client.model):
+                    generation = client.generate(prompt)
+                    tracing.annotate(items=generation.usage.completion_tokens)
             except LLMError as exc:
+                metrics.record_call(
+                    metrics.LLMCallRecord(
+                        client_id=client.identifier,
+                        model=client.model,
+                        provider=client.provider,
+                        section=section.title,
+                        latency=time.perf_counter() - started,
+                        attempts=exc.attempts,
+                        ok=False,
+                        max_output_tokens=prompt.max_output_tokens,
+                    )
+                )
                 LOGGER.error(
                     "LLM %s failed to generate section '%s': %s",
                     client.identifier,
                     section.title,
                     exc,
                 )
-                continue
-            score = self._score_generation(generation.text, segments)
-            candidates.append(_CandidateRecord(client_id=client.identifier, generation=generation, score=score))
-
-        if not candidates:
-            LOGGER.error(
-                "Both LLM invocations failed for section '%s'; falling back to stitched source segments.",
+                return None
+            # Generation-cache hits are counted separately and bill no tokens.
+            usage = LLMUsage() if generation.cached else generation.usage
+            metrics.record_call(
+                metrics.LLMCallRecord(
+                    client_id=client.identifier,
+                    model=generation.model,
+                    provider=generation.provider,
+                    section=section.title,
+                    latency=time.perf_counter() - started,
+                    attempts=generation.attempts,
+                    prompt_tokens=usage.prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                    cached_tokens=usage.cached_tokens,
+                    max_output_tokens=prompt.max_output_tokens,
+                    truncated=generation.truncated,
+                    cached=generation.cached,
+                )
+            )
+            if self.output_budget is None:
+                return generation
+            larger = self.output_budget.retry_limit(prompt.max_output_tokens) if generation.truncated else None
+            if larger is None or attempt:
+                if learn and not generation.cached:
+                    self.output_budget.observe(section, usage.completion_tokens)
+                return generation
+            LOGGER.warning(
+                "LLM %s hit the %d-token limit on section '%s'; retrying with %d.",
+                client.identifier,
+                prompt.max_output_tokens,
                 section.title,
+                larger,
             )
-            return self._fallback_from_segments(segments)
-
-        merged = self._merge_candidates(section, segments, candidates)
-        self._persist_logs(section, candidates, merged)
-        return merged
+            prompt = replace(prompt, max_output_tokens=larger)
+        raise AssertionError("unreachable")
 
     def _build_prompt(self, section: OutlineSection, segments: Sequence[Segment]) -> LLMGenerationPrompt:
-        context_segments = sorted(segments, key=lambda seg: seg.priority)[: self._config.max_context_segments]
-        bullet_lines = "\n".join(f"- {bullet}" for bullet in section.bullet_points if bullet)
-        excerpt_lines = "\n".join(f"[{segment.identifier}] {segment.text}" for segment in context_segments)
-
-        instruction_language = "中文" if self._config.language.lower().startswith("zh") else "English"
-        system_prompt = (
-            "You are an expert educational transformation writer. Compose well-structured, factual prose, "
-            "avoiding plagiarism while grounding claims in the provided excerpts."
-        )
-        user_prompt = (
-            f"Please draft the section '{section.title}' in {instruction_language}.\n\n"
-            f"Outline anchor points:\n{bullet_lines or '- (No bullets extracted)'}\n\n"
-            "Source excerpts (reference identifiers in brackets where relevant):\n"
-            f"{excerpt_lines or '(No supporting segments available)'}\n\n"
-            "Write cohesive paragraphs (no bullet lists) that synthesize the ideas, cite identifiers in square brackets"
-            " when drawing directly from an excerpt, and include transitional language for flow."
-        )
+        return build_section_prompt(self._config, section, segments, self._shared_context)
 
-        return LLMGenerationPrompt(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            temperature=self._config.temperature,
-            max_output_tokens=self._config.max_output_tokens,
-            top_p=self._config.top_p,
-        )
+    def _record_cache_usage(self, client_id: str, generation: LLMGeneration) -> None:
+        if generation.cached:
+            return
+        usage = generation.usage
+        with self._stats_lock:
+            stats = self._cache_stats.setdefault(client_id, PromptCacheStats())
+            stats.calls += 1
+            stats.prompt_tokens += usage.prompt_tokens
+            stats.cached_tokens += usage.cached_tokens
 
     def _score_generation(self, text: str, segments: Sequence[Segment]) -> float:
         if not text.strip():
@@ -120,29 +438,94 @@ class DualLLMSectionWriter:
         section: OutlineSection,
         segments: Sequence[Segment],
         candidates: Sequence[_CandidateRecord],
-    ) -> str:
-        best_candidate = max(candidates, key=lambda candidate: candidate.score)
-        merged_paragraphs = self._extract_paragraphs(best_candidate.generation.text)
+    ) -> Tuple[str, List[Dict[str, object]]]:
+        ordered = sorted(candidates, key=lambda candidate: candidate.score, reverse=True)
+        best_candidate = ordered[0]
+        candidate_paragraphs = [
+            (candidate.client_id, self._extract_paragraphs(candidate.generation.text)) for candidate in ordered
+        ]
+
+        # Shingle every paragraph of every candidate once so the similarity checks below
+        # only intersect precomputed sets instead of re-tokenizing per comparison.
+        shingles = [[self._shingle(paragraph) for paragraph in paragraphs] for _, paragraphs in candidate_paragraphs]
+
+        merged_paragraphs = list(candidate_paragraphs[0][1])
         merged_set = {paragraph.strip() for paragraph in merged_paragraphs}
-
-        for candidate in sorted(candidates, key=lambda candidate: candidate.score, reverse=True):
-            if candidate is best_candidate:
-                continue
-            for paragraph in self._extract_paragraphs(candidate.generation.text):
+        kept_origins = [f"{best_candidate.client_id}#{index}" for index in range(len(merged_paragraphs))]
+        kept_sizes = [len(paragraph_shingles) for paragraph_shingles in shingles[0]]
+        postings: Dict[int, List[int]] = {}
+        for position, paragraph_shingles in enumerate(shingles[0]):
+            for shingle in paragraph_shingles:
+                postings.setdefault(shingle, []).append(position)
+
+        decisions: List[Dict[str, object]] = []
+        for (client_id, paragraphs), paragraph_shingles in zip(candidate_paragraphs[1:], shingles[1:]):
+            for index, (paragraph, paragraph_set) in enumerate(zip(paragraphs, paragraph_shingles)):
                 normalized = paragraph.strip()
-                if not normalized or normalized in merged_set:
+                decision: Dict[str, object] = {"client_id": client_id, "paragraph": index}
+                if not normalized:
+                    continue
+                if normalized in merged_set:
+                    decisions.append({**decision, "action": "dropped_duplicate", "similarity": 1.0})
+                    continue
+                match, similarity = self._closest_paragraph(paragraph_set, postings, kept_sizes)
+                if match is not None and similarity >= self._config.near_duplicate_threshold:
+                    decisions.append(
+                        {
+                            **decision,
+                            "action": "dropped_near_duplicate",
+                            "similarity": round(similarity, 4),
+                            "matched": kept_origins[match],
+                        }
+                    )
                     continue
                 para_score = self._paragraph_score(normalized, segments)
                 if para_score < self._config.min_paragraph_score:
+                    decisions.append({**decision, "action": "dropped_low_score", "score": round(para_score, 4)})
                     continue
+                decisions.append({**decision, "action": "kept", "similarity": round(similarity, 4)})
+                for shingle in paragraph_set:
+                    postings.setdefault(shingle, []).append(len(merged_paragraphs))
                 merged_paragraphs.append(normalized)
                 merged_set.add(normalized)
+                kept_origins.append(f"{client_id}#{index}")
+                kept_sizes.append(len(paragraph_set))
 
         if not merged_paragraphs:
             LOGGER.warning("Section '%s' produced empty paragraphs; using fallback.", section.title)
-            return self._fallback_from_segments(segments)
+            return self._fallback_from_segments(segments), decisions
+
+        return "\n\n".join(merged_paragraphs), decisions
+
+    def _shingle(self, paragraph: str) -> FrozenSet[int]:
+        """Return hashed character n-gram shingles for near-duplicate detection."""
 
-        return "\n\n".join(merged_paragraphs)
+        compact = _SHINGLE_NOISE_PATTERN.sub("", paragraph.lower())
+        size = max(self._config.shingle_size, 1)
+        if len(compact) <= size:
+            return frozenset({hash(compact)}) if compact else frozenset()
+        return frozenset(hash(compact[start : start + size]) for start in range(len(compact) - size + 1))
+
+    def _closest_paragraph(
+        self,
+        paragraph_set: FrozenSet[int],
+        postings: Dict[int, List[int]],
+        kept_sizes: Sequence[int],
+    ) -> Tuple[int | None, float]:
+        """Return the kept paragraph with the highest Jaccard similarity and its score."""
+
+        if not paragraph_set:
+            return None, 0.0
+        overlaps: Counter[int] = Counter()
+        for shingle in paragraph_set:
+            overlaps.update(postings.get(shingle, ()))
+        best_match: int | None = None
+        best_similarity = 0.0
+        for position, shared in overlaps.items():
+            similarity = shared / (len(paragraph_set) + kept_sizes[position] - shared)
+            if similarity > best_similarity:
+                best_match, best_similarity = position, similarity
+        return best_match, best_similarity
 
     def _paragraph_score(self, paragraph: str, segments: Sequence[Segment]) -> float:
         base = self._keyword_coverage_score(paragraph, segments)
@@ -180,35 +563,32 @@ class DualLLMSectionWriter:
         section: OutlineSection,
         candidates: Sequence[_CandidateRecord],
         merged_text: str,
+        merge_decisions: Sequence[Dict[str, object]] = (),
     ) -> None:
-        if not self._log_dir:
+        if self._audit_sink is None:
             return
-        section_dir = ensure_directory(self._log_dir / self._slugify(section.title))
-        for candidate in candidates:
-            file_name = f"{candidate.client_id}-{self._slugify(candidate.generation.model)}.md"
-            write_text_file(section_dir / file_name, candidate.generation.text)
-        metadata = {
-            "section": section.title,
-            "language": self._config.language,
-            "candidates": [
-                {
-                    "client_id": candidate.client_id,
-                    "model": candidate.generation.model,
-                    "provider": candidate.generation.provider,
-                    "score": round(candidate.score, 4),
-                }
-                for candidate in candidates
-            ],
-            "merged_length": len(merged_text),
-        }
-        write_text_file(section_dir / "merged.md", merged_text)
-        write_text_file(
-            section_dir / "metadata.json",
-            json.dumps(metadata, ensure_ascii=False, indent=2),
+        self._audit_sink.submit(
+            {
+                "type": "section",
+                "section": section.title,
+                "language": self._config.language,
+                "candidates": [
+                    {
+                        "client_id": candidate.client_id,
+                        "model": candidate.generation.model,
+                        "provider": candidate.generation.provider,
+                        "score": round(candidate.score, 4),
+                        "latency": round(candidate.latency, 4),
+                        "attempts": candidate.generation.attempts,
+                        "cached": candidate.generation.cached,
+                        "usage": asdict(candidate.generation.usage),
+                        "text": candidate.generation.text,
+                    }
+                    for candidate in candidates
+                ],
+                "merged": merged_text,
+                "merged_length": len(merged_text),
+                "near_duplicate_threshold": self._config.near_duplicate_threshold,
+                "merge_decisions": list(merge_decisions),
+            }
         )
-
-    def _slugify(self, value: str) -> str:
-        sanitized = re.sub(r"[^A-Za-z0-9\u4e00-\u9fa5]+", "-", value.strip()).strip("-")
-        if not sanitized:
-            return "section"
-        return sanitized.lower()
\ No newline at end of file